@@ -8,11 +8,13 @@ from AdvEditor import PatchData
 # initialize attributes
 filepath = ""
 filename = ""
+rom = None  # GBA.ROMImage of filepath, for reading
 savedversion = None
 tilemapL1_8x8 = None
 tilemapL0flags = None
 tile16interact = None
 sublevel = SMA3.Sublevel()
+sublevelcatalog = SMA3.SublevelCatalog()  # summaries of all ROM sublevels
 sublevelentr = {}
 
 # initialize patch flags
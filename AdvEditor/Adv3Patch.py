@@ -34,6 +34,8 @@ def applypatch(patchkey: str, *, warndialog=True):
 
     # update editor patch flag and layouts
     setattr(Adv3Attr, patchkey, True)
+    # patches can change how sublevel data is read
+    Adv3Attr.sublevelcatalog.refresh(Adv3Attr.rom)
     AdvWindow.editor.updatepatchlayouts()
     AdvWindow.statusbar.setActionText("Applied patch: " + name)
 
@@ -139,13 +141,12 @@ def loadsublevelpatchattr(sublevel):
 def _movevanillasublevel(sublevelID):
     """Move a sublevel, only if its data is still in the vanilla sublevel
     region, to use the vanilla region for patch freespace."""
-    sublevel = SMA3.Sublevel.importbyID(Adv3Attr.filepath, sublevelID)
-    move = False
-    for block in sublevel.datablocks.values():
+    for block in Adv3Attr.sublevelcatalog[sublevelID].datablocks.values():
         if 0x081C1D54 <= block[0] < 0x081EEE8C:
             break
     else:
         return True
+    sublevel = SMA3.Sublevel.importbyID(Adv3Attr.filepath, sublevelID)
     with GBA.Open(Adv3Attr.filepath, "rb") as f:
         sublevel.importspritetileset(f, Adv3Attr.sublevelstripes)
     saved = Adv3Save.savesubleveltoROM(sublevel, sublevelID)
@@ -165,7 +166,8 @@ def applyhuffmantolz77():
             # import data and convert to LZ77
             ptr = f.readptr(ptrref)
             data = f.read_decompress(ptr)
-            toinsert.append((GBA.compressLZ77(data), ptrref))
+            toinsert.append((GBA.compressLZ77(
+                data, optimal=AdvSettings.import_optimalLZ77), ptrref))
 
             # erase old data
             oldlength = f.tell() - ptr
@@ -205,19 +207,8 @@ def applysublevelstripes():
             oldstripeIDs.append(f.read(6))
 
         # extract old sprite tileset header settings
-        f.seek(SMA3.Pointers.sublevelmainptrs)
-        mainptrtable = f.readint(4)
-        f.seek(mainptrtable)
-        sublevelmainptrs = []
-        for i in range(SMA3.Constants.maxsublevelID + 1):
-            sublevelmainptrs.append(f.readint(4))
-
-        sublevelh7 = []
-        temp = SMA3.Sublevel()
-        for ptr in sublevelmainptrs:
-            f.seek(ptr)
-            temp.extractheader(f.read(10), temp.headerbitcounts)
-            sublevelh7.append(temp.header[7])
+        sublevelh7 = [Adv3Attr.sublevelcatalog[sublevelID].header[7]
+                      for sublevelID in range(SMA3.Constants.maxsublevelID + 1)]
 
         # calculate new sprite tilesets, indexed by sublevel
         newstripeIDs = bytearray()
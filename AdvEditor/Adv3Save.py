@@ -3,13 +3,14 @@ Saving/exporting-related functions that rely on other parts of Advynia,
 as opposed to AdvGame, which does not rely on Advynia globals or Qt."""
 
 # standard library imports
-import os, traceback
+import bisect, hashlib, itertools, os, traceback
 
 # import from other files
-import AdvMetadata, AdvEditor, AdvFile, AdvGame
+import AdvMetadata, AdvEditor, AdvFile
 from AdvEditor import AdvSettings, AdvWindow, Adv3Attr, Adv3Patch, Adv3Visual
 from AdvGame import GBA, SMA3
 from AdvGUI.GeneralQt import QSimpleDialog
+from AdvGUI import QtAdvFunc
 
 savewrapperactive = False
 queuedalert = None
@@ -17,8 +18,8 @@ queuedalert = None
 # General save functions
 
 def savewrapper(func, *args, **kwargs):
-    """Wrapper for functions that modify the ROM. Handles restoring the ROM if
-    an exception occurs.
+    """Wrapper for functions that modify the ROM. Writes are staged in a ROM
+    transaction, and only written to the file if no exception occurs.
     Also includes the unmodified ROM warning, and writing/updating Advynia
     metadata."""
 
@@ -28,6 +29,7 @@ def savewrapper(func, *args, **kwargs):
     if savewrapperactive:
         return func(*args, **kwargs)
     savewrapperactive = True
+    started = False
 
     try:
         if not AdvEditor.ROM.exists(): return
@@ -35,8 +37,10 @@ def savewrapper(func, *args, **kwargs):
         # display warning if the ROM is unmodified
         if not _firstsavewarning(): return
 
-        # back up the ROM
-        AdvEditor.Recovery.backupROM()
+        # prefetched sublevels may be changed by the save
+        AdvEditor.Prefetch.clear()
+        Adv3Attr.rom.begin()
+        started = True
 
         # save Advynia metadata
         if Adv3Attr.savedversion is None or\
@@ -46,26 +50,67 @@ def savewrapper(func, *args, **kwargs):
         try:
             # run save function, and return its return value(s)
             output = func(*args, **kwargs)
-            if queuedalert:
-                queuedalert.exec()
-            return output
+            if AdvMetadata.printtime: timer = QtAdvFunc.timerstart()  # debug
+            writtenranges = Adv3Attr.rom.commit(
+                AdvEditor.Recovery.journalpath())
         except ROMFreespaceError:
-            AdvEditor.Recovery.restoreROM()
+            _rollback()
             QSimpleDialog(AdvWindow.editor, title="Error", wordwrap=False,
                 text="File is already at the GBA max ROM size, 32 MiB.\n"
                      "Data was not saved."
                           ).exec()
         except Exception:
-            AdvEditor.Recovery.restoreROM()
+            _rollback()
             text = ("An error occurred when saving. Your ROM has not been "
                     "modified.\n\n" + traceback.format_exc())
             traceback.print_exc()
             QSimpleDialog(AdvWindow.editor, title="Error",
                           text=text).exec()
+        else:
+            # the ROM was written, so later errors must not roll it back
+            _finishsave(writtenranges)
+            if AdvMetadata.printtime:  # debug
+                print("ROM commit:", QtAdvFunc.timerend(timer), "ms")
+                print("Free space index valid:",
+                      Adv3Attr.rom.freespace.validate(Adv3Attr.rom.data))
+            if queuedalert:
+                queuedalert.exec()
+            return output
     finally:
+        if started:
+            if Adv3Attr.rom.intransaction:
+                Adv3Attr.rom.rollback()
+            AdvEditor.Prefetch.schedule(Adv3Attr.sublevel)
         queuedalert = None
         savewrapperactive = False
 
+def _finishsave(writtenranges):
+    """Remove the save journal and update the ROM cache, after a save was
+    committed. Errors are reported without affecting the saved ROM.
+    A remaining journal is complete, so it isn't replayed on the next load."""
+    for func, args in (
+            (AdvEditor.Recovery.finishjournal, ()),
+            (AdvEditor.ROMCache.update, (Adv3Attr.rom, writtenranges))):
+        try:
+            func(*args)
+        except Exception:
+            text = ("Your ROM was saved, but an error occurred afterwards."
+                    "\n\n" + traceback.format_exc())
+            traceback.print_exc()
+            QSimpleDialog(AdvWindow.editor, title="Warning", text=text).exec()
+
+def _rollback():
+    "Discard the current save's writes, and any patch flags it changed."
+    Adv3Attr.rom.rollback()
+    if os.path.exists(AdvEditor.Recovery.journalpath()):
+        # the commit was interrupted: undo any writes that reached the file
+        Adv3Attr.rom.close()
+        AdvEditor.Recovery.recoverjournal(Adv3Attr.filepath)
+        Adv3Attr.rom.remap()
+    Adv3Patch.detectpatches()
+    # the sublevel catalog may include discarded writes
+    Adv3Attr.sublevelcatalog.refresh(Adv3Attr.rom)
+
 def savedatatoROM(data, ptrref,
                   freespacestart=0x08400000, freespaceend=0x0A000000):
     """Wrapper for GBA.savedatatofreespace, for Advynia saving.
@@ -81,7 +126,7 @@ def savedatatoROM(data, ptrref,
             return newptr
 
         # expand ROM if allowed
-        size = os.path.getsize(Adv3Attr.filepath)
+        size = len(Adv3Attr.rom)
         maxsize = freespaceend - 0x08000000
         if size < maxsize:
             expandROM(min(0x100000, maxsize - size))
@@ -115,7 +160,7 @@ def _saveAdvyniaMetadata():
 def expandROM(bytecount):
     "Append a number of 00 bytes to the end of the ROM."
 
-    size = os.path.getsize(Adv3Attr.filepath)
+    size = len(Adv3Attr.rom)
     if size >= 0x2000000:
         raise ROMFreespaceError
     newsize = size + bytecount
@@ -123,8 +168,10 @@ def expandROM(bytecount):
         bytecount = 0x2000000 - size
         newsize = 0x2000000
 
-    with open(Adv3Attr.filepath, "ab") as f:
+    with GBA.Open(Adv3Attr.filepath, "r+b") as f:
+        f.seek(GBA.addrfromfile(size))
         f.write(bytes(bytecount))  # fill with 00 bytes
+    Adv3Attr.rom.remap()
 
     if AdvSettings.warn_save_expandROM:
         global queuedalert
@@ -138,49 +185,19 @@ def expandROM(bytecount):
 def savesubleveltoROM(sublevel, sublevelID):
     "Save a sublevel to the ROM, with the specified ID."
 
-    def _save():
-        with GBA.Open(Adv3Attr.filepath, "r+b") as f:
-            # erase old sublevel data
-            oldsublevel = SMA3.Sublevel.importbyID(
-                Adv3Attr.filepath, sublevelID)
-            f.erasedata(*oldsublevel.datablocks["main"])
-            f.erasedata(*oldsublevel.datablocks["sprite"])
-
-            # save new sublevel data
-            maindata = sublevel.exportmaindata()
-            spritedata = sublevel.exportspritedata()
-
-            mainptr2 = f.readptr(SMA3.Pointers.sublevelmainptrs) + 4*sublevelID
-            spriteptr2 = f.readptr(SMA3.Pointers.sublevelspriteptrs) +\
-                         4*sublevelID
-
-            # save layer 2/3 Y offsets
-            f.seek(f.readptr(SMA3.Pointers.sublevellayerY) + 4*sublevelID)
-            f.writeint(sublevel.layerYoffsets[2], 2)
-            f.writeint(sublevel.layerYoffsets[3], 2)
-
-        mainptr1 = savedatatoROM(maindata, AdvGame.PtrRef(mainptr2))
-        spriteptr1 = savedatatoROM(spritedata, AdvGame.PtrRef(spriteptr2))
-
-        # save extended sublevel data from patches
-        savesublevelpatchattr(sublevel, sublevelID)
-
-        return mainptr1, spriteptr1
-
-    output = savewrapper(_save)
+    output = savewrapper(_savesublevels, {sublevelID: sublevel})
     if output is None:
         # saving failed
         return
-    mainptr1, spriteptr1 = output
+    sublevel.datablocks = output[sublevelID]
+    Adv3Attr.sublevelcatalog.refresh(Adv3Attr.rom, (sublevelID,))
+    mainptr1 = sublevel.datablocks["main"][0]
+    spriteptr1 = sublevel.datablocks["sprite"][0]
 
     # copy sublevel to recovery folder
     if AdvSettings.recovery_autoexport:
         AdvEditor.Recovery.exportsublevel()
 
-    # update sublevel's data blocks
-    sublevel.datablocks = SMA3.Sublevel.importbyID(
-        Adv3Attr.filepath, sublevelID).datablocks
-
     # update window title and status bar
     AdvWindow.editor.updatewindowtitle()
     AdvWindow.statusbar.setActionText(
@@ -189,6 +206,104 @@ def savesubleveltoROM(sublevel, sublevelID):
 
     return True
 
+def savesublevelstoROM(sublevels):
+    """Save multiple sublevels to the ROM, from a dict indexed by sublevel ID.
+    Faster than saving each sublevel separately, for bulk imports."""
+
+    output = savewrapper(_savesublevels, sublevels)
+    if output is None:
+        # saving failed
+        return
+    for sublevelID, sublevel in sublevels.items():
+        sublevel.datablocks = output[sublevelID]
+    Adv3Attr.sublevelcatalog.refresh(Adv3Attr.rom, sorted(sublevels))
+
+    AdvWindow.editor.updatewindowtitle()
+    AdvWindow.statusbar.setActionText(
+        f"Saved {AdvEditor.Format.pluralize(len(sublevels), 'sublevel')}.")
+
+    return True
+
+def _savesublevels(sublevels):
+    """Save sublevels from a dict indexed by sublevel ID.
+    The old data blocks are found with one read of the pointer tables, and
+    erased together. Then the new data is saved, largest first, and each
+    sublevel-indexed table is written once.
+    If AdvSettings.save_dedup is enabled, data that already exists in another
+    sublevel is shared instead of saved again.
+    Returns the new data blocks, indexed by sublevel ID."""
+
+    minID = min(sublevels)
+    count = max(sublevels) + 1 - minID
+
+    # erase old sublevel data, unless other sublevels share it
+    oldsublevels = SMA3.Sublevel.importmultiple(Adv3Attr.filepath, sublevels)
+    with GBA.Open(Adv3Attr.filepath, "r+b") as f:
+        usedptrs = subleveldataptrs(f, exclude=sublevels)
+        for oldsublevel in oldsublevels.values():
+            for ptr, length in oldsublevel.datablocks.values():
+                if ptr not in usedptrs:
+                    f.erasedata(ptr, length)
+
+    # save new sublevel data
+    copies = None
+    if AdvSettings.save_dedup:
+        copies = GBA.DataCopyIndex(Adv3Attr.rom, usedptrs)
+    datablocks = {sublevelID: {} for sublevelID in sublevels}
+    newdata = []
+    for sublevelID, sublevel in sublevels.items():
+        newdata.append((sublevel.exportmaindata(), sublevelID, "main"))
+        newdata.append((sublevel.exportspritedata(), sublevelID, "sprite"))
+    newdata.sort(key=lambda item: len(item[0]), reverse=True)
+    for data, sublevelID, key in newdata:
+        ptr = copies.find(data) if copies is not None else None
+        if ptr is None:
+            ptr = savedatatoROM(data, None)
+            if copies is not None:
+                copies.add(ptr)
+        datablocks[sublevelID][key] = [ptr, len(data)]
+
+    # update pointer tables and layer 2/3 Y offsets, 4 bytes per sublevel
+    mainptrs = {sublevelID: (blocks["main"][0],)
+                for sublevelID, blocks in datablocks.items()}
+    spriteptrs = {sublevelID: (blocks["sprite"][0],)
+                  for sublevelID, blocks in datablocks.items()}
+    layerYoffsets = {sublevelID: (sublevel.layerYoffsets[2],
+                                  sublevel.layerYoffsets[3])
+                     for sublevelID, sublevel in sublevels.items()}
+    with GBA.Open(Adv3Attr.filepath, "r+b") as f:
+        for tableptr, length, entries in (
+                (SMA3.Pointers.sublevelmainptrs, 4, mainptrs),
+                (SMA3.Pointers.sublevelspriteptrs, 4, spriteptrs),
+                (SMA3.Pointers.sublevellayerY, 2, layerYoffsets)):
+            tablestart = f.readptr(tableptr) + 4*minID
+            f.seek(tablestart)
+            table = f.readints(length, 4*count // length)
+            for sublevelID, entry in entries.items():
+                index = (sublevelID - minID) * len(entry)
+                table[index:index+len(entry)] = entry
+            f.seek(tablestart)
+            f.writeints(table, length)
+
+    # save extended sublevel data from patches
+    for sublevelID, sublevel in sublevels.items():
+        savesublevelpatchattr(sublevel, sublevelID)
+
+    return datablocks
+
+def subleveldataptrs(f, exclude=()):
+    """Return the set of main/sprite data pointers used by all sublevels,
+    other than the excluded sublevel IDs. Data at these pointers is still in
+    use, and shouldn't be erased."""
+    ptrs = set()
+    for tableptr in (SMA3.Pointers.sublevelmainptrs,
+                     SMA3.Pointers.sublevelspriteptrs):
+        f.seek(f.readptr(tableptr))
+        table = f.readints(4, SMA3.Constants.maxsublevelID+1)
+        ptrs.update(ptr for sublevelID, ptr in enumerate(table)
+                    if sublevelID not in exclude)
+    return ptrs
+
 def savesublevelpatchattr(sublevel, sublevelID):
     "Save additional sublevel data from Advynia's patches."
 
@@ -367,3 +482,302 @@ def _savetablemessages(messages, texttype):
         f.readseek(messages[0].ptrref())
         f.write(bytes(ptrs))
     return newblockptr
+
+# ROM compaction
+
+def compactROM(truncate=False):
+    """Move all relocatable data in expanded space to the lowest free
+    locations, and update its pointers. If truncate is True, also shrink the
+    ROM to the smallest 1 MiB multiple that holds all data."""
+
+    oldsize = len(Adv3Attr.rom)
+    moves = savewrapper(_compactROM, truncate)
+    if moves is None:
+        # saving failed
+        return
+
+    # update the current sublevel's data blocks, if it was loaded from ROM
+    translate = _translator(moves)
+    for block in Adv3Attr.sublevel.datablocks.values():
+        block[0] = translate(block[0])
+    Adv3Attr.sublevelcatalog.refresh(Adv3Attr.rom)
+
+    AdvWindow.editor.updatewindowtitle()
+    movecount = sum(1 for oldptr, newptr, _ in moves if oldptr != newptr)
+    statustext = ["Compacted ROM: moved ",
+                  AdvEditor.Format.pluralize(movecount, "data block")]
+    newsize = len(Adv3Attr.rom)
+    if newsize != oldsize:
+        statustext.append(
+            f", truncated to {AdvEditor.Number.megabytetext(newsize)} MiB")
+    statustext.append(".")
+    AdvWindow.statusbar.setActionText("".join(statustext))
+
+    return True
+
+def _compactROM(truncate=False, freespacestart=0x08400000):
+    """Repack relocatable data blocks, in address order, into the lowest free
+    space that fits each one. A block never moves to a higher address.
+    Data that isn't a known relocatable block stays in place.
+    Returns a list of (old pointer, new pointer, length) per block."""
+
+    blocks, refs = _relocatabledata(freespacestart)
+
+    with GBA.Open(Adv3Attr.filepath, "r+b") as f:
+        # erase all blocks first, so free space includes their locations
+        blockdata = []
+        for ptr, length in blocks:
+            f.seek(ptr)
+            blockdata.append(f.read(length))
+            f.erasedata(ptr, length)
+
+        # free runs as [start, end], as file offsets
+        regionstart = GBA.addrtofile(freespacestart)
+        runs = [[max(start, regionstart), start + length]
+                for start, length in Adv3Attr.rom.freespace
+                if start + length > regionstart]
+
+        # place each block, preserving its word alignment
+        moves = []
+        for (ptr, length), data in zip(blocks, blockdata):
+            offset = GBA.addrtofile(ptr)
+            align = offset % 4
+            newoffset = offset
+            for start, end in runs:
+                if start + align > offset:
+                    break
+                if start + align + length <= end:
+                    newoffset = start + align
+                    break
+            runs = _reserverun(runs, newoffset - align, newoffset + length)
+            newptr = GBA.addrfromfile(newoffset)
+            f.seek(newptr)
+            f.write(data)
+            moves.append((ptr, newptr, length))
+
+        # update pointers, including pointers stored in moved blocks
+        translate = _translator(moves)
+        for ref in refs:
+            f.seek(translate(ref))
+            ptr = f.readint(4)
+            newptr = translate(ptr)
+            if newptr != ptr:
+                f.seek(translate(ref))
+                f.writeint(newptr, 4)
+
+    if truncate:
+        # remove trailing free space, in 1 MiB increments
+        rom = Adv3Attr.rom
+        dataend = len(rom)
+        for start, length in rom.freespace:
+            if start + length >= len(rom):
+                dataend = start
+        newsize = max(-(-dataend // 0x100000) * 0x100000, 0x400000)
+        if newsize < len(rom):
+            rom.truncate(newsize)
+
+    return moves
+
+def _relocatabledata(freespacestart=0x08400000):
+    """Find all data blocks in expanded space that Advynia can relocate, and
+    the pointers to them.
+    Returns a sorted list of [pointer, length], with overlapping or adjacent
+    blocks merged, and a set of addresses of pointers to update."""
+
+    filepath = Adv3Attr.filepath
+    blocks = []
+    refs = set()
+
+    # sublevel main/sprite data
+    sublevelIDs = range(SMA3.Constants.maxsublevelID + 1)
+    for sublevel in SMA3.Sublevel.importmultiple(
+            filepath, sublevelIDs).values():
+        blocks += sublevel.datablocks.values()
+    with GBA.Open(filepath, "rb") as f:
+        for tableptr in (SMA3.Pointers.sublevelmainptrs,
+                         SMA3.Pointers.sublevelspriteptrs):
+            tablestart = f.readptr(tableptr)
+            refs.update(range(tablestart, tablestart + 4*len(sublevelIDs), 4))
+
+    # level entrances and their pointer tables
+    for entrances in SMA3.importlevelentrances(
+            filepath, maxmidpoints=Adv3Attr.maxmidpoints,
+            midwaylen=6 if Adv3Attr.midway6byte else 4):
+        if entrances.datablock:
+            blocks.append(entrances.datablock)
+        blocks.append(entrances.ptrs.datablock)
+        refs.update(entrances.ptrref)
+        tablestart = entrances.ptrs.datablock[0]
+        refs.update(range(tablestart, tablestart + 4*len(entrances.ptrs), 4))
+
+    # messages
+    for texttype, cls in SMA3.textclasses.items():
+        ptrref = cls.ptrref()
+        if texttype == "Ending":
+            refs.update(ptrref)
+        else:
+            ptrtable = GBA.PointerTable.importtable(
+                filepath, ptrref, ptrref.vdest, cls.vlen, maxlen=0x1000)
+            tablestart = ptrtable.datablock[0]
+            refs.update(range(tablestart, tablestart + 4*len(ptrtable), 4))
+            if texttype == "Credits":
+                refs.update(SMA3.Pointers.text["Credits final"])
+        for message in cls.importall(filepath):
+            if message.datablock:
+                blocks.append(message.datablock)
+
+    # compressed graphics and tilemaps
+    with GBA.Open(filepath, "rb") as f:
+        for ptrref in compressedptrrefs():
+            ptr = f.readptr(ptrref)
+            if ptr < freespacestart:
+                continue
+            try:
+                f.read_decompress(ptr)
+            except (ValueError, IndexError):
+                # invalid data of unknown length; leave it in place
+                continue
+            blocks.append((ptr, f.tell() - ptr))
+            refs.update(ptrref)
+
+    # merge overlapping/adjacent blocks, to keep their relative positions
+    merged = []
+    for ptr, length in sorted(tuple(block) for block in blocks):
+        if ptr < freespacestart or length <= 0:
+            continue
+        if merged and ptr <= sum(merged[-1]):
+            merged[-1][1] = max(sum(merged[-1]), ptr + length) - merged[-1][0]
+        else:
+            merged.append([ptr, length])
+    return merged, refs
+
+def _reserverun(runs, start, end):
+    "Remove a range of file offsets from a list of free runs [start, end]."
+    output = []
+    for runstart, runend in runs:
+        if runend <= start or runstart >= end:
+            output.append([runstart, runend])
+            continue
+        if runstart < start:
+            output.append([runstart, start])
+        if runend > end:
+            # free runs begin at word boundaries
+            newstart = -(-end // 4) * 4
+            if newstart < runend:
+                output.append([newstart, runend])
+    return output
+
+def _translator(moves):
+    """Return a function that maps a pointer to its new location, given a list
+    of (old pointer, new pointer, length) sorted by old pointer. Pointers
+    outside any moved block are unchanged."""
+    oldptrs = [oldptr for oldptr, _, _ in moves]
+    def translate(ptr):
+        index = bisect.bisect_right(oldptrs, ptr) - 1
+        if index >= 0:
+            oldptr, newptr, length = moves[index]
+            if ptr < oldptr + length:
+                return ptr - oldptr + newptr
+        return ptr
+    return translate
+
+# Deduplication
+
+def compressedptrrefs():
+    """Return an iterator of the PtrRefs of all compressed graphics/tilemaps,
+    including Huffman data."""
+    return itertools.chain(SMA3.Pointers.LZ77_graphics.values(),
+                           SMA3.Pointers.LZ77_tilemaps.values())
+
+def compresseddataptrs(f, exclude=()):
+    """Return the set of pointers to compressed graphics/tilemaps, other than
+    from the excluded PtrRefs. Data at these pointers is still in use, and
+    shouldn't be erased."""
+    exclude = set(exclude)
+    return {f.readptr(ptrref) for ptrref in compressedptrrefs()
+            if ptrref not in exclude}
+
+def dedupROM():
+    """Point all duplicate sublevel data and compressed graphics at a single
+    copy, and erase the other copies from expanded space."""
+
+    moved = savewrapper(_dedupROM)
+    if moved is None:
+        # saving failed
+        return
+
+    # update the current sublevel's data blocks, if it was loaded from ROM
+    for block in Adv3Attr.sublevel.datablocks.values():
+        block[0] = moved.get(block[0], block[0])
+    Adv3Attr.sublevelcatalog.refresh(Adv3Attr.rom)
+
+    AdvWindow.editor.updatewindowtitle()
+    AdvWindow.statusbar.setActionText(
+        "Removed " + AdvEditor.Format.pluralize(
+            len(moved), "duplicate data block") + ".")
+
+    return True
+
+def _dedupROM(freespacestart=0x08400000):
+    """Find duplicate data blocks by content, then point every reference to
+    the lowest copy. Sublevel data must match byte for byte; compressed data
+    matches if it has the same format and decompressed data.
+    Returns a dict of erased pointers to the pointers of their copies."""
+
+    filepath = Adv3Attr.filepath
+    blocks = {}  # pointer: [content key, length, pointer addresses]
+
+    with GBA.Open(filepath, "r+b") as f:
+        # sublevel main/sprite data
+        tablestarts = [f.readptr(tableptr) for tableptr in (
+            SMA3.Pointers.sublevelmainptrs, SMA3.Pointers.sublevelspriteptrs)]
+        sublevels = SMA3.Sublevel.importmultiple(
+            filepath, range(SMA3.Constants.maxsublevelID + 1))
+        for sublevelID, sublevel in sublevels.items():
+            for tablestart, key in zip(tablestarts, ("main", "sprite")):
+                ptr, length = sublevel.datablocks[key]
+                f.seek(ptr)
+                block = blocks.setdefault(ptr, [f.read(length), length, []])
+                block[2].append(tablestart + 4*sublevelID)
+
+        # compressed graphics and tilemaps
+        for ptrref in compressedptrrefs():
+            ptr = f.readptr(ptrref)
+            if ptr not in blocks:
+                try:
+                    data = f.read_decompress(ptr)
+                except (ValueError, IndexError):
+                    continue
+                length = f.tell() - ptr
+                f.seek(ptr)
+                blocks[ptr] = [(f.read(1), hashlib.blake2b(data).digest()),
+                               length, []]
+            blocks[ptr][2] += ptrref
+
+        # point duplicates at the lowest copy
+        copies = {}  # content key: pointer
+        moved = {}
+        for ptr in sorted(blocks):
+            key, length, refs = blocks[ptr]
+            copyptr = copies.setdefault(key, ptr)
+            if copyptr == ptr or ptr < freespacestart:
+                continue
+            for ref in refs:
+                f.seek(ref)
+                f.writeint(copyptr, 4)
+            moved[ptr] = copyptr
+
+        # erase duplicates, unless they overlap data that's still used
+        kept = sorted((ptr, ptr + blocks[ptr][1]) for ptr in blocks
+                      if ptr not in moved)
+        keptstarts = [start for start, _ in kept]
+        keptends = list(itertools.accumulate(
+            (end for _, end in kept), max))  # furthest end so far
+        for ptr in moved:
+            end = ptr + blocks[ptr][1]
+            index = bisect.bisect_left(keptstarts, end) - 1
+            if index >= 0 and keptends[index] > ptr:
+                continue
+            f.erasedata(ptr, blocks[ptr][1])
+
+    return moved
@@ -2,7 +2,7 @@
 
 # standard library imports
 import copy, traceback
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 # import from other files
 import AdvMetadata, AdvEditor
@@ -75,6 +75,9 @@ def loadsublevel(sublevel):
     if not sublevel.fromfile:
         AdvWindow.undohistory.updatelastsave()
 
+    # prepare the sublevels likely to be opened next
+    AdvEditor.Prefetch.schedule(sublevel)
+
     # window title and status bar
     if sublevel.ID is not None:
         if sublevel.datablocks:
@@ -87,6 +90,9 @@ def loadsublevel(sublevel):
 
     if AdvMetadata.printtime: print("Total sublevel load:",
         QtAdvFunc.timerend(timer), "ms")  # debug
+    if AdvMetadata.printtime: print("Decompression cache:",
+        GBA.decompresscache.hits, "hits,", GBA.decompresscache.misses,
+        "misses,", hex(GBA.decompresscache.size), "bytes")  # debug
 
     if AdvSettings.warn_sublevel_intro and sublevel.ID == 0x38:
         QSimpleDialog(AdvWindow.editor, text="Sublevel 38 is used by the intro "
@@ -102,7 +108,10 @@ def loadsublevel(sublevel):
 def loadsublevelID(sublevelID):
     "Load a sublevel from the ROM."
     if not AdvEditor.ROM.exists(): return
-    return loadsublevel(SMA3.Sublevel.importbyID(Adv3Attr.filepath, sublevelID))
+    sublevel = AdvEditor.Prefetch.take(sublevelID)
+    if sublevel is None:
+        sublevel = SMA3.Sublevel.importbyID(Adv3Attr.rom, sublevelID)
+    return loadsublevel(sublevel)
 
 def savesublevel_action():
     """Called from the main window's save sublevel action, and when confirming
@@ -170,11 +179,11 @@ def cmpheader(newheader):
 def countitems():
     redcoins = 0
     flowers = 0
-    for row in AdvWindow.sublevelscene.layer1.tilemap:
-        for tileID in row:
-            if tileID in (0x6001, 0xA400, 0x10E16) or tileID>>8 == 0xA3:
-                # red coin tile or in poundable post
-                redcoins += 1
+    tilecounts = Counter(AdvWindow.sublevelscene.layer1.tilemap.tiles)
+    for tileID, count in tilecounts.items():
+        if tileID in (0x6001, 0xA400, 0x10E16) or tileID>>8 == 0xA3:
+            # red coin tile or in poundable post
+            redcoins += count
     for spr in Adv3Attr.sublevel.sprites:
         match spr.ID:
             case 0x065 | 0x022 | 0x068 | 0x05B:
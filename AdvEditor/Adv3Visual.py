@@ -6,6 +6,7 @@ graphics/palette."""
 import itertools
 
 # import from other files
+import AdvEditor
 from AdvEditor import AdvSettings, AdvWindow, Adv3Attr
 import AdvGame
 from AdvGame import GBA, SMA3
@@ -21,6 +22,7 @@ layer0only = False
 cache8_layers = [None]*0x600
 cache8_spriteglobal = [None]*0x280
 cache8_stripes = {}
+decoded8 = {}  # id(graphics): (graphics, color indexes of each tile)
 cache16 = {}
 cachesprite = {}
 
@@ -28,11 +30,20 @@ cachesprite = {}
 
 def loadgraphics(sublevel):
     global layergraphics, spritegraphics
+    graphics = AdvEditor.Prefetch.takegraphics(sublevel)
+    if graphics is None:
+        graphics = importgraphics(sublevel)
+    layergraphics, spritegraphics = graphics
+    resetcaches()
+
+def importgraphics(sublevel):
+    """Import a sublevel's layer graphics and sprite graphics, without
+    loading them."""
     header = sublevel.header
 
     # load layer graphics
     layergraphics = SMA3.LayerVRAM(
-        Adv3Attr.filepath,
+        Adv3Attr.rom,
         layer1ID=header[1],
         layer2ID=header[3],
         layer3ID=header[5],
@@ -50,23 +61,23 @@ def loadgraphics(sublevel):
     else:
         # patch is applied: use sublevel ID as sprite tileset
         kwargs = {"spritetileset":sublevel.ID}
-    spritegraphics = SMA3.SpriteVRAM(Adv3Attr.filepath, **kwargs)
-    resetcaches()
+    spritegraphics = SMA3.SpriteVRAM(Adv3Attr.rom, **kwargs)
+    return layergraphics, spritegraphics
 
 def updatestripesfromsublevel():
     if not Adv3Attr.sublevelstripes or not Adv3Attr.sublevel.stripeIDs:
         # current sublevel might be from file; import stripeIDs from current ROM
-        with GBA.Open(Adv3Attr.filepath) as f:
+        with GBA.Open(Adv3Attr.rom) as f:
             Adv3Attr.sublevel.importspritetileset(f, Adv3Attr.sublevelstripes)
     for i, newID in enumerate(Adv3Attr.sublevel.stripeIDs):
         if newID != spritegraphics.stripeIDs[i]:
-            spritegraphics.loadstripe(Adv3Attr.filepath, i, newID)
+            spritegraphics.loadstripe(Adv3Attr.rom, i, newID)
     AdvWindow.editor.reload({"8x8"})
 
 def loadpalette(sublevel):
     global palette
     header = sublevel.header
-    palette = SMA3.LevelPalette(Adv3Attr.filepath,
+    palette = SMA3.LevelPalette(Adv3Attr.rom,
         layer1ID=header[2],
         layer2ID=header[4],
         layer3ID=header[6],
@@ -90,11 +101,13 @@ def resetcaches():
 def resetcache8_layers(region=None):
     for i in _cachetoclear(region):
         cache8_layers[i] = [None]*0x40
+    decoded8.clear()
 
 def resetcache8_sprites():
     for i in range(0x280):
         cache8_spriteglobal[i] = [None]*0x40
     cache8_stripes.clear()
+    decoded8.clear()
 
 def resetcache16():
     cache16.clear()
@@ -169,15 +182,13 @@ def get8x8(tileID, paletterow=1, xflip=False, yflip=False,
     if cache[tileID][propindex]:
         return cache[tileID][propindex]
 
+    image = Q8x8Tile()
+    image.setPalette(palette.row(paletterow))
     if not sprite and tileID < len(layergraphics.animated) and\
             layergraphics.animated[tileID] is not None:
-        image = QGBA8x8Tile(layergraphics.animated[tileID],
-                            palette.row(paletterow))
-    elif tileID >= len(graphics):
-        image = QGBA8x8Tile(None, palette.row(paletterow))
-    else:
-        image = QGBA8x8Tile(graphics[tileID],
-                            palette.row(paletterow))
+        image.setPixels(_decoded8x8(layergraphics.animated)[tileID])
+    elif tileID < len(graphics):
+        image.setPixels(_decoded8x8(graphics)[tileID])
     if xflip or yflip:
         image.mirror(horizontal=xflip, vertical=yflip)
 
@@ -185,6 +196,14 @@ def get8x8(tileID, paletterow=1, xflip=False, yflip=False,
     cache[tileID][propindex] = pixmap
     return pixmap
 
+def _decoded8x8(graphics):
+    """Return the color indexes of each tile of a graphics object, decoding
+    all of its tiles at once if they're not cached."""
+    entry = decoded8.get(id(graphics))
+    if entry is None or entry[0] is not graphics:
+        entry = decoded8[id(graphics)] = (graphics, decode4bpp(graphics))
+    return entry[1]
+
 _octagoncolors = {
     0x10EFF: qRgb(255, 0, 0),
     0x10EFE: qRgb(255, 132, 0),
@@ -300,7 +319,7 @@ def getdynamicrect(width, height, ptr, paletterow, xflip=False, yflip=False):
     image.fill(0)
     with QPainter(image) as painter:
         for y in range(0, height, 8):
-            with GBA.Open(Adv3Attr.filepath, "rb") as f:
+            with GBA.Open(Adv3Attr.rom, "rb") as f:
                 f.seek(ptr + (y<<7))
                 graphics = AdvGame.GameGraphics(f.read(0x20 * int(width/8)))
             for x in range(0, width, 8):
@@ -416,7 +435,7 @@ def getscanlinepixmap(layer, width, height, offsets):
     return QPixmap.fromImage(newimage)
 
 def _compressed8bpp_to_pixmap(ptrref, tilewidth):
-    with GBA.Open(Adv3Attr.filepath) as f:
+    with GBA.Open(Adv3Attr.rom) as f:
         f.readseek(ptrref)
         graphics = AdvGame.GameGraphics(f.read_decompress(), tilesize=0x40)
 
@@ -25,19 +25,25 @@ class Settings:
         "dev_dispscreenexits": False,
         "dir_graphicssuffix": "-Graphics",
         "dir_tilemapssuffix": "-Tilemaps",
+        "editor_checkpointinterval": 32,
+        "editor_checkpointmemory": 16,  # in MiB
         "editor_lastversion": (0, 0, 0),
+        "editor_prefetchmemory": 32,  # in MiB, 0 to disable prefetching
         "export_yileveltool_enable": False,
         "extprefix": "Ex",
         "fix_objects": 0,
         "fix_text_imageoffbyone": False,
         "import_includegraphics": True,
         "import_includetilemaps": True,
+        "import_optimalLZ77": False,
         "import_graphicstovanillaregion": True,
         "mouse_resizeradius": 3,
         "recovery_autoexport": True,
+        "recovery_journalhistory": 0,
         "ROM_autoload": True,
         "ROM_recent": [],
         "ROM_recent_max": 10,
+        "save_dedup": False,
         "text_simplified": False,
         "undo_max": 500,
         "visual_dimscreens": 1,
@@ -83,6 +89,10 @@ class Settings:
         for path in self.ROM_recent:
             if not isinstance(path, str) or not os.path.exists(path):
                 self.ROM_recent.remove(path)
+        self._capsetting("editor_checkpointinterval", 1, 0x100)
+        self._capsetting("editor_checkpointmemory", 0, 0x400)
+        self._capsetting("editor_prefetchmemory", 0, 0x400)
+        self._capsetting("recovery_journalhistory", 0, 100)
         self._capsetting("ROM_recent_max", 0, 100)
         if self.undo_max < 0:
             self.undo_max = 0
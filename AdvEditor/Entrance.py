@@ -2,7 +2,7 @@
 
 # import from other files
 from AdvEditor import Adv3Attr
-from AdvGame import GBA, SMA3
+from AdvGame import SMA3
 
 def loadentrances():
     return SMA3.importlevelentrances(
@@ -27,28 +27,21 @@ def loadglobalentrdata(main=None, midway=None):
 
 def loadglobalscreenexitdata():
     output = [[] for _ in range(SMA3.Constants.maxsublevelID + 1)]
-    with GBA.Open(Adv3Attr.filepath, "rb") as f:
-        # read entire sublevel main pointer table
-        f.seek(f.readptr(SMA3.Pointers.sublevelmainptrs))
-        mainptrs = [f.readint(4) for _ in range(SMA3.Constants.maxsublevelID + 1)]
-
-        # import screen exit destinations by sublevel
-        for sublevelID, ptr in enumerate(mainptrs):
-            sublevel = SMA3.Sublevel()
-            f.seek(ptr)
-            sublevel.importmaindata(f)
-            for key, entr in sublevel.exits.items():
-                destsublevelID = entr.sublevelID
-                sublevelstr = f"{sublevelID:02X}"
+
+    # screen exit destinations by sublevel, from the sublevel catalog
+    for sublevelID, summary in sorted(Adv3Attr.sublevelcatalog.items()):
+        for key, entr in summary.exits.items():
+            destsublevelID = entr.sublevelID
+            sublevelstr = f"{sublevelID:02X}"
+            if destsublevelID > SMA3.Constants.maxsublevelID:
+                # Bandit minigame
+                destsublevelID = entr.anim
+                sublevelstr += f"({entr.sublevelID:02X})"
                 if destsublevelID > SMA3.Constants.maxsublevelID:
-                    # Bandit minigame
-                    destsublevelID = entr.anim
-                    sublevelstr += f"({entr.sublevelID:02X})"
-                    if destsublevelID > SMA3.Constants.maxsublevelID:
-                        # nested minigame
-                        destsublevelID = 0
-                        sublevelstr += f"({entr.anim:02X})"
-                output[destsublevelID].append(
-                    [f"from {sublevelstr} {key:02X}", entr])
+                    # nested minigame
+                    destsublevelID = 0
+                    sublevelstr += f"({entr.anim:02X})"
+            output[destsublevelID].append(
+                [f"from {sublevelstr} {key:02X}", entr])
 
     Adv3Attr.sublevelentr["screenexits"] = output
@@ -416,9 +416,19 @@ def exportallYIdata(sourcefilepath, outputdir, console="GBA"):
         os.mkdir(outputdir)
 
     # export sublevels
-    for sublevelID in sublevelrange:
+    if console == "GBA":
+        # import all valid sublevels with one read of the pointer tables
+        sublevels = Sublevel.importmultiple(
+            sourcefilepath, sublevelrange, skipinvalid=True).values()
+    else:
+        sublevels = []
+        for sublevelID in sublevelrange:
+            try:
+                sublevels.append(Sublevel.importbyID(sourcefilepath, sublevelID))
+            except ValueError:
+                pass
+    for sublevel in sublevels:
         try:
-            sublevel = Sublevel.importbyID(sourcefilepath, sublevelID)
             if console == "GBA":
                 Adv3Patch.loadsublevelpatchattr(sublevel)
             elif console == "SNES":
@@ -615,7 +625,8 @@ def importgraphics(filepath):
                     olddata = f.read_decompress(olddataptr)
                     if newdata != olddata:
                         # update data only if different
-                        compresseddata = GBA.compressLZ77(newdata)
+                        compresseddata = GBA.compressLZ77(
+                            newdata, optimal=AdvSettings.import_optimalLZ77)
                         toinsert.append((compresseddata, ptrref))
                         toerase.append((olddataptr, f.tell() - olddataptr))
 
@@ -664,8 +675,12 @@ def importgraphics(filepath):
             return False
 
     with GBA.Open(filepath, "r+b") as f:
-        # erase old compressed data
+        # erase old compressed data, unless other pointers still use it
+        usedptrs = Adv3Save.compresseddataptrs(
+            f, exclude=[ptrref for _, ptrref in toinsert])
         for ptr, length in toerase:
+            if ptr in usedptrs:
+                continue
 ##            print(f"Erasing: {length:#x} bytes from {ptr:08X}")
             f.seek(ptr)
             f.write(bytes(length))
@@ -688,12 +703,25 @@ def importgraphics(filepath):
 
 def _insertcompresseddata(toinsert):
     """Insert compressed graphics to freespace, prioritizing the vanilla
-    compressed region if possible."""
+    compressed region if possible. If AdvSettings.save_dedup is enabled, data
+    with an existing copy points to the copy instead."""
+
+    copies = None
+    if AdvSettings.save_dedup:
+        with GBA.Open(Adv3Attr.filepath, "rb") as f:
+            copies = GBA.DataCopyIndex(
+                Adv3Attr.rom, Adv3Save.compresseddataptrs(f))
 
     # loop across data to insert:
     #  find freespace, write new data, update pointers in ptrref
     for compresseddata, ptrref in toinsert:
-        newptr = None
+        newptr = copies.find(compresseddata) if copies is not None else None
+        if newptr is not None:
+            with GBA.Open(Adv3Attr.filepath, "r+b") as f:
+                for ptr in ptrref:
+                    f.seek(ptr)
+                    f.writeint(newptr, 4)
+            continue
         if AdvSettings.import_graphicstovanillaregion:
             # try to save in the corresponding vanilla region first, if enabled
             try:
@@ -709,6 +737,8 @@ def _insertcompresseddata(toinsert):
             # save to freespace
             newptr = Adv3Save.savedatatoROM(compresseddata, ptrref)
 ##        print(f"Saved {len(compresseddata):#x} bytes to {newptr:08X}")
+        if copies is not None:
+            copies.add(newptr)
 
 def _testhuffman(f, pathstart, exporttypes):
     """Test if the Huffman to LZ77 patch needs to be applied, before inserting
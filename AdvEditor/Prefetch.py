@@ -0,0 +1,179 @@
+"""Advynia Sublevel Prefetch
+Prepares the sublevels the user is likely to open next in a background
+thread: the destinations of the current sublevel's screen exits, then recently
+opened sublevels. Each is parsed, its graphics are imported, and its layer 1
+tilemap is generated, to be handed over when it's opened."""
+
+# standard library imports
+import threading
+from collections import OrderedDict, deque
+
+# import from other files
+from AdvEditor import AdvSettings, AdvWindow, Adv3Attr, Adv3Patch, Adv3Visual
+from AdvGame import GBA, SMA3
+
+recent = deque(maxlen=8)  # recently opened sublevel IDs, most recent last
+
+class PrefetchedSublevel:
+    "A sublevel prepared ahead of time, and an estimate of its memory use."
+    def __init__(self, sublevel, graphics, tilemap):
+        self.sublevel = sublevel
+        self.graphics = graphics
+        self.tilemap = tilemap
+
+        self.size = 0x100 * (len(sublevel.objects) + len(sublevel.sprites))
+        for vram in graphics:
+            self.size += len(vram) * vram.tilesize
+        if tilemap is not None:
+            self.size += (len(tilemap.tiles) * tilemap.tiles.itemsize +
+                          len(tilemap.display) * tilemap.display.itemsize)
+
+_results = OrderedDict()  # sublevel ID: PrefetchedSublevel
+_size = 0
+_queue = []  # sublevel IDs to prefetch, in order
+_lock = threading.Lock()
+_cancel = threading.Event()
+_thread = None
+_running = False  # whether the thread is processing the queue
+_pending = None  # PrefetchedSublevel being opened
+
+def schedule(sublevel):
+    """Start prefetching the sublevels likely to be opened after the given
+    sublevel, if not already prefetched."""
+    global _thread, _running, _pending, _size
+    _pending = None
+    if not AdvSettings.editor_prefetchmemory or Adv3Attr.rom is None:
+        return
+    if sublevel.ID is not None and not sublevel.fromfile:
+        if sublevel.ID in recent:
+            recent.remove(sublevel.ID)
+        recent.append(sublevel.ID)
+
+    candidates = [entr.sublevelID for entr in sublevel.exits.values()]
+    candidates += reversed(recent)
+    queue = []
+    for sublevelID in candidates:
+        if (sublevelID != sublevel.ID and sublevelID not in queue and
+                sublevelID <= SMA3.Constants.maxsublevelID and
+                sublevelID in Adv3Attr.sublevelcatalog):
+            queue.append(sublevelID)
+
+    with _lock:
+        # discard results that are no longer likely to be opened
+        for sublevelID in [sublevelID for sublevelID in _results
+                           if sublevelID not in queue]:
+            _size -= _results.pop(sublevelID).size
+        _queue[:] = [sublevelID for sublevelID in queue
+                     if sublevelID not in _results]
+        if not _queue or _running:
+            return
+        _running = True
+    _thread = threading.Thread(
+        target=_run, args=(AdvSettings.fix_objects,
+                           AdvWindow.sublevelscene.layer1.seed),
+        daemon=True)
+    _thread.start()
+
+def stop():
+    """Cancel prefetching, and wait for the background thread to stop.
+    Should be called before the ROM is written or closed.
+    Cancellation is checked between steps and before each object of the
+    tilemap, so the longest wait is a sublevel's data and graphics import."""
+    global _thread
+    with _lock:
+        _queue.clear()
+    if _thread is not None:
+        _cancel.set()
+        _thread.join()
+        _thread = None
+        _cancel.clear()
+
+def clear():
+    "Cancel prefetching and discard all results, if the ROM changed."
+    global _size, _pending
+    stop()
+    with _lock:
+        _results.clear()
+        _size = 0
+    _pending = None
+
+def take(sublevelID):
+    """Return the prefetched sublevel with this ID, if any, and prepare to
+    hand over its graphics and tilemap as it's loaded."""
+    global _size, _pending
+    with _lock:
+        result = _results.pop(sublevelID, None)
+        if result is not None:
+            _size -= result.size
+    _pending = result
+    if result is None:
+        return None
+    return result.sublevel
+
+def takegraphics(sublevel):
+    """Return the prefetched (layer graphics, sprite graphics) of a sublevel
+    being loaded, if available."""
+    if _pending is None or _pending.sublevel is not sublevel:
+        return None
+    graphics, _pending.graphics = _pending.graphics, None
+    return graphics
+
+def taketilemap(sublevel, fixver, seed):
+    """Return the prefetched layer 1 tilemap of a sublevel being loaded, if
+    available and generated with the same settings."""
+    if _pending is None or _pending.sublevel is not sublevel:
+        return None
+    tilemap, _pending.tilemap = _pending.tilemap, None
+    if tilemap is None or (tilemap.fixver, tilemap.seed) != (fixver, seed):
+        return None
+    return tilemap
+
+def _run(fixver, seed):
+    "Background thread: prefetch each queued sublevel until cancelled."
+    global _size, _running
+    budget = AdvSettings.editor_prefetchmemory << 20
+    while True:
+        with _lock:
+            if not _queue or _cancel.is_set():
+                # cleared with the lock held, so schedule() can't queue
+                #  sublevels for a thread that's exiting
+                _running = False
+                return
+            sublevelID = _queue.pop(0)
+        try:
+            result = _prefetch(sublevelID, fixver, seed)
+        except Exception:
+            # errors are reported if the sublevel is opened
+            continue
+        if result is None:
+            continue  # cancelled
+        with _lock:
+            if _size + result.size > budget:
+                # memory budget reached: keep the higher priority results
+                _queue.clear()
+                continue
+            _results[sublevelID] = result
+            _size += result.size
+
+def _prefetch(sublevelID, fixver, seed):
+    """Parse a sublevel, import its graphics, and generate its layer 1
+    tilemap. Returns None if cancelled between steps."""
+    sublevel = SMA3.Sublevel.importbyID(Adv3Attr.rom, sublevelID)
+    Adv3Patch.loadsublevelpatchattr(sublevel)
+    with GBA.Open(Adv3Attr.rom) as f:
+        sublevel.importspritetileset(f, Adv3Attr.sublevelstripes)
+    if _cancel.is_set():
+        return None
+    graphics = Adv3Visual.importgraphics(sublevel)
+    if _cancel.is_set():
+        return None
+    try:
+        # same settings as the sublevel scene's layer 1, without its
+        #  checkpoints and footprint cache, which are only used by the GUI
+        tilemap = SMA3.L1Tilemap(sublevel, fixver=fixver, seed=seed,
+                                 cancelled=_cancel.is_set)
+    except SMA3.L1TilemapOverflowError:
+        tilemap = None
+    except SMA3.L1TilemapCancelled:
+        return None
+    return PrefetchedSublevel(sublevel, graphics, tilemap)
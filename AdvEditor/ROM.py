@@ -9,6 +9,7 @@ from AdvEditor import AdvSettings, Adv3Sublevel
 import AdvGame
 from AdvGUI.Dialogs import *
 from AdvGUI.GeneralQt import *
+from AdvGUI import QtAdvFunc
 
 def exists():
     "Check if the ROM file is still in the expected location."
@@ -41,6 +42,11 @@ def loadROM(filepath):
         QDialogFileError(AdvWindow.editor, filepath, "File not found.").exec()
         return False
 
+    if AdvEditor.Recovery.recoverjournal(filepath):
+        QSimpleDialog(AdvWindow.editor, title="Notice", wordwrap=False,
+            text="The last save to this ROM was interrupted.\n"
+                 "The ROM was restored to its state before that save.").exec()
+
     size = os.path.getsize(filepath)
 
     if size < 0x400000:
@@ -122,16 +128,34 @@ def _loadROMvalidated(filepath):
     # set global filepath
     Adv3Attr.filepath = filepath
     Adv3Attr.filename = os.path.basename(filepath)
+    AdvEditor.Prefetch.clear()
+    AdvEditor.Prefetch.recent.clear()
+    if Adv3Attr.rom:
+        Adv3Attr.rom.close()
+    Adv3Attr.rom = GBA.ROMImage(filepath)
 
     # add to recent ROM menu
     AdvSettings._ROM_recent_add(filepath)
     AdvWindow.editor.updaterecentROMmenu()
 
-    # import other ROM-dependent data
-    Adv3Attr.tilemapL1_8x8 = SMA3.importL1_8x8tilemaps(Adv3Attr.filepath)
-    Adv3Attr.tilemapL0flags = SMA3.importL0flags(Adv3Attr.filepath)
-    Adv3Attr.tile16interact = SMA3.import_tile16interact(Adv3Attr.filepath)
-    Adv3Patch.detectpatches()
+    # import other ROM-dependent data, from the cache if available
+    if AdvMetadata.printtime: timer = QtAdvFunc.timerstart()  # debug
+    ROMCache = AdvEditor.ROMCache
+    ROMCache.load(Adv3Attr.rom)
+    Adv3Attr.tilemapL1_8x8 = ROMCache.get(
+        "tilemapL1_8x8", SMA3.importL1_8x8tilemaps, Adv3Attr.rom)
+    Adv3Attr.tilemapL0flags = ROMCache.get(
+        "tilemapL0flags", SMA3.importL0flags, Adv3Attr.rom)
+    Adv3Attr.tile16interact = ROMCache.get(
+        "tile16interact", SMA3.import_tile16interact, Adv3Attr.rom)
+    Adv3Attr.sublevelcatalog = ROMCache.getcurrent(
+        "sublevelcatalog", SMA3.SublevelCatalog, Adv3Attr.rom)
+    for key, flag in ROMCache.getcurrent(
+            "patches", _detectpatches, Adv3Attr.rom).items():
+        setattr(Adv3Attr, key, flag)
+    ROMCache.save()
+    if AdvMetadata.printtime:  # debug
+        print("ROM tables:", QtAdvFunc.timerend(timer), "ms")
     AdvWindow.editor.updatepatchlayouts()
     AdvEditor.Entrance.loadglobalentrdata()
     if AdvSettings.dev_dispscreenexits:
@@ -145,6 +169,11 @@ def _loadROMvalidated(filepath):
 
     AdvWindow.statusbar.setActionText("Opened ROM: " + filepath)
 
+def _detectpatches(rom):
+    "Detect the ROM's patches, and return their flags."
+    Adv3Patch.detectpatches()
+    return {key: getattr(Adv3Attr, key) for key in AdvEditor.PatchData.patches}
+
 def totalfreespace(filepath, minlength=0x200):
     filesize = os.path.getsize(filepath)
     freespace = AdvGame.findfreespace(filepath, 0x400000, 0x2000000,
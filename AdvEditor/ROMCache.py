@@ -0,0 +1,127 @@
+"""Advynia ROM Cache
+Stores data derived from the ROM in the Advynia/cache folder, keyed by a hash
+of the ROM's contents, so reopening an unchanged ROM skips rebuilding it."""
+
+# standard library imports
+import os, pickle
+
+# import from other files
+import AdvMetadata
+from AdvEditor import Adv3Attr, PatchData
+
+formatversion = 1
+maxfiles = 32  # oldest cache files past this count are deleted
+
+# cached tables of the current ROM: key: (value, file ranges read, or None if
+# the value is kept current by the editor)
+tables = {}
+_digest = None
+_modified = False  # whether tables changed since the cache file was read
+
+def _cachedir():
+    "Return the cache directory. If it doesn't exist, create it."
+    dirpath = os.path.join(AdvMetadata.appdir, "cache")
+    if not os.path.exists(dirpath):
+        os.makedirs(dirpath)
+    return dirpath
+
+def _cachepath(digest):
+    return os.path.join(_cachedir(), digest.hex() + ".cache")
+
+def load(rom):
+    """Load the cached tables of the given GBA.ROMImage, if a cache file
+    matches its contents."""
+    global tables, _digest, _modified
+    tables = {}
+    _digest = rom.hash()
+    _modified = True
+    try:
+        with open(_cachepath(_digest), "rb") as f:
+            data = pickle.load(f)
+        if data["version"] == (formatversion, tuple(AdvMetadata.version)):
+            tables = data["tables"]
+            _modified = False
+    except Exception:
+        # missing, outdated, or corrupted cache: rebuild everything
+        tables = {}
+
+def get(key, func, rom):
+    """Return a cached table, or build it with func(rom) and cache it, along
+    with the file ranges it was built from."""
+    global _modified
+    if key in tables:
+        return tables[key][0]
+    with rom.recordreads() as ranges:
+        value = func(rom)
+    tables[key] = (value, ranges)
+    _modified = True
+    return value
+
+def getcurrent(key, func, rom):
+    """Return a cached table that the editor keeps current, or build it with
+    func(rom). These tables are stored again on each save."""
+    global _modified
+    if key in tables:
+        return tables[key][0]
+    tables[key] = (func(rom), None)
+    _modified = True
+    return tables[key][0]
+
+def save(force=False):
+    """Write the current tables to the cache file of the current ROM, if any
+    were built since it was read."""
+    global _modified
+    if _digest is None or not (_modified or force):
+        return
+    _storecurrent()
+    data = {"version": (formatversion, tuple(AdvMetadata.version)),
+            "tables": tables}
+    try:
+        path = _cachepath(_digest)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        _prune()
+        _modified = False
+    except OSError:
+        # a cache that can't be written is only a missed speedup
+        pass
+
+def update(rom, writtenranges):
+    """After a save, discard tables built from the written ranges, and move
+    the others to the cache file of the ROM's new contents."""
+    global _digest
+    if _digest is None:
+        return
+    for key, (_, ranges) in list(tables.items()):
+        if ranges is not None and _overlaps(ranges, writtenranges):
+            del tables[key]
+    olddigest, _digest = _digest, rom.hash()
+    if olddigest != _digest:
+        try:
+            os.remove(_cachepath(olddigest))
+        except OSError:
+            pass
+    save(force=True)
+
+def _storecurrent():
+    "Store the tables that the editor keeps current."
+    tables["sublevelcatalog"] = (Adv3Attr.sublevelcatalog, None)
+    tables["patches"] = (
+        {key: getattr(Adv3Attr, key) for key in PatchData.patches}, None)
+
+def _overlaps(ranges, otherranges):
+    for start, end in ranges:
+        for otherstart, otherend in otherranges:
+            if start < otherend and otherstart < end:
+                return True
+    return False
+
+def _prune():
+    "Delete the least recently written cache files past maxfiles."
+    dirpath = _cachedir()
+    paths = [os.path.join(dirpath, name) for name in os.listdir(dirpath)
+             if name.endswith(".cache")]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[maxfiles:]:
+        os.remove(path)
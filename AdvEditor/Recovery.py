@@ -2,39 +2,67 @@
 Creates and manages the Advynia/recovery folder."""
 
 # standard library imports
-import os, shutil
+import os
 
 # import from other files
-import AdvMetadata, AdvEditor, AdvFile
-from AdvEditor import Adv3Attr, Adv3Patch, Adv3Sublevel
+import AdvMetadata, AdvEditor, AdvFile, AdvGame
+from AdvEditor import AdvSettings, Adv3Attr, Adv3Sublevel
 
-def _recoverydir(currentROMdir=True):
+def _recoverydir(currentROMdir=True, filename=None):
     """Return the recovery directory, if currentROMdir=False, or a
-    subdirectory named after the current ROM, if currentROMdir=True.
+    subdirectory named after the current ROM (or the given ROM filename), if
+    currentROMdir=True.
     If the directory doesn't exist, create it."""
     dirs = [AdvMetadata.appdir, "recovery"]
     if currentROMdir:
-        dirs.append(os.path.splitext(Adv3Attr.filename)[0])
+        dirs.append(os.path.splitext(filename or Adv3Attr.filename)[0])
     dirpath = os.path.join(*dirs)
     if not os.path.exists(dirpath):
         os.makedirs(dirpath)
     return dirpath
 
-def backupROM():
-    "Copy the current ROM to the recovery folder."
-    shutil.copy2(
-        Adv3Attr.filepath,
-        os.path.join(_recoverydir(), Adv3Attr.filename))
-
-def restoreROM():
-    """Restore the current ROM from the recovery folder. Should be called
-    if an exception is encountered during saving."""
-    recoverypath = os.path.join(_recoverydir(), Adv3Attr.filename)
-    if os.path.exists(recoverypath):
-        shutil.copy2(
-            os.path.join(_recoverydir(), Adv3Attr.filename),
-            Adv3Attr.filepath)
-        Adv3Patch.detectpatches()
+# Save journals
+
+def journalpath(filename=None):
+    """Return the path of the save journal of the current ROM, or the given
+    ROM filename. Older journals kept as history have a numbered suffix,
+    from .1 for the most recent."""
+    filename = filename or Adv3Attr.filename
+    return os.path.join(_recoverydir(filename=filename), filename + ".journal")
+
+def finishjournal(filename=None):
+    """After a successful save, delete the save journal, or keep it as
+    history if recovery_journalhistory is nonzero."""
+    path = journalpath(filename)
+    if not os.path.exists(path):
+        return
+    keep = AdvSettings.recovery_journalhistory
+
+    # delete journals past the history limit, then renumber the others
+    i = max(keep, 1)
+    while os.path.exists(f"{path}.{i}"):
+        os.remove(f"{path}.{i}")
+        i += 1
+    for i in range(keep-1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i+1}")
+    if keep:
+        os.replace(path, f"{path}.1")
+    else:
+        os.remove(path)
+
+def recoverjournal(filepath):
+    """If the last save to a ROM was interrupted, restore the ROM's original
+    bytes from its save journal. Returns whether the ROM was restored."""
+    filename = os.path.basename(filepath)
+    path = journalpath(filename)
+    if not os.path.exists(path):
+        return False
+    if AdvGame.replayjournal(filepath, path):
+        os.remove(path)
+        return True
+    finishjournal(filename)
+    return False
 
 def _recoveryexport(a3l):
     a3l.exporttofile(os.path.join(
@@ -1,4 +1,5 @@
 from . import (
-    Entrance, Export, Format, Number, PatchData, Recovery, ROM, Undo,
+    Entrance, Export, Format, Number, PatchData, Prefetch, Recovery, ROM, ROMCache,
+    Undo,
     Adv3Attr, Adv3Patch, Adv3Save, Adv3Sublevel, Adv3Visual,
     AdvSettings, AdvWindow)
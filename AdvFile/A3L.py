@@ -131,8 +131,8 @@ class A3LFileData(AdvyniaFileData):
         if 0x65 in self: sublevel.obj65_7byte = self[0x65][0]
 
         # import base data
-        sublevel.importmaindata(io.BytesIO(self[1]))
-        sublevel.importspritedata(io.BytesIO(self[4]))
+        sublevel.parsemaindata(self[1])
+        sublevel.parsespritedata(self[4])
         if 0xF in self: sublevel.ID = self[0xF][0]
         if 7 in self:
             sublevel.layerYoffsets[2] = int.from_bytes(self[7][0:2], "little")
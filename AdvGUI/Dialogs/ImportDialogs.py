@@ -55,9 +55,10 @@ class QDialogSMA3ImportMultiple(QDialogBase):
         Adv3Patch.applymultiplepatches(newpatches)
 
         # save sublevels, if any
-        for sublevelID, sublevel in newsublevels.items():
-            self._updateprogresstext(f"Saving sublevel {sublevelID:02X}...")
-            Adv3Save.savesubleveltoROM(sublevel, sublevelID)
+        if newsublevels:
+            self._updateprogresstext(
+                f"Saving {pluralize(len(newsublevels), 'sublevel')}...")
+            Adv3Save.savesublevelstoROM(newsublevels)
 
         # update and save entrances, if any
         if allentrances:
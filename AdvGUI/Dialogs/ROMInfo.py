@@ -5,7 +5,7 @@ import os
 
 # import from other files
 import AdvEditor
-from AdvEditor import Adv3Attr, Adv3Patch
+from AdvEditor import Adv3Attr, Adv3Patch, Adv3Save
 from AdvEditor.Number import megabytetext
 from AdvGame import GBA
 from AdvGUI.GeneralQt import *
@@ -23,6 +23,19 @@ class QDialogROMInfo(QDialogBase):
             self.labels[key] = QLabel()
         self.calcbutton = QPushButton("Calculate")
         self.calcbutton.clicked.connect(self.calcfreespace)
+        self.truncatecheckbox = QCheckBox("Truncate file")
+        self.truncatecheckbox.setToolTip(
+            "After compacting, remove free space from the end of the ROM.")
+        compactbutton = QPushButton("Compact")
+        compactbutton.setToolTip(
+            "Move level, entrance, message, and compressed graphics data to\n"
+            "the start of expanded space, to merge gaps of free space.")
+        compactbutton.clicked.connect(self.compact)
+        dedupbutton = QPushButton("Deduplicate")
+        dedupbutton.setToolTip(
+            "Point identical sublevel data and compressed graphics to a\n"
+            "single copy, and erase the other copies.")
+        dedupbutton.clicked.connect(self.dedup)
 
         self.patchlabels = []
         for patchID, value in Adv3Patch.patches.items():
@@ -47,6 +60,16 @@ class QDialogROMInfo(QDialogBase):
                 self.labels[labelkey].hide()
                 layoutMain[-1].addWidget(self.calcbutton)
 
+        layoutMain.addRow()
+        layoutMain[-1].addWidget(QLabel("Compact data:"))
+        layoutMain[-1].addStretch()
+        layoutMain[-1].addWidget(self.truncatecheckbox)
+        layoutMain[-1].addWidget(compactbutton)
+        layoutMain.addRow()
+        layoutMain[-1].addWidget(QLabel("Remove duplicate data:"))
+        layoutMain[-1].addStretch()
+        layoutMain[-1].addWidget(dedupbutton)
+
         layoutMain.addWidget(QHorizLine())
 
         layoutMain.addWidget(QLabel("Applied Patches:"))
@@ -88,3 +111,13 @@ class QDialogROMInfo(QDialogBase):
 
         self.calcbutton.hide()
         self.labels["freespace"].show()
+
+    def compact(self):
+        if Adv3Save.compactROM(self.truncatecheckbox.isChecked()):
+            if self.labels["freespace"].isVisible():
+                self.calcfreespace()
+
+    def dedup(self):
+        if Adv3Save.dedupROM():
+            if self.labels["freespace"].isVisible():
+                self.calcfreespace()
@@ -117,6 +117,8 @@ class QDialogSaveSublevelAs(QDialogSelectSublevel):
         if self.buttons["Swap"].isChecked():
             if not Adv3Save.savewrapper(self._swap, newID):
                 return
+            Adv3Attr.sublevelcatalog.refresh(
+                Adv3Attr.rom, (Adv3Attr.sublevel.ID, newID))
 
         Adv3Attr.sublevel.ID = newID
         if not Adv3Sublevel.savesublevel_action():
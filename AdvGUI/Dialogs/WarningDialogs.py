@@ -195,6 +195,7 @@ class QDialogImportPatch(QDialogBase):
                         # convert into a stone block
                         obj.ID = 0x6C
                         obj.extID = None
+                self.sublevel.objects.recount()
             if "sublevelstripes" in self.patchlist:
                 self.sublevel.stripeIDs = None
             if "world6flag" in self.patchlist:
@@ -3,9 +3,15 @@ Qt subclasses that are general-purpose enough to not be in a more
 specialized file."""
 
 # standard library imports
-import os, time
+import functools, os, time
 from collections.abc import ByteString, Sequence
 
+# optional: decodes graphics faster, if installed
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Qt imports
 from .PyQtImport import *
 
@@ -330,6 +336,31 @@ class QAdvyniaIcon(QIcon):
     def __init__(self, filename):
         super().__init__(os.path.join(AdvMetadata.datadir, "icon", filename))
 
+# 4bpp byte: its 2 pixels' color indexes, low nibble first
+_nibbles = [bytes((byte & 0xF, byte >> 4)) for byte in range(0x100)]
+
+def decode4bpp(graphics: Sequence[ByteString]) -> Sequence[ByteString]:
+    """Decode a sequence of GBA 4bpp tiles in one pass, to 64 color indexes
+    per tile, one per byte. Missing tiles decode to color 0.
+    Uses a NumPy array if NumPy is installed."""
+    if numpy is None:
+        blank = bytes(64)
+        return [b"".join(map(_nibbles.__getitem__, tile)) if tile else blank
+                for tile in graphics]
+
+    blank = bytes(0x20)
+    packed = numpy.frombuffer(
+        b"".join(tile if tile else blank for tile in graphics), numpy.uint8)
+    pixels = numpy.empty((len(packed), 2), numpy.uint8)
+    pixels[:, 0] = packed & 0xF
+    pixels[:, 1] = packed >> 4
+    return pixels.reshape(-1, 64)
+
+@functools.lru_cache(maxsize=0x100)
+def _colortable(palette: tuple) -> list[int]:
+    "Convert a palette to a QImage color table. Color 0 is transparent."
+    return [0] + [QtAdvFunc.color15toQRGB(color) for color in palette[1:]]
+
 class Q8x8Tile(QImage):
     "Base class for representing 8x8 tiles with 15-bit indexed color."
     def __init__(self):
@@ -337,22 +368,28 @@ class Q8x8Tile(QImage):
         self.fill(0)
 
     def setPalette(self, palette: Sequence[int]):
-        self.setColorTable(QtAdvFunc.color15toQRGB(color) for color in palette)
-        self.setColor(0, 0)   # color 0 is always transparent
+        # color 0 is always transparent
+        self.setColorTable(_colortable(tuple(palette)))
+
+    def setPixels(self, pixels: ByteString):
+        "Set all 64 pixels from their color indexes, one per byte."
+        bits = self.bits()
+        bits.setsize(64)
+        bits[:] = bytes(pixels)
 
 class QGBA8x8Tile(Q8x8Tile):
     """A visual representation of single 8x8 tile, given its GBA 4bpp graphics
-    and 0x10-byte palette."""
+    and 0x10-byte palette.
+    For many tiles, decode4bpp and setPixels are faster."""
     def __init__(self, tile: ByteString, paletterow=(0,)*0x10):
         super().__init__()
         self.setPalette(paletterow)
         if not tile:
             return
 
-        pixelarray = self.bits().asarray(64)
-        for i, byte in zip(range(0, 64, 2), tile, strict=True):
-            pixelarray[i] = byte & 0xF
-            pixelarray[i+1] = byte >> 4
+        if len(tile) != 0x20:
+            raise ValueError(f"4bpp tile length {len(tile):#x} is not 0x20.")
+        self.setPixels(b"".join(map(_nibbles.__getitem__, tile)))
 
 class QGBA8x8Tile_8bpp(Q8x8Tile):
     """A visual representation of single 8x8 tile, given its GBA 8bpp graphics
@@ -363,9 +400,7 @@ class QGBA8x8Tile_8bpp(Q8x8Tile):
         if not tile:
             return
 
-        bits = self.bits()
-        bits.setsize(64)
-        bits[:] = tile
+        self.setPixels(tile)
 
 class QNumberedTile16(QImage):
     """Image of a 16x16 square, circle, or other shape, containing a hex number
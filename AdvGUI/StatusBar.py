@@ -56,7 +56,11 @@ class QMainEditorStatusBar(QStatusBar):
         self.actiontext.setText(text)
 
     def updateByteText(self):
-        self.setSizeText(newbytecount=Adv3Attr.sublevel.bytesize())
+        bytecount = Adv3Attr.sublevel.bytesize()
+        if AdvMetadata.printtime:  # debug
+            assert bytecount == Adv3Attr.sublevel.bytesize(recount=True), \
+                "Sublevel byte total doesn't match a full recount"
+        self.setSizeText(newbytecount=bytecount)
 
     def setSizeText(self, newbytecount=None, newscreencount=None):
         if newbytecount is not None: self.bytecount = newbytecount
@@ -7,7 +7,7 @@ from collections.abc import Iterable
 from collections import defaultdict
 
 # import from other files
-import AdvMetadata, AdvGame
+import AdvMetadata, AdvGame, AdvEditor
 from AdvEditor import AdvSettings, AdvWindow, Adv3Attr, Adv3Visual
 from AdvGame import GBA, SMA3
 from AdvGUI.GeneralQt import *
@@ -57,6 +57,10 @@ class QSMA3BackgroundGradient(QAbstractLayer):
 class QSMA3Layer1(QAbstractLayer):
     """Handles displaying a sublevel's layer 1 from its objects.
     Specified width and height are in 16x16 tiles, not pixels."""
+
+    # shared by all layer 1 instances, including the sidebar
+    footprints = SMA3.L1FootprintCache()
+
     def __init__(self, *args, width=0x100, height=0x80, is_sidebar=False,
                  sublevelscene=False, **kwargs):
         super().__init__(*args, **kwargs)
@@ -66,9 +70,13 @@ class QSMA3Layer1(QAbstractLayer):
         self.is_sidebar = is_sidebar
         self.sublevelscene = sublevelscene
 
-        self.tilemap = []
-        for y in range(self.height):
-            self.tilemap.append([0]*self.width)
+        self.tilemap = SMA3.L1Tilemap(SMA3.Sublevel())
+        self.seed = 0  # RNG seed for objects, incremented to reroll them
+        self.checkpoints = None
+        if self.sublevelscene:
+            self.checkpoints = SMA3.L1Checkpoints(
+                AdvSettings.editor_checkpointinterval,
+                AdvSettings.editor_checkpointmemory << 20)
 
         if AdvMetadata.printtime: timer = QtAdvFunc.timerstart()  # debug
 
@@ -98,19 +106,37 @@ class QSMA3Layer1(QAbstractLayer):
                 self.scene.addItem(item)
                 self.screenrects.append(item)
 
-    def createTilemap(self, sublevel):
+    def createTilemap(self, sublevel, changedobjs=()):
         """Generate the layer 1 tilemap (list) from the editor's active
-        sublevel. The previous tilemap is saved to self.tilemapold."""
+        sublevel. The previous tilemap is saved to self.tilemapold.
+
+        If changedobjs is specified, the previous tilemap is regenerated
+        incrementally or from a checkpoint, if possible."""
         if AdvMetadata.printtime: timer = QtAdvFunc.timerstart()  # debug
 
         self.tilemapold = self.tilemap
+        if self.sublevelscene and not changedobjs:
+            tilemap = AdvEditor.Prefetch.taketilemap(
+                sublevel, AdvSettings.fix_objects, self.seed)
+            if tilemap is not None:
+                # generated in the background when the sublevel was prefetched
+                self.tilemap = tilemap
+                self.checkpoints.clear()
+                return
         self.tilemap = SMA3.L1Tilemap(sublevel, 
             loopsetting = "crop" if self.is_sidebar else "exception",
             alt = True if self.is_sidebar else False,
-            fixver = AdvSettings.fix_objects)
+            fixver = AdvSettings.fix_objects,
+            seed = self.seed,
+            base = self.tilemapold if changedobjs else None,
+            changed = changedobjs,
+            checkpoints = self.checkpoints,
+            footprints = self.footprints)
 
         if AdvMetadata.printtime and self.sublevelscene == True:
             print("Layer 1 tilemap generation:", QtAdvFunc.timerend(timer), "ms")  # debug
+            print("Object footprint cache:", self.footprints.hits, "hits,",
+                  self.footprints.misses, "misses")  # debug
 
     def updateLayerGraphics(self, forcereload=False):
         """Update the displayed tiles with the currently loaded tilemap.
@@ -150,10 +176,8 @@ class QSMA3Layer1(QAbstractLayer):
               QtAdvFunc.timerend(timer), "ms")  # debug
 
     def updateTileGraphics(self, x, y, forcereload=False):
-        tileID = self.tilemap[y][x]
-        if hasattr(tileID, "displayID"):
-            tileID = tileID.displayID
-        if not forcereload and tileID == self.tilemapold[y][x]:
+        tileID = self.tilemap.displayID(x, y)
+        if not forcereload and tileID == self.tilemapold.displayID(x, y):
             # don't update identical tiles
             return
         else:
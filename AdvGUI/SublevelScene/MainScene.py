@@ -79,6 +79,7 @@ class QSMA3SublevelScene(QGraphicsScene):
         """Refresh the current sublevel's tilemap, to reroll RNG-dependent
         objects."""
         self.selection.clear()
+        self.layer1.seed += 1
         self.layer1.createTilemap(Adv3Attr.sublevel)
         self.layer1.updateLayerGraphics()
         AdvWindow.statusbar.setActionText(
@@ -103,12 +104,15 @@ class QSMA3SublevelScene(QGraphicsScene):
         updatetiles = set()
         for obj in updateobjs: updatetiles |= obj.alltiles
 
-        self.layer1.createTilemap(Adv3Attr.sublevel)
+        self.layer1.createTilemap(Adv3Attr.sublevel, updateobjs)
 
         # account for objects' new tiles
         for obj in updateobjs: updatetiles |= obj.alltiles
 
-        if updatetiles:
+        if self.layer1.tilemap.dirty is not None:
+            # only tiles that differ from the previous tilemap need redrawing
+            self.layer1.updateLayerRegion(self.layer1.tilemap.dirty)
+        elif updatetiles:
             # also update the 8 tiles surrounding each tile
             # any overflows are filtered out in updateLayerRegion
             for x, y in list(updatetiles):
@@ -116,14 +120,6 @@ class QSMA3SublevelScene(QGraphicsScene):
                     (x-1, y-1), (x, y-1), (x+1, y-1),
                     (x-1, y), (x+1, y),
                     (x-1, y+1), (x, y+1), (x+1, y+1)}
-            # change layer 1 tilemap to correspond to displayed tilemap
-            tilemapnew = copy.deepcopy(self.layer1.tilemapold)
-            for x, y in updatetiles:
-                if 0 <= x < 0x100 and 0 <= y < 0x80:
-                    tilemapnew[y][x] = self.layer1.tilemap[y][x]
-            tilemapnew.screenstatus = self.layer1.tilemap.screenstatus
-            self.layer1.tilemap = tilemapnew
-
             # update graphics in this region
             self.layer1.updateLayerRegion(updatetiles)
         else:
@@ -4,7 +4,7 @@ Classes and functions for general game data processing, not associated
 with any particular console. Specific consoles/games are submodules."""
 
 # standard library imports
-import copy, itertools, os
+import bisect, copy, itertools, os, re, struct
 from collections.abc import Iterable, Callable, ByteString
 from typing import Any
 
@@ -22,6 +22,87 @@ def exportdatatofile(filepath, data):
     "Export bytes to a new file."
     open(filepath, "wb").write(data)
 
+_intformats = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+def unpackints(data, length) -> list[int]:
+    """Decode bytes as a sequence of little-endian numbers, with the given
+    byte count each. Trailing bytes that don't form a whole number are
+    ignored."""
+    count = len(data) // length
+    if length in _intformats:
+        return list(struct.unpack_from(
+            f"<{count}{_intformats[length]}", data))
+    return [int.from_bytes(data[i:i+length], "little")
+            for i in range(0, count*length, length)]
+
+# Write-ahead journals: a header with the file's original size, then a record
+#  of the original bytes of each range about to be overwritten, then a
+#  completion marker once the file's writes are flushed to disk
+
+_journalheader = b"AdvJRNL\x00"
+
+def writejournal(journalpath, f, ranges: Iterable[tuple[int, int]]):
+    """Write a journal of the original bytes of a file, in the given (start,
+    end) ranges of file offsets, before they're overwritten. f is the file,
+    opened for reading. The journal is flushed to disk before returning."""
+    size = f.seek(0, os.SEEK_END)
+    with open(journalpath, "wb") as journal:
+        journal.write(_journalheader + size.to_bytes(8, "little"))
+        for start, end in ranges:
+            end = min(end, size)
+            if start >= end:
+                continue  # bytes past the end of the file are truncated instead
+            f.seek(start)
+            journal.write(b"R" + start.to_bytes(8, "little") +
+                          (end - start).to_bytes(8, "little") +
+                          f.read(end - start))
+        journal.flush()
+        os.fsync(journal.fileno())
+
+def completejournal(journalpath):
+    "Mark a journal's writes as complete, once the file is flushed to disk."
+    with open(journalpath, "ab") as journal:
+        journal.write(b"C")
+        journal.flush()
+        os.fsync(journal.fileno())
+
+def readjournal(journalpath) -> tuple[int | None, list, bool]:
+    """Read a journal. Returns the file's original size, a list of
+    (start, original bytes), and whether the journal was completed.
+    Records cut off by an interruption are ignored."""
+    data = open(journalpath, "rb").read()
+    if data[0:8] != _journalheader or len(data) < 0x10:
+        return None, [], False
+    size = int.from_bytes(data[8:0x10], "little")
+    records = []
+    pos = 0x10
+    while data[pos:pos+1] == b"R" and pos + 0x11 <= len(data):
+        start = int.from_bytes(data[pos+1:pos+9], "little")
+        length = int.from_bytes(data[pos+9:pos+0x11], "little")
+        if pos + 0x11 + length > len(data):
+            break
+        records.append((start, data[pos+0x11:pos+0x11+length]))
+        pos += 0x11 + length
+    return size, records, data[pos:pos+1] == b"C"
+
+def replayjournal(filepath, journalpath, complete=False) -> bool:
+    """Undo the writes recorded in a journal, by restoring the original bytes
+    in reverse order, and the original file size.
+    By default, only an incomplete journal (from interrupted writes) is
+    replayed; set complete=True to also undo completed writes.
+    Returns whether the file was restored."""
+    size, records, iscomplete = readjournal(journalpath)
+    if size is None or (iscomplete and not complete):
+        return False
+    with open(filepath, "r+b") as f:
+        for start, data in reversed(records):
+            f.seek(start)
+            f.write(data)
+        f.truncate(size)
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
 class Open:
     """Wrapper for Python's open() function. Used as a base class for
     accessing binary files with specialized pointers and read/write functions."""
@@ -42,9 +123,20 @@ class Open:
         "Read a little-endian number from the file, with the given byte count."
         return int.from_bytes(self.read(length), "little")
 
+    def readints(self, length, count):
+        """Read a sequence of little-endian numbers from the file, with the
+        given byte count each, in one read. Stops early at the end of the
+        file."""
+        return unpackints(self.read(length*count), length)
+
     def writeint(self, num, length):
         "Write a little-endian number to the file, with the given byte count."
-        self.fileobj.write(num.to_bytes(length, "little"))
+        self.write(num.to_bytes(length, "little"))
+
+    def writeints(self, nums, length):
+        """Write a sequence of little-endian numbers to the file, with the
+        given byte count each, in one write."""
+        self.write(b"".join(num.to_bytes(length, "little") for num in nums))
 
     def erasedata(self, ptr, bytecount):
         "Overwrite data at the given pointer with 00 bytes."
@@ -85,6 +177,153 @@ def findfreespace(filepath, start=0, end=None, minlength=0x80, width=1):
                     del output[-1]
     return output
 
+class FreeSpaceIndex:
+    """Index of the free space in a file: all runs of consecutive 00 bytes,
+    aligned to a word width, as findfreespace would find them.
+    Built with a single scan, then kept current by calling update() after
+    each write, so space can be allocated without rescanning the file."""
+
+    def __init__(self, data: ByteString, start: int = 0, end: int = None,
+                 width: int = 1):
+        self.width = width
+        self.start = -(-start // width) * width
+        self.end = len(data) if end is None else end
+        self._starts = []  # sorted run starts
+        self._ends = {}  # run start: run end
+        self._bysize = []  # sorted (length, start)
+        self._insertruns(self._scan(data[self.start:self.end], self.start))
+
+    def __iter__(self):
+        "Yield [start, length] pairs, in address order."
+        for start in self._starts:
+            yield [start, self._ends[start] - start]
+
+    def __len__(self):
+        return len(self._starts)
+
+    def total(self, minlength: int = 0) -> int:
+        "Return the total length of all runs of at least minlength bytes."
+        return sum(length for length, _ in
+                   self._bysize[bisect.bisect_left(self._bysize, (minlength,)):])
+
+    def _scan(self, data: ByteString, offset: int) -> list:
+        """Return the aligned runs of 00 words in data, which starts at the
+        given aligned file offset, as (start, end) pairs."""
+        width = self.width
+        runs = []
+        for match in re.finditer(rb"\x00{%d,}" % width, data):
+            start = offset + -(-match.start() // width) * width
+            end = offset + match.end() // width * width
+            if end > self.end:
+                end = self.end - self.end % width
+            if start < end:
+                runs.append((start, end))
+        return runs
+
+    def _insertruns(self, runs):
+        for start, end in runs:
+            index = bisect.bisect_left(self._starts, start)
+            self._starts.insert(index, start)
+            self._ends[start] = end
+            bisect.insort(self._bysize, (end - start, start))
+
+    def _removerun(self, start: int):
+        end = self._ends.pop(start)
+        del self._starts[bisect.bisect_left(self._starts, start)]
+        del self._bysize[bisect.bisect_left(self._bysize, (end - start, start))]
+
+    def update(self, f, offset: int, length: int):
+        """Update the index after length bytes were written at a file offset,
+        by rereading the affected words from a file object. The file's
+        position is preserved. Writes past the end of the indexed region
+        extend it, for files that grew, including any gap before them."""
+        width = self.width
+        if offset > self.end:
+            length += offset - self.end
+            offset = self.end
+        if offset + length > self.end:
+            self.end = offset + length
+        start = max(offset // width * width, self.start)
+        end = min(-(-(offset + length) // width) * width,
+                  self.end - self.end % width)
+        if start >= end:
+            return
+
+        pos = f.tell()
+        f.seek(start)
+        runs = self._scan(f.read(end - start), start)
+        f.seek(pos)
+
+        # remove runs that overlap or touch the window, and keep their parts
+        #  outside it, to be merged with the window's new runs
+        index = bisect.bisect_right(self._starts, end)
+        while index > 0 and self._ends[self._starts[index-1]] >= start:
+            index -= 1
+            runstart = self._starts[index]
+            runend = self._ends[runstart]
+            self._removerun(runstart)
+            if runstart < start:
+                runs.insert(0, (runstart, start))
+            if runend > end:
+                runs.append((end, runend))
+        merged = []
+        for run in sorted(runs):
+            if merged and merged[-1][1] >= run[0]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], run[1]))
+            else:
+                merged.append(run)
+        self._insertruns(merged)
+
+    def find(self, minlength: int, start: int = None, end: int = None
+             ) -> int | None:
+        """Return the start of the smallest run of at least minlength bytes
+        within the given region, lowest address first if tied, or None if
+        no run is large enough. Runs are clipped to the region, with partial
+        words at its edges handled as findfreespace does."""
+        width = self.width
+        start = self.start if start is None else max(
+            -(-start // width) * width, self.start)
+        end = self.end if end is None else min(
+            -(-end // width) * width, self.end)
+        end -= end % width
+        candidates = []
+
+        # runs that straddle the region's boundaries are clipped
+        for boundary in (start, end):
+            index = bisect.bisect_right(self._starts, boundary) - 1
+            if index < 0:
+                continue
+            runstart = self._starts[index]
+            runend = self._ends[runstart]
+            if runstart < boundary < runend:
+                runstart, runend = max(runstart, start), min(runend, end)
+                if runend - runstart >= minlength:
+                    candidates.append((runend - runstart, runstart))
+
+        # otherwise, the smallest run that fits entirely within the region
+        for length, runstart in itertools.islice(self._bysize,
+                bisect.bisect_left(self._bysize, (minlength,)), None):
+            if start <= runstart and runstart + length <= end:
+                candidates.append((length, runstart))
+                break
+
+        if not candidates:
+            return None
+        return min(candidates)[1]
+
+    def validate(self, data: ByteString) -> bool:
+        """Compare the index against a fresh scan of the file's data. If they
+        differ, rebuild the index from the scan and return False."""
+        self.end = len(data)
+        runs = self._scan(data[self.start:], self.start)
+        if runs == [(start, self._ends[start]) for start in self._starts]:
+            return True
+        self._starts.clear()
+        self._ends.clear()
+        self._bysize.clear()
+        self._insertruns(runs)
+        return False
+
 class GameGraphics(list):
     "Imported 8x8 tiles, indexed by tile number."
     def __init__(self, rawdata: ByteString = None, tilesize: int = 0x20):
@@ -3,13 +3,28 @@ Classes and functions for reading/writing/processing GBA ROM data, not
 associated with a specific game."""
 
 # standard library imports
+import bisect, contextlib, hashlib, io, itertools, mmap, os, threading, weakref
+from collections import OrderedDict
+from collections.abc import ByteString, Iterable
 from operator import itemgetter
 
 # import from other files
 import AdvGame
 
 class Open(AdvGame.Open):
-    "Wrapper for Python's open() function, for reading/writing GBA ROM images."
+    """Wrapper for Python's open() function, for reading/writing GBA ROM images.
+    If the file has an open ROMImage (which can be passed in place of the
+    filepath), reads go through its memory map instead of reopening the file,
+    and writes keep its free space index current. During a ROMImage
+    transaction, writes are staged in memory."""
+    def __init__(self, filepath, mode="rb"):
+        self.rom = _romimageof(filepath)
+        if self.rom is not None and (mode == "rb" or
+                (mode == "r+b" and self.rom.intransaction)):
+            self.fileobj = _MappedFile(self.rom)
+        else:
+            super().__init__(filepath, mode)
+
     def seek(self, ptr):
         "Seek to a GBA ROM pointer."
         if not 0x08000000 <= ptr < 0x0A000000:
@@ -43,10 +58,27 @@ class Open(AdvGame.Open):
             ptr = f.tell()
         self.seek(self.readptr(ptr))
 
+    def write(self, data):
+        "Write bytes, and invalidate any cached decompressed data they overlap."
+        ptr = self.tell()
+        self.fileobj.write(data)
+        decompresscache.invalidate(ptr, len(data))
+        if self.rom is not None and self.rom._freespace is not None:
+            self.rom._freespace.update(
+                self.fileobj, ptr - 0x08000000, len(data))
+
+    def readview(self, length):
+        """Read a number of bytes as a memoryview. If reading from a ROMImage,
+        this does not copy the data."""
+        if isinstance(self.fileobj, _MappedFile):
+            return self.fileobj.readview(length)
+        return memoryview(self.read(length))
+
     def read_decompress(self, ptr=None):
         """Decompress and extract data stored in GBA-specific compression
         formats, at the current or specified position.
-        Supports GBA's LZ77 and Huffman formats."""
+        Supports GBA's LZ77 and Huffman formats.
+        Results are cached in GBA.decompresscache."""
 
         if ptr is not None:
             self.seek(ptr)
@@ -55,17 +87,25 @@ class Open(AdvGame.Open):
             print(f"Warning: Pointer {startaddr:08X} is not a multiple of 4. "
                   "It may be misaligned.")
 
+        output = decompresscache.get(self, startaddr)
+        if output is not None:
+            return output
+
         # process compression header
         compresstype = self.read(1)[0]
         length = self.readint(3)
         if compresstype == 0x10:  # LZ77
-            output = _decompressLZ77(self.fileobj, length)
+            # read the maximum possible compressed size at once: 1 flag byte
+            #  per 8 uncompressed bytes
+            with self.readview(length + (length >> 3) + 2) as data:
+                output, end = _decompressLZ77(data, 0, length)
+            self.seek(startaddr + 4 + end)
         elif compresstype & 0xF0 == 0x20:  # Huffman
             bitlength = compresstype & 0xF
-            if bitlength != 8:
-                raise NotImplementedError(
-                    "Only Huffman data with bit length 8 is currently supported. "
-                    f"Data at {startaddr:08X} has bit length {bitlength}.")
+            if bitlength not in (1, 2, 4, 8):
+                raise ValueError(
+                    f"Huffman data at {startaddr:08X} has invalid bit length "
+                    f"{bitlength}. Only 1, 2, 4, or 8 are supported.")
             output = _decompressHuffman(self.fileobj, length, bitlength)
         else:
             raise ValueError(
@@ -76,6 +116,7 @@ class Open(AdvGame.Open):
         endaddr = self.tell()
         if endaddr & 3:
             self.read(4 - (endaddr & 3))  # force GBA alignment
+        decompresscache.add(self, startaddr, output)
 
         # cleanup
         if len(output) != length:
@@ -83,33 +124,475 @@ class Open(AdvGame.Open):
                   f" does not match declared length of {length:#x}.")
         return output
 
-def _decompressLZ77(f, length):
-    "Called by GBA.Open.read_decompress, to handle LZ77-format data."
+class DecompressCache:
+    """LRU cache of decompressed data, shared between files.
+
+    Keyed by pointer and a digest of the compressed bytes, so data is only
+    reused if the compressed bytes are unchanged, even across ROMs. Entries
+    are also dropped when GBA.Open writes over them. Resident size is limited
+    to maxsize bytes of decompressed data. Hits and misses are counted for
+    debugging. Safe to use from multiple threads."""
+
+    def __init__(self, maxsize: int = 0x800000):
+        self.maxsize = maxsize
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (ptr, digest): (compressed length, data)
+        self._lengths = {}  # ptr: compressed length of most recent entry
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._lengths.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def _digest(data) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, f: Open, ptr: int) -> bytearray | None:
+        """Return a copy of the cached data at a pointer, if its compressed
+        bytes are unchanged. On a hit, f is positioned after the compressed
+        data; otherwise, at the pointer."""
+        with self._lock:
+            complength = self._lengths.get(ptr)
+            if complength is not None:
+                with f.readview(complength) as compressed:
+                    key = (ptr, self._digest(compressed))
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return bytearray(self._entries[key][1])
+                f.seek(ptr)
+            self.misses += 1
+            return None
+
+    def add(self, f: Open, ptr: int, data: bytearray):
+        """Store data decompressed from a pointer. f must be positioned after
+        the compressed data, and remains there."""
+        if len(data) > self.maxsize:
+            return
+        endaddr = f.tell()
+        f.seek(ptr)
+        with f.readview(endaddr - ptr) as compressed:
+            key = (ptr, self._digest(compressed))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (endaddr - ptr, bytes(data))
+            self._lengths[ptr] = endaddr - ptr
+            self.size += len(data)
+            while self.size > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple):
+        ptr = key[0]
+        data = self._entries.pop(key)[1]
+        self.size -= len(data)
+        if not any(entry[0] == ptr for entry in self._entries):
+            del self._lengths[ptr]
+
+    def invalidate(self, ptr: int, length: int):
+        "Drop entries whose compressed data overlaps a written region."
+        if not self._entries:
+            return
+        end = ptr + length
+        with self._lock:
+            for key in [key for key, (complength, _) in self._entries.items()
+                        if key[0] < end and ptr < key[0] + complength]:
+                self._remove(key)
+
+decompresscache = DecompressCache()
+
+class ROMImage:
+    """Read-only memory map of a GBA ROM image, so that repeated reads don't
+    reopen the file or copy it in full.
+    Can be passed in place of a filepath to GBA.Open and the module-level
+    functions. Other functions open the file normally, via os.fspath.
+
+    Between begin() and commit()/rollback(), writes through GBA.Open are
+    staged in memory, as copy-on-write pages over the map, and reads include
+    them. truncate() stages shrinking the file.
+    remap() must be called after bytes are appended to the file, and close()
+    before the file is truncated or replaced outside of a transaction."""
+
+    pagesize = 0x1000
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._mmap = None
+        self.data = None
+        self._freespace = None
+        self._pages = None  # page index: bytearray, during a transaction
+        self._length = 0  # staged file size, during a transaction
+        self._maplength = 0  # mapped bytes not cut off by a staged truncate
+        self._readranges = None  # (start, end) of reads, if recording
+        self.remap()
+        _romimages[_pathkey(filepath)] = self
+
+    def __fspath__(self):
+        return os.fspath(self.filepath)
+
+    def __len__(self):
+        if self._pages is not None:
+            return self._length
+        return len(self.data)
+
+    @property
+    def freespace(self) -> AdvGame.FreeSpaceIndex:
+        """Index of aligned free space in the file, built on first use and
+        updated by GBA.Open writes."""
+        if self._freespace is None:
+            self._freespace = AdvGame.FreeSpaceIndex(
+                self._readview(0, len(self)), width=4)
+        return self._freespace
+
+    def remap(self):
+        """Map the file again, to include any bytes added since it was mapped.
+        During a transaction, this has no effect; commit() remaps."""
+        if self._pages is not None:
+            return
+        freespace = self._freespace
+        oldlength = len(self.data) if self.data else 0
+        self.close()
+        with open(self.filepath, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self._mmap)
+        self._maplength = len(self.data)
+        if freespace is not None and len(self.data) >= oldlength:
+            freespace.update(_MappedFile(self), oldlength,
+                             len(self.data) - oldlength)
+            self._freespace = freespace
+
+    def close(self):
+        """Unmap the file, discarding any staged writes. Views returned by
+        view() should be released first; otherwise the map remains open until
+        they are garbage collected."""
+        self._freespace = None
+        self._pages = None
+        if self.data is None:
+            return
+        self.data.release()
+        self.data = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+
+    def view(self, ptr, length):
+        """Return a memoryview of the bytes at a GBA ROM pointer. This doesn't
+        copy the data, unless it includes staged writes."""
+        return self._readview(addrtofile(ptr), length)
+
+    def hash(self) -> bytes:
+        "Return a digest of the file's current contents."
+        return hashlib.sha256(self._readview(0, len(self))).digest()
+
+    @contextlib.contextmanager
+    def recordreads(self):
+        """Record which parts of the file are read within a with block.
+        Yields a list, filled on exit with the merged (start, end) file offset
+        ranges that were read."""
+        output = []
+        self._readranges = []
+        try:
+            yield output
+        finally:
+            for start, end in sorted(self._readranges):
+                if output and start <= output[-1][1]:
+                    output[-1] = (output[-1][0], max(output[-1][1], end))
+                else:
+                    output.append((start, end))
+            self._readranges = None
+
+    # Transactions
+
+    @property
+    def intransaction(self) -> bool:
+        return self._pages is not None
+
+    def begin(self):
+        "Start staging writes in memory, until commit() or rollback()."
+        if self._pages is not None:
+            raise RuntimeError("A ROM transaction is already in progress.")
+        self._pages = {}
+        self._length = len(self.data)
+        self._maplength = len(self.data)
+
+    def commit(self, journalpath=None):
+        """Write all staged pages to the file in address order, with a single
+        flush and fsync, then end the transaction.
+        If a journal path is provided, the original bytes are first saved to
+        a write-ahead journal, which is marked complete after the file is
+        flushed. See AdvGame.replayjournal.
+        Returns the (start, end) file offset ranges that were changed."""
+        pages, self._pages = self._pages, None
+        ranges = []
+        oldlength = len(self.data)
+        shrink = self._length < oldlength
+        if pages or shrink:
+            # group consecutive pages into one write each
+            pagesize = self.pagesize
+            writes = []
+            for _, group in itertools.groupby(
+                    enumerate(sorted(pages)), lambda item: item[1] - item[0]):
+                group = [index for _, index in group]
+                start = group[0] * pagesize
+                end = min((group[-1] + 1) * pagesize, self._length)
+                writes.append((start, end, group))
+            ranges = [(start, end) for start, end, _ in writes]
+            if shrink:
+                # the file can't be truncated while it's mapped
+                ranges.append((self._length, oldlength))
+                self.close()
+
+            with open(self.filepath, "r+b") as f:
+                if journalpath:
+                    AdvGame.writejournal(journalpath, f, ranges)
+                for start, end, group in writes:
+                    f.seek(start)
+                    f.write(b"".join(pages[index] for index in group)
+                            [:end-start])
+                if shrink:
+                    f.truncate(self._length)
+                f.flush()
+                os.fsync(f.fileno())
+            if journalpath:
+                AdvGame.completejournal(journalpath)
+        if self.data is None or self._length != len(self.data):
+            self.remap()
+        self._maplength = len(self.data)
+        return ranges
+
+    def rollback(self):
+        """Discard all staged writes, and end the transaction. The file itself
+        was never modified."""
+        if self._pages:
+            # the index includes staged writes; rebuild it when next needed
+            self._freespace = None
+        self._pages = None
+        if self.data is not None:
+            self._maplength = len(self.data)
+
+    def truncate(self, size: int):
+        """Stage shrinking the file to a number of bytes, discarding any staged
+        writes past it. Only valid during a transaction."""
+        if self._pages is None:
+            raise RuntimeError("The ROM is not in a transaction.")
+        if size >= self._length:
+            return
+        pagesize = self.pagesize
+        for index in [index for index in self._pages
+                      if index * pagesize >= size]:
+            del self._pages[index]
+        page = self._pages.get(size // pagesize)
+        if page is not None:
+            # bytes past the new end read as 00, if the file grows again
+            offset = size % pagesize
+            page[offset:] = bytes(pagesize - offset)
+        self._length = size
+        self._maplength = min(self._maplength, size)
+        self._freespace = None
+
+    def _page(self, index: int) -> ByteString:
+        "Return the current contents of a page, padded with 00 past the file."
+        page = self._pages.get(index) if self._pages else None
+        if page is not None:
+            return page
+        page = self.data[index*self.pagesize:
+                         min((index+1)*self.pagesize, self._maplength)]
+        if len(page) < self.pagesize:
+            page = page.tobytes() + bytes(self.pagesize - len(page))
+        return page
+
+    def _readview(self, offset: int, length: int = -1) -> memoryview:
+        "Return a memoryview of the bytes at a file offset."
+        end = len(self)
+        if length is not None and length >= 0:
+            end = min(offset + length, end)
+        if end <= offset:
+            return self.data[0:0]
+        if self._readranges is not None:
+            self._readranges.append((offset, end))
+        first, last = offset // self.pagesize, (end - 1) // self.pagesize
+        if end <= self._maplength and not (self._pages and any(
+                index in self._pages for index in range(first, last+1))):
+            return self.data[offset:end]
+
+        chunks = []
+        for index in range(first, last+1):
+            pagestart = index * self.pagesize
+            chunks.append(self._page(index)[
+                max(offset - pagestart, 0):end - pagestart])
+        return memoryview(b"".join(chunks))
+
+    def _write(self, offset: int, data: ByteString):
+        "Stage bytes to be written at a file offset."
+        data = memoryview(data)
+        self._length = max(self._length, offset + len(data))
+        pos = 0
+        while pos < len(data):
+            index, pageoffset = divmod(offset + pos, self.pagesize)
+            count = min(self.pagesize - pageoffset, len(data) - pos)
+            page = self._pages.get(index)
+            if page is None:
+                page = self._pages[index] = bytearray(self._page(index))
+            page[pageoffset:pageoffset+count] = data[pos:pos+count]
+            pos += count
+
+_romimages = weakref.WeakValueDictionary()  # path key: ROMImage
+
+def _pathkey(filepath):
+    return os.path.normcase(os.path.realpath(filepath))
+
+def _romimageof(filepath) -> ROMImage | None:
+    "Return the ROMImage of a filepath, if one is open."
+    if not isinstance(filepath, ROMImage):
+        filepath = _romimages.get(_pathkey(filepath))
+    if filepath is not None and filepath.data is not None:
+        return filepath
+    return None
+
+class DataCopyIndex:
+    """Index of data blocks in a ROM image by their first bytes, to find an
+    existing copy of new data instead of saving it again.
+    A copy must match the new data byte for byte, so self-terminating data
+    read from it is identical."""
+
+    keylength = 4
+
+    def __init__(self, rom: ROMImage, ptrs: Iterable[int] = ()):
+        self.rom = rom
+        self._ptrs = {}  # first bytes: list of pointers
+        for ptr in sorted(set(ptrs)):
+            self.add(ptr)
+
+    def add(self, ptr: int):
+        "Add the data at a pointer. Invalid pointers are ignored."
+        try:
+            with self.rom.view(ptr, self.keylength) as key:
+                key = key.tobytes()
+        except ValueError:
+            return
+        self._ptrs.setdefault(key, []).append(ptr)
+
+    def find(self, data: ByteString) -> int | None:
+        "Return a pointer to a copy of the data, or None if there is none."
+        for ptr in self._ptrs.get(bytes(data[0:self.keylength]), ()):
+            with self.rom.view(ptr, len(data)) as copy:
+                if copy == data:
+                    return ptr
+        return None
+
+class _MappedFile:
+    """File-like cursor over a ROMImage, used by GBA.Open. Writable only
+    during a transaction."""
+    def __init__(self, rom):
+        self.rom = rom
+        self.pos = 0
+
+    def readview(self, size=-1):
+        data = self.rom._readview(self.pos, size)
+        self.pos += len(data)
+        return data
+
+    def read(self, size=-1):
+        with self.readview(size) as data:
+            return data.tobytes()
+
+    def write(self, data):
+        if not self.rom.intransaction:
+            raise io.UnsupportedOperation("ROM image is not in a transaction.")
+        self.rom._write(self.pos, data)
+        self.pos += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += len(self.rom)
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}.")
+        self.pos = offset
+        return offset
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        pass
+
+# LZ77 flag bytes, split into runs of (copy flag, block count), highest bit first
+_LZ77flagruns = []
+for _flags in range(0x100):
+    _runs = []
+    for _bitindex in range(8):
+        _copy = bool(_flags & 0x80>>_bitindex)
+        if _runs and _runs[-1][0] == _copy:
+            _runs[-1][1] += 1
+        else:
+            _runs.append([_copy, 1])
+    _LZ77flagruns.append(tuple(tuple(run) for run in _runs))
+
+def _decompressLZ77(data, pos, length):
+    """Called by GBA.Open.read_decompress, to handle LZ77-format data.
+    Decodes from a bytes-like object starting at pos, after the compression
+    header. Returns the output, and the position after the last block read."""
 
     output = bytearray()
+    outlen = 0
 
     while True:
-        flags = f.read(1)[0]
+        flags = data[pos]
+        pos += 1
 
         # process compression flags highest to lowest
-        for bitindex in range(8):
-            bit = flags & 0x80>>bitindex
-            if bit:   # use 16-bit parameter to copy previous data
-                block = f.read(2)
-                copylength = (block[0] >> 4) + 3
-                offset = block[1] + ((block[0]&0xF) << 8) + 1
-                for i in range(copylength):
-                    output.append(output[-offset])
-            else:   # uncompressed byte
-                output += f.read(1)
-            if len(output) >= length:
-                return output
+        for copy, count in _LZ77flagruns[flags]:
+            if not copy:  # uncompressed bytes, copied as one slice
+                count = min(count, length - outlen)
+                if pos + count > len(data):
+                    raise IndexError("LZ77 data ends unexpectedly.")
+                output += data[pos:pos+count]
+                pos += count
+                outlen += count
+                if outlen >= length:
+                    return output, pos
+                continue
+
+            for _ in range(count):  # use 16-bit parameter to copy previous data
+                param0 = data[pos]
+                copylength = (param0 >> 4) + 3
+                offset = ((param0 & 0xF) << 8 | data[pos+1]) + 1
+                pos += 2
+                if offset > outlen:
+                    raise IndexError(f"LZ77 copy offset {offset:#x} exceeds "
+                                     f"decompressed length {outlen:#x}.")
+                start = outlen - offset
+                if offset >= copylength:
+                    output += output[start:start+copylength]
+                else:
+                    # self-intersecting copy: repeat the last offset bytes
+                    repeats = -(-copylength // offset)
+                    output += (output[start:] * repeats)[:copylength]
+                outlen += copylength
+                if outlen >= length:
+                    return output, pos
 
 def _decompressHuffman(f, length, bitlength):
     """Called by GBA.Open.read_decompress, to handle Huffman-format data.
-    Currently only supports bitlength 8."""
+    Supports bit lengths 1, 2, 4, and 8. Smaller values are packed into each
+    byte starting from the lowest bits."""
 
-    # construct tree decoder, mapping bit tuples to uncompressed bytes
+    # construct tree decoder, mapping bit tuples to uncompressed values
     treeraw = bytearray(f.read(1))  # tree length byte
     treeraw += f.read(treeraw[0]*2 + 1)
     treemap = {}
@@ -118,23 +601,93 @@ def _decompressHuffman(f, length, bitlength):
 ##        "".join(str(i) for i in bits) + " " +
 ##        (f"{byte:02X}" if byte is not None else "None")
 ##        for bits, byte in treemap.items()))
+    decoder = _HuffmanTable(treemap, bitlength)
 
-    # decompress data
-    output = bytearray()
+    # decompress data, reading 32-bit words in blocks
+    valuecount = length * 8 // bitlength
+    values = bytearray()
+    state = 0
+    start = f.tell()
+    readlength = max(length & ~3, 0x100)
+    consumed = 0
+    while len(values) < valuecount:
+        data = f.read(readlength)
+        if len(data) < 4:
+            raise ValueError("Huffman data ends unexpectedly.")
+        data = data[:len(data) & ~3]
+        # words are little-endian, with bits processed highest to lowest
+        stream = bytearray(len(data))
+        for i in range(4):
+            stream[i::4] = data[3-i::4]
+        for i, byte in enumerate(stream):
+            newvalues, state = decoder.step(state, byte)
+            values += newvalues
+            if len(values) >= valuecount:
+                consumed += (i & ~3) + 4
+                break
+        else:
+            consumed += len(data)
+    f.seek(start + consumed)
+    del values[valuecount:]
 
-    bitkey = []
-    while True:
-        bitstream = int.from_bytes(f.read(4), "little")
-        for bitoffset in reversed(range(32)):
-            bitkey.append((bitstream >> bitoffset) & 1)
-            try:
-                output.append(treemap[tuple(bitkey)])
-                if len(output) >= length:
-                    return output
-                bitkey.clear()
-            except KeyError:
-                # keep appending bits until a valid key is found
-                pass
+    # pack values into bytes
+    if bitlength == 8:
+        return values
+    output = values[0::8 // bitlength]
+    for i in range(1, 8 // bitlength):
+        output = bytearray(byte | value << (i*bitlength) for byte, value in
+                           zip(output, values[i::8 // bitlength]))
+    return output
+
+class _HuffmanTable:
+    """Table-driven decoder for a Huffman tree, processing 8 bits at a time.
+
+    Each state is a partially decoded bit sequence, with state 0 as the root.
+    For each state and byte, the table stores the values decoded from the
+    byte's bits and the state after them. Entries are calculated on first
+    use, since most combinations never occur in a given file."""
+
+    def __init__(self, treemap: dict, bitlength: int):
+        mask = (1 << bitlength) - 1
+        # assign state IDs to each proper prefix of a bit sequence
+        self.stateIDs = {(): 0}
+        for bits in treemap:
+            for i in range(1, len(bits)):
+                self.stateIDs.setdefault(bits[:i], len(self.stateIDs))
+        # transitions: for each state and bit, (value, None) if it completes
+        #  a bit sequence, otherwise (None, next state)
+        # value is None if the tree table overflowed
+        self.transitions = [None] * len(self.stateIDs)
+        for prefix, stateID in self.stateIDs.items():
+            transition = []
+            for bit in (0, 1):
+                bits = prefix + (bit,)
+                if bits in self.stateIDs:
+                    transition.append((None, self.stateIDs[bits]))
+                else:
+                    value = treemap.get(bits)
+                    if value is not None:
+                        value &= mask
+                    transition.append((value, None))
+            self.transitions[stateID] = tuple(transition)
+        self.table = {}
+
+    def step(self, state: int, byte: int) -> tuple[bytes, int]:
+        """Return the values decoded by processing a byte's bits from the
+        specified state, and the resulting state."""
+        key = state << 8 | byte
+        entry = self.table.get(key)
+        if entry is None:
+            values = bytearray()
+            for bitindex in range(7, -1, -1):
+                value, state = self.transitions[state][byte >> bitindex & 1]
+                if state is None:
+                    if value is None:
+                        raise ValueError("Huffman tree is invalid.")
+                    values.append(value)
+                    state = 0
+            entry = self.table[key] = (bytes(values), state)
+        return entry
 
 def _followHuffnode(treeraw, treemap, offset, bits=(), dataflag=False):
     """Recursive function to follow the left and right nodes of the Huffman
@@ -172,8 +725,8 @@ def addrfromfile(addr):
 
 def readinternalname(filepath):
     "Extract the GBA internal name."
-    with open(filepath, "rb") as f:
-        f.seek(0xA0)
+    with Open(filepath, "rb") as f:
+        f.seek(0x080000A0)
         title = str(f.read(0xC).rstrip(b"\x00"), encoding="ASCII")
         ID = str(f.read(4).rstrip(b"\x00"), encoding="ASCII")
     return title, ID
@@ -182,15 +735,15 @@ def setinternalname(filepath, newbytes):
     "Change the GBA internal name, and update the internal header checksum."
     if len(newbytes) > 16:
         raise ValueError("Internal name is limited to 16 bytes.")
-    with open(filepath, "r+b") as f:
-        f.seek(0xA0)
+    with Open(filepath, "r+b") as f:
+        f.seek(0x080000A0)
         f.write(newbytes)
     testchecksum(filepath, fix=True)
 
 def testchecksum(filepath, fix=False):
     "Test and potentially fix the GBA internal header checksum."
-    with open(filepath, "r+b") as f:
-        f.seek(0xA0)
+    with Open(filepath, "r+b" if fix else "rb") as f:
+        f.seek(0x080000A0)
         rawbytes = f.read(0x1D)
         checksum = f.read(1)[0]
 
@@ -199,7 +752,7 @@ def testchecksum(filepath, fix=False):
         if not fix:
             return result == checksum
         if fix and result != checksum:
-            f.seek(0xBD)
+            f.seek(0x080000BD)
             f.write(result.to_bytes(1, "little"))
 
 def readptr(filepath, addr, index=0):
@@ -227,8 +780,107 @@ def decompress(filepath, addr=0):
         f.seek(addr)
         return f.read_decompress()
 
-def compressLZ77(data):
-    "Compress data to GBA's LZ77 compression format. Returns a bytearray."
+class _LZ77MatchFinder:
+    """Finds the longest valid LZ77 copy source for positions in data, using
+    hash chains of earlier positions indexed by their first 3 bytes.
+    Positions must be searched in ascending order.
+
+    Copy sources are within the last 0x1000 bytes, with displacement of at
+    least 2 for self-intersecting copies (in-game decompression fails with
+    1 byte overlap). Ties are broken by the farthest source."""
+
+    def __init__(self, data):
+        self.data = bytes(data)
+        self.chains = {}
+        self.inserted = 0  # all positions before this are in the hash chains
+
+    def find(self, index):
+        """Return the copy length and displacement of the longest match at a
+        position, or (0, 0) if there's no match of at least 3 bytes."""
+        data = self.data
+        length = len(data)
+
+        # add positions up to index-2 to hash chains
+        inserted = self.inserted
+        while inserted <= index - 2 and inserted + 3 <= length:
+            self.chains.setdefault(
+                data[inserted:inserted+3], []).append(inserted)
+            inserted += 1
+        self.inserted = inserted
+
+        maxlength = min(0x12, length - index)
+        if maxlength < 3:
+            return 0, 0
+        chain = self.chains.get(data[index:index+3])
+        if not chain:
+            return 0, 0
+
+        bestlength = 0
+        bestpos = None
+        for pos in itertools.islice(
+                chain, bisect.bisect_left(chain, index - 0x1000), None):
+            copylength = 3
+            while (copylength < maxlength and
+                   data[pos+copylength] == data[index+copylength]):
+                copylength += 1
+            if copylength > bestlength:
+                bestlength = copylength
+                bestpos = pos
+                if copylength == maxlength:
+                    break
+        if bestpos is None:
+            return 0, 0
+        return bestlength, index - bestpos
+
+def _LZ77greedy(data):
+    """Yield LZ77 blocks for data, using the longest match at each position.
+    Each block is an uncompressed byte, or a (copy length, displacement)
+    tuple."""
+    finder = _LZ77MatchFinder(data)
+    data = finder.data
+    index = 0
+    while index < len(data):
+        copylength, displacement = finder.find(index)
+        if copylength:
+            yield copylength, displacement
+            index += copylength
+        else:
+            yield data[index]
+            index += 1
+
+def _LZ77optimal(data):
+    """Yield LZ77 blocks for data, choosing blocks to minimize the compressed
+    size. Each block is an uncompressed byte, or a (copy length, displacement)
+    tuple."""
+    length = len(data)
+    finder = _LZ77MatchFinder(data)
+    matches = [finder.find(index) for index in range(length)]
+
+    # cost in bits of compressing data[i:], including 1 flag bit per block
+    cost = [0] * (length + 1)
+    choice = [None] * length
+    for index in reversed(range(length)):
+        cost[index] = cost[index+1] + 9
+        copylength, displacement = matches[index]
+        for sublength in range(3, copylength+1):
+            newcost = cost[index+sublength] + 17
+            if newcost < cost[index]:
+                cost[index] = newcost
+                choice[index] = (sublength, displacement)
+
+    index = 0
+    while index < length:
+        if choice[index]:
+            yield choice[index]
+            index += choice[index][0]
+        else:
+            yield data[index]
+            index += 1
+
+def compressLZ77(data, optimal=False):
+    """Compress data to GBA's LZ77 compression format. Returns a bytearray.
+    If optimal is True, blocks are chosen to minimize the output size, which is
+    slower than choosing the longest match at each position."""
 
     length = len(data)
     if length > 0x40000:
@@ -239,40 +891,21 @@ def compressLZ77(data):
     output.append(0x10)  # LZ77 compression type
     output += length.to_bytes(3, "little")
 
-    index = 0
-    while index < length:
+    blocks = _LZ77optimal(data) if optimal else _LZ77greedy(data)
+    while blockgroup := tuple(itertools.islice(blocks, 8)):
         # process 8 bytes or copy commands at a time, to store in a flags byte
         flags = 0
         newbytes = bytearray()
-        for bitindex in range(8):
-            flags <<= 1   # prepare flag byte for next compression flag
-            start = max(0, index-0x1000)
-            for copylength in range(0x12, 2, -1):
-                if index+copylength > len(data):
-                    # slice is interrupted by end of data
-                    continue
-                # search earlier data for progressively shorter subsequences,
-                #  forcing at least 2 bytes overlap for self-intersecting copies
-                #  (in-game decompression fails with 1 byte overlap)
-                pos = data.find(data[index:index+copylength], start,
-                                index + copylength - 2)
-                if pos >= 0:  # matching subsequence found
-                    # generate 16-bit parameter to copy previous data
-                    offset = index - pos - 1
-                    newbytes.append(offset>>8 | (copylength-3)<<4)
-                    newbytes.append(offset & 0xFF)
-
-                    index += copylength
-                    flags |= 1  # set compression flag
-                    break
-            else:  # uncompressed byte
-                newbytes.append(data[index])
-                index += 1
-
-            if index >= length:  # no bytes remaining to compress
-                # finish off left-shifting the flags before breaking loop
-                flags <<= (7-bitindex)
-                break
+        for bitindex, block in enumerate(blockgroup):
+            if isinstance(block, int):  # uncompressed byte
+                newbytes.append(block)
+            else:
+                # generate 16-bit parameter to copy previous data
+                copylength, displacement = block
+                offset = displacement - 1
+                newbytes.append(offset>>8 | (copylength-3)<<4)
+                newbytes.append(offset & 0xFF)
+                flags |= 0x80 >> bitindex  # set compression flag
         output.append(flags)
         output += newbytes
 
@@ -289,6 +922,9 @@ def importdata(filepath, addr, length):
 
     if length == -1:
         return decompress(filepath, addr)
+    elif (rom := _romimageof(filepath)) is not None:
+        with rom.view(addr, length) as data:
+            return data.tobytes()
     else:
         offset = addrtofile(addr)
         return AdvGame.importdata(filepath, offset, length)
@@ -300,16 +936,27 @@ def savedatatofreespace(filepath, data, ptrref,
     ptrref: PtrRef instance or other iterable of pointers, if pointers to update
             None/any False value, if no pointers to update
     Returns: pointer to newly saved data, or None if insufficient space in the
-    region."""
+    region.
+    If the file has an open ROMImage, its free space index is used instead of
+    scanning the file."""
 
-    freespace = AdvGame.findfreespace(
-        filepath, freespacestart - 0x08000000, freespaceend - 0x08000000,
-        minlength=max(len(data), 0x10), width=4)
-    if not freespace:
-        return None
+    minlength = max(len(data), 0x10)
+    rom = _romimageof(filepath)
+    if rom is not None:
+        offset = rom.freespace.find(minlength,
+            freespacestart - 0x08000000, freespaceend - 0x08000000)
+        if offset is None:
+            return None
+    else:
+        freespace = AdvGame.findfreespace(
+            filepath, freespacestart - 0x08000000, freespaceend - 0x08000000,
+            minlength=minlength, width=4)
+        if not freespace:
+            return None
+        offset = min(freespace, key=itemgetter(1))[0]
 
     # save at smallest free location
-    newptr = addrfromfile(min(freespace, key=itemgetter(1))[0])
+    newptr = addrfromfile(offset)
     with Open(filepath, "r+b") as f:
         f.seek(newptr)
         f.write(data)
@@ -363,27 +1010,19 @@ class PointerTable(list):
             if tablestart == vstart:
                 # read vanilla table; don't look for end-of-data marker
                 output.endmarker = False
-                for i in range(vlen):
-                    ptr = f.readint(4)
-                    if ptr == 1:
-                        # interpret 00000001 as a null pointer
-                        output.append(0)
-                    else:
-                        output.append(ptr)
+                ptrs = f.readints(4, vlen)
+                end = tablestart + 4*len(ptrs)
             else:
-                for i in range(maxlen+1):
-                    # add 1 to maxlen to account for end of data
-                    ptr = f.readint(4)
-                    if ptr == 0xFFFFFFFF:
-                        # FFFFFFFF signals end of data
-                        break
-                    elif ptr == 1:
-                        # interpret 00000001 as a null pointer
-                        output.append(0)
-                    else:
-                        output.append(ptr)
-            end = f.tell()
+                # add 1 to maxlen to account for end of data
+                ptrs = f.readints(4, maxlen+1)
+                end = tablestart + 4*len(ptrs)
+                if 0xFFFFFFFF in ptrs:
+                    # FFFFFFFF signals end of data
+                    ptrs = ptrs[:ptrs.index(0xFFFFFFFF)]
+                    end = tablestart + 4*len(ptrs) + 4
 
+        # interpret 00000001 as a null pointer
+        output += [0 if ptr == 1 else ptr for ptr in ptrs]
         output.datablock = [tablestart, end-tablestart]
         return output
 
@@ -399,3 +1038,75 @@ class PointerTable(list):
 
     def __bytes__(self):
         return bytes(self.tobytearray())
+
+######## Test code
+
+if __name__ == "__main__":
+    # regression test: compare LZ77 decompression against the original
+    #  stream-based implementation, on randomized inputs
+    import io, random
+
+    def _decompressLZ77_reference(f, length):
+        output = bytearray()
+        while True:
+            flags = f.read(1)[0]
+            for bitindex in range(8):
+                if flags & 0x80>>bitindex:
+                    block = f.read(2)
+                    copylength = (block[0] >> 4) + 3
+                    offset = block[1] + ((block[0]&0xF) << 8) + 1
+                    for i in range(copylength):
+                        output.append(output[-offset])
+                else:
+                    output += f.read(1)
+                if len(output) >= length:
+                    return output
+
+    def _randomLZ77(r, length):
+        "Generate valid LZ77 blocks, including self-intersecting copies."
+        output = bytearray()
+        outlen = 0
+        while outlen < length:
+            flags = r.randrange(0x100) if outlen else 0
+            output.append(flags)
+            for bitindex in range(8):
+                if flags & 0x80>>bitindex and outlen:
+                    offset = r.randrange(min(outlen, 0x1000))
+                    copylength = r.randrange(3, 0x13)
+                    output += bytes(((copylength-3)<<4 | offset>>8,
+                                     offset & 0xFF))
+                    outlen += copylength
+                else:
+                    output.append(r.randrange(0x100))
+                    outlen += 1
+                if outlen >= length:
+                    break
+        return bytes(output)
+
+    r = random.Random(0)
+    for trial in range(0x200):
+        length = r.randrange(1, 0x2000)
+        if trial & 1:
+            # compressor output from data with repeated runs
+            raw = bytearray()
+            while len(raw) < length:
+                if raw and r.random() < 0.5:
+                    start = r.randrange(len(raw))
+                    raw += raw[start:start+r.randrange(1, 0x20)]
+                else:
+                    raw += bytes(r.randrange(4) for _ in range(r.randrange(8)))
+            data = bytes(compressLZ77(raw[:length]))[4:]
+        else:
+            data = _randomLZ77(r, length)
+        f = io.BytesIO(data)
+        expected = _decompressLZ77_reference(f, length)
+        output, end = _decompressLZ77(memoryview(data), 0, length)
+        assert output == expected, f"Output mismatch in trial {trial}"
+        assert end == f.tell(), f"End position mismatch in trial {trial}"
+        if trial & 1:
+            assert output == raw[:length]
+            optimaldata = compressLZ77(raw[:length], optimal=True)
+            output, _ = _decompressLZ77(memoryview(optimaldata), 4, length)
+            assert output == raw[:length]
+            assert len(optimaldata) <= len(data) + 4
+    print("LZ77 compression/decompression test passed")
@@ -2,6 +2,7 @@
 Classes and functions for SMA3 graphics and palettes."""
 
 # standard library imports
+import itertools
 from collections import defaultdict
 
 # import from other files
@@ -131,13 +132,10 @@ class LayerVRAM(GameGraphics):
         with GBA.Open(filepath, "rb") as f:
             ptr = f.readptr(Pointers.leveltilemapL23[layer], imageID)
             tilemapraw = f.read_decompress(ptr)
-        tilemap = []
         if len(tilemapraw) % 2 != 0:
             raise ValueError(f"Tilemap data length {len(tilemapraw):#x} "
                 "does not correspond to an integer number of tiles.")
-        for i in range(len(tilemapraw)//2):
-            tilemap.append(int.from_bytes(tilemapraw[2*i:2*i+2], "little"))
-        return tilemap
+        return AdvGame.unpackints(tilemapraw, 2)
 
 class SpriteVRAM(GameGraphics):
     def __init__(self, filepath, spritetileset=None, stripeIDs=None):
@@ -445,12 +443,10 @@ def importL1_8x8tilemaps(filepath):
         f.seek(Pointers.tilemapL1_8x8)
         return _importtilemaptables(f, _importL1_8x8tilemaps_func, {}, 8)
 
-def _importL1_8x8tilemaps_func(f):
+def _importL1_8x8tilemaps_func(data):
     "Function passed to _importtilemaptables by importL1_8x8tilemaps"
-    tilemap = []
-    for j in range(4):
-        tilemap.append(f.readint(2))
-    return tilemap
+    tiles = AdvGame.unpackints(data, 2)
+    return [tiles[i:i+4] for i in range(0, len(tiles), 4)]
 
 def importL0flags(filepath):
     "Import the layer 0 8x8 tile flags for each layer 1 16x16 tile ID."
@@ -458,23 +454,24 @@ def importL0flags(filepath):
     with GBA.Open(filepath, "rb") as f:
         f.seek(Pointers.tilemapL0flags)
         data = _importtilemaptables(
-            f, _importL0flags_func, defaultdict(lambda : [0, 0, 0, 0]), 1)
+            f, _importL0flags_func, defaultdict(_blankL0flags), 1)
 
     if 0x6001 not in data:  # account for vanilla overflow, if unchanged
         data[0x6001] = data[0x6100].copy()
     return data
 
-def _importL0flags_func(f):
+def _blankL0flags():
+    "Default layer 0 flags, for tile IDs not in the table."
+    return [0, 0, 0, 0]
+
+def _importL0flags_func(data):
     "Function passed to _importtilemaptables by importL0flags"
-    flags = f.read(1)[0]
-    return [flags&8, flags&4, flags&2, flags&1]
+    return [[flags&8, flags&4, flags&2, flags&1] for flags in data]
 
 def _importtilemaptables(f, importfunc, outputdict, bytespertile):
     "Shared code for importing data indexed by layer 1 16x16 tile ID."
 
-    ptrs = []
-    for i in range(0xA9):
-        ptrs.append(f.readint(4))
+    ptrs = f.readints(4, 0xA9)
     ptrs.append(Pointers.tilemapL1_8x8)
     # last entry of vanilla tilemap table ends with the pointer table itself
 
@@ -484,9 +481,12 @@ def _importtilemaptables(f, importfunc, outputdict, bytespertile):
         #  pointer), whichever comes first
         tile16count = min((ptrs[highbyte+1] - ptrs[highbyte]) // bytespertile,
                           0x100)
+        if tile16count <= 0:
+            continue
 
-        for tile16 in range(highbyte << 8, (highbyte << 8) + tile16count):
-            outputdict[tile16] = importfunc(f)
+        # importfunc decodes all of this high byte's entries at once
+        entries = importfunc(f.read(tile16count * bytespertile))
+        outputdict.update(zip(itertools.count(highbyte << 8), entries))
 
     return outputdict
 
@@ -8,13 +8,15 @@ if __name__ == "__main__":
     sys.path.append(".")
 
 # standard library imports
-import itertools
-from collections.abc import Iterable, Mapping
+import itertools, random
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping
 
 # import from other files
 from AdvGame import SMA3
 from AdvGame.SMA3.ObjectFunctions import (
-    MultiTileID, stdobjs, stdobjs_alt, extobjs, extobjs_alt, objcount, extcount)
+    stdobjs, stdobjs_alt, extobjs, extobjs_alt, objcount, extcount)
 
 # Range generators
 
@@ -62,6 +64,22 @@ for tilesetID in range(0x10):
     dynmaps.append(forwardmap)
     dynmaps_rev.append(reversemap)
 
+_blank16 = array("I", [0]) * 0x10
+
+def _runs(values: Iterable[int]):
+    """Split tile coordinates into runs of consecutive values that don't cross
+    a screen boundary. Yields (start, length) for each run."""
+    start = length = None
+    for value in sorted(set(values)):
+        if length and value == start + length and value & 0xF:
+            length += 1
+        else:
+            if length:
+                yield start, length
+            start, length = value, 1
+    if length:
+        yield start, length
+
 # Error handling
 
 class L1TilemapOverflowError(Exception):
@@ -80,6 +98,9 @@ class L1TilemapOverflowError(Exception):
         elif x < 0:
             self.dir[0] = -1
 
+class L1TilemapCancelled(Exception):
+    "Raised when generation is cancelled before processing all objects."
+
 def errorobject(t, obj: SMA3.Object, offset: int = 0x11000):
     """Fallback object to ensure invalid-size or out-of-bounds objects are still
     editable. Out-of-bounds objects are displayed at the bottom of the sublevel.
@@ -92,33 +113,275 @@ def errorobject(t, obj: SMA3.Object, offset: int = 0x11000):
         else:
             for y, x in itertools.product(t.yrange(obj.y, obj.height),
                                           t.xrange(obj.x, obj.width)):
-                t.setTile(MultiTileID(t.getTile(x, y), offset + obj.ID), x, y)
+                t.setTile(t.getTile(x, y), x, y, displayID=offset + obj.ID)
     except L1TilemapOverflowError:
         pass
 
+# Incremental regeneration
+
+class ObjectRecord:
+    """Effects of one object on a layer 1 tilemap, recorded during generation
+    to allow regenerating only the objects affected by an edit."""
+    def __init__(self):
+        self.reads = set()    # tiles checked by the object's code
+        self.writes = {}      # last entry written by the object to each tile,
+                              #  as tile ID | display ID << 32
+        self.screens = set()  # screens enabled by the object
+        self.cleared = set()  # subset of screens cleared by enabling them
+        self.overflow = False
+
+    def saveattrs(self, obj: SMA3.Object):
+        "Save the tilemap-generated attributes of the object."
+        self.tiles = obj.tiles
+        self.alltiles = obj.alltiles
+        self.lasttile = obj.lasttile
+        self.error = obj.error
+
+    def restoreattrs(self, obj: SMA3.Object):
+        "Restore the object's tilemap-generated attributes from this record."
+        obj.tiles = self.tiles
+        obj.alltiles = self.alltiles
+        obj.lasttile = self.lasttile
+        obj.error = self.error
+
+def _is_screencommand(obj: SMA3.Object) -> bool:
+    "Check for extFB/extFE/extFF, which directly modify the screen state."
+    return obj.ID == 0 and obj.extID in (0xFB, 0xFE, 0xFF)
+
+# Footprint cache
+
+class ObjectFootprint:
+    """Tiles generated by an object that doesn't check existing tiles or use
+    RNG, to be replayed for identical objects instead of running their code.
+    Stored as segments of (screens to enable, entries to write), in the order
+    they were generated."""
+    def __init__(self, events: list, obj: SMA3.Object):
+        self.segments = []
+        screens = []
+        writes = {}
+        for event in events:
+            if isinstance(event, int):
+                if writes:
+                    self.segments.append((tuple(screens), writes))
+                    screens = []
+                    writes = {}
+                screens.append(event)
+            else:
+                x, y, entry = event
+                writes[(x, y)] = entry
+        if screens or writes:
+            self.segments.append((tuple(screens), writes))
+
+        self.tiles = frozenset(obj.tiles)
+        self.alltiles = frozenset(obj.alltiles)
+        self.lasttile = obj.lasttile
+
+class L1FootprintCache:
+    """LRU cache of object footprints, shared between tilemaps.
+
+    Only objects without overlap or RNG in their metadata are cached, keyed by
+    their data and the tilemap's settings. When first generated, an object is
+    also verified to not read tiles or use RNG; otherwise, it's stored as
+    uncacheable. Hits and misses are counted for debugging."""
+
+    def __init__(self, maxsize: int = 0x1000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._footprints = OrderedDict()  # None if uncacheable
+
+    def __len__(self):
+        return len(self._footprints)
+
+    def __contains__(self, key):
+        return key in self._footprints
+
+    def clear(self):
+        self._footprints.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, tilemap: "L1Tilemap", obj: SMA3.Object) -> tuple | None:
+        "Return the cache key of an object, or None if it can't be cached."
+        if _is_screencommand(obj):
+            return None
+        try:
+            metadata = SMA3.ObjectMetadata[obj]
+        except KeyError:
+            return None
+        if metadata.overlap or metadata.rng:
+            return None
+        return (obj.ID, obj.extID, obj.x, obj.y, obj.width, obj.height,
+                tilemap.tileset, tilemap.fixver, tilemap.loopsetting,
+                tilemap.alt)
+
+    def get(self, key: tuple) -> ObjectFootprint | None:
+        "Return the cached footprint for a key, if any."
+        footprint = self._footprints.get(key)
+        if footprint is None:
+            self.misses += 1
+            return None
+        self._footprints.move_to_end(key)
+        self.hits += 1
+        return footprint
+
+    def add(self, key: tuple, footprint: ObjectFootprint | None):
+        "Store a footprint, or None to mark the key as uncacheable."
+        self._footprints[key] = footprint
+        self._footprints.move_to_end(key)
+        while len(self._footprints) > self.maxsize:
+            self._footprints.popitem(last=False)
+
+# Checkpoints
+
+class L1Checkpoint:
+    "Snapshot of a tilemap's generation state, before a given object index."
+    def __init__(self, index: int, tilemap: "L1Tilemap"):
+        self.index = index
+        self.tiles = tilemap.tiles[:]
+        # display plane is usually empty
+        self.display = None
+        if tilemap.display.count(0) != len(tilemap.display):
+            self.display = tilemap.display[:]
+        self.screenstatus = bytes(tilemap.screenstatus)
+        self.screenlink = tilemap.screenlink.copy()
+        self.overflowerror = tilemap.overflowerror
+        # estimated memory
+        self.size = 0x100 + len(self.tiles) * self.tiles.itemsize
+        if self.display is not None:
+            self.size += len(self.display) * self.display.itemsize
+
+class L1Checkpoints:
+    """Stores snapshots of a sublevel's layer 1 tilemap generation, taken
+    every interval objects. After editing an object, regeneration can resume
+    from the nearest checkpoint at or before it.
+
+    If the checkpoints' memory exceeds budget (in bytes), the least recently
+    used checkpoints are evicted."""
+
+    def __init__(self, interval: int = 0x20, budget: int = 0x1000000):
+        self.interval = max(interval, 1)
+        self.budget = budget
+        self.size = 0
+        self.objects = []  # object order of the most recent generation
+        self.settings = None
+        self._checkpoints = OrderedDict()
+
+    def __len__(self):
+        return len(self._checkpoints)
+
+    def clear(self):
+        self._checkpoints.clear()
+        self.size = 0
+
+    def invalidate(self, index: int):
+        "Discard all checkpoints after the specified object index."
+        for i in [i for i in self._checkpoints if i > index]:
+            self.size -= self._checkpoints.pop(i).size
+
+    def prepare(self, tilemap: "L1Tilemap", objects: list,
+                changed: frozenset) -> L1Checkpoint | None:
+        """Discard checkpoints invalidated by changes to the object list, and
+        return the nearest remaining checkpoint, if any.
+        If changed objects aren't specified, all checkpoints are discarded."""
+        settings = (tilemap.tileset, tilemap.loopsetting, tilemap.alt,
+                    tilemap.fixver, tilemap.seed)
+        if not changed or settings != self.settings:
+            self.clear()
+            self.settings = settings
+            return None
+
+        # find first object that was modified or moved in the object list
+        for index, (obj, oldobj) in enumerate(zip(objects, self.objects)):
+            if obj is not oldobj or obj in changed:
+                break
+        else:
+            index = min(len(objects), len(self.objects))
+        self.invalidate(index)
+
+        if not self._checkpoints:
+            return None
+        checkpoint = self._checkpoints[max(self._checkpoints)]
+        self._checkpoints.move_to_end(checkpoint.index)
+        return checkpoint
+
+    def save(self, index: int, tilemap: "L1Tilemap"):
+        "Save a checkpoint, evicting the least recently used if needed."
+        checkpoint = L1Checkpoint(index, tilemap)
+        self._checkpoints[index] = checkpoint
+        self.size += checkpoint.size
+        while self.size > self.budget and self._checkpoints:
+            self.size -= self._checkpoints.popitem(last=False)[1].size
+
 # Tilemap class
 
-class L1Tilemap(list):
+class L1Tilemap:
     """Grid of 16x16 tile IDs representing a sublevel's layer 1.
     Also stores which screens have in-game memory allocated for them.
 
+    Tile IDs are stored in a flat array, indexed by y<<8 | x, which can also
+    be accessed as self[y][x]. A parallel display plane stores tile IDs that
+    display in place of a tile, such as error tiles that act like the
+    original tile for overlap code, or 0 if none. Assigning to self[y][x]
+    sets only the tile ID; setTile should be used to generate tiles.
+
     Valid loopsetting values, for if a tile would generate out of bounds:
     "crop": skip that tile
     "exception": abort by raising L1TilemapOverflowError
     "errortile": generate red error tile at object's location
     "loop": use 7-bit Y looping instead of 8-bit, to prevent out of bounds tiles
+
+    RNG-dependent objects use self.rng, which is reseeded for each object, so
+    the same object generates the same tiles. Changing seed rerolls them.
+
+    If a previous tilemap of the same sublevel is provided as base, along with
+    the objects that were modified, inserted, or deleted since then, only the
+    objects affected by those changes are regenerated. The result is identical
+    to a full regeneration. If base is provided, self.dirty is set to the
+    tiles that may differ from it, however the tilemap was generated;
+    otherwise it's None.
+
+    If an L1Checkpoints instance is provided, checkpoints are saved during
+    generation, and regeneration can resume from the nearest checkpoint
+    before the first changed object. This is preferred if few objects remain
+    after the checkpoint, or if incremental regeneration isn't possible.
+
+    If an L1FootprintCache instance is provided, objects that don't depend on
+    existing tiles replay their cached tiles instead of running their code.
+
+    If a cancelled function is provided, it's called before each object, and
+    generation raises L1TilemapCancelled if it returns True.
     """
 
     def __init__(self, sublevel: SMA3.Sublevel, loopsetting: str = "exception",
-                 alt: bool = False, fixver: int = 0):
-        self += ([0]*0x100 for y in range(0x80))
-
+                 alt: bool = False, fixver: int = 0, *, seed: int = 0,
+                 base=None, changed: Iterable[SMA3.Object] = (),
+                 checkpoints: L1Checkpoints | None = None,
+                 footprints: L1FootprintCache | None = None,
+                 cancelled: Callable[[], bool] | None = None):
         self.screenstatus = [0]*0x80
         self.screenlink = {}
         self.loopsetting = loopsetting
         self.overflowerror = False
+        self.alt = alt
         self.fixver = fixver
 
+        # each object's RNG is seeded from the sublevel ID, the tilemap's
+        #  seed, and the object's bytes, so regeneration is reproducible
+        self.seed = seed
+        self.rng = random.Random()
+        self._seedprefix = bytes(((sublevel.ID or 0) & 0xFF,)) + (
+            seed & 0xFFFFFFFF).to_bytes(4, "little")
+
+        self.records = {}  # ObjectRecord for each object, keyed by object
+        self.dirty = None
+        self._record = None
+        self._live = None
+        self._prefix = None
+        self.footprints = footprints
+        self._footprint = None  # events of an object being cached
+        self._cancelled = cancelled
+
         self.xrange = range8_loop
         if loopsetting == "loop":
             self.yrange = range7_loop
@@ -141,58 +404,341 @@ class L1Tilemap(list):
 
         # process each object's code
 
-        for obj in sublevel.objects:
-            obj.tiles = set()
-            obj.alltiles = set()
-            obj.lasttile = None
-            obj.error = None
-            self.obj = obj
+        objects = sublevel.objects
+        changed = frozenset(changed)
+        checkpoint = None
+        if checkpoints is not None:
+            checkpoint = checkpoints.prepare(self, objects, changed)
 
-            try:
-                if obj.ID == 0:
-                    self.extobjs[obj.extID](self, obj.x, obj.y)
-                else:
-                    self.stdobjs[obj.ID](self, obj.x, obj.y, obj.width, obj.height)
-                if obj.lasttile is None:
-                    # object generated no selectable tiles
-##                    print(f"Warning: Object {obj} generated no major tiles")
-                    obj.error = "Error: Object generated no selectable tiles"
-                    errorobject(self, obj, offset=0x10000)
-
-            except (IndexError, KeyError, TypeError) as err:
-                # object tilemap-constructing code failed, perhaps due to an
-                #  invalid negative size?
-                if __name__ == "__main__":
-                    print(f"Object {obj} generation error!")
-                    raise err
-##                print(f"Warning: Object {obj} generation error!", type(err))
-                obj.error = "Object code raised exception: " + type(err).__name__
-                errorobject(self, obj)
-
-            except L1TilemapOverflowError as err:
-                self.overflowerror = True
-                if loopsetting == "exception":
-                    raise err
-                elif loopsetting == "errortile":
-                    ## include red error tile at the location of the object
-                    ## if obj.y > SMA3.Constants.maxtileY, cap to maxtileY
-                    NotImplemented
+        if checkpoint is not None and (
+                len(objects) - checkpoint.index <= checkpoints.interval or
+                not self._canregenerate(sublevel, base, changed)):
+            self._initarrays(checkpoint.tiles, checkpoint.display)
+            self.screenstatus = list(checkpoint.screenstatus)
+            self.screenlink = checkpoint.screenlink.copy()
+            self.overflowerror = checkpoint.overflowerror
+            if isinstance(base, L1Tilemap):
+                for obj in objects[:checkpoint.index]:
+                    if obj in base.records:
+                        self.records[obj] = base.records[obj]
+            self._runobjects(objects, checkpoint.index, base, checkpoints)
+        elif self._canregenerate(sublevel, base, changed):
+            self._regenerate(sublevel, base, changed)
+        else:
+            self._initarrays()
+            self._runobjects(objects, 0, base, checkpoints)
+
+        if checkpoints is not None:
+            checkpoints.objects = objects.copy()
 
         self.obj = None
+        self._record = None
 
         # account for screen linking
         for linkscreen, currentscreen in self.screenlink.items():
             newX, newY = SMA3.screentocoords(linkscreen)
             oldX, oldY = SMA3.screentocoords(currentscreen)
-            for y, x in itertools.product(range(0x10), range(0x10)):
-                self[newY+y][newX+x] = int(self[oldY+y][oldX+x])
+            for y in range(0x10):
+                new = (newY+y) << 8 | newX
+                old = (oldY+y) << 8 | oldX
+                self.tiles[new:new+0x10] = self.tiles[old:old+0x10]
+                self.display[new:new+0x10] = _blank16
+
+        if self.dirty is None and isinstance(base, L1Tilemap):
+            # resumed from a checkpoint or fully generated: compare with base
+            self.dirty = self._difftiles(base)
+
+    def _initarrays(self, tiles: array | None = None,
+                    display: array | None = None):
+        "Initialize the tile and display arrays, copying them if provided."
+        self.tiles = (array("I", tiles) if tiles is not None
+                      else array("I", _blank16) * 0x800)
+        self.display = (array("I", display) if display is not None
+                        else array("I", _blank16) * 0x800)
+        view = memoryview(self.tiles)
+        self._rows = [view[y << 8:(y+1) << 8] for y in range(0x80)]
+
+    def __getitem__(self, y):
+        return self._rows[y]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return 0x80
+
+    def _difftiles(self, other: "L1Tilemap") -> set[tuple[int, int]]:
+        "Return the (x, y) coordinates whose tile or display ID differs."
+        tiles, display = self.tiles, self.display
+        othertiles, otherdisplay = other.tiles, other.display
+        dirty = set()
+        for y in range(0x80):
+            start = y << 8
+            end = start + 0x100
+            if (tiles[start:end] != othertiles[start:end] or
+                    display[start:end] != otherdisplay[start:end]):
+                dirty.update(
+                    (i & 0xFF, y) for i in range(start, end)
+                    if tiles[i] != othertiles[i] or display[i] != otherdisplay[i])
+        return dirty
+
+    def _runobject(self, obj: SMA3.Object) -> ObjectRecord:
+        "Run a single object's code, and record its effects on the tilemap."
+        obj.tiles = set()
+        obj.alltiles = set()
+        obj.lasttile = None
+        obj.error = None
+        self.obj = obj
+        self.rng.seed(self._seedprefix + bytes(obj))
+        record = self._record = ObjectRecord()
+
+        key = None
+        self._footprint = None
+        if self.footprints is not None and not self.screenlink:
+            key = self.footprints.key(self, obj)
+        if key is not None:
+            footprint = self.footprints.get(key)
+            if footprint is not None:
+                self._replayfootprint(footprint)
+                record.saveattrs(obj)
+                self.records[obj] = record
+                return record
+            if key not in self.footprints:
+                # generate normally, and cache the result if possible
+                self._footprint = []
+                rngstate = self.rng.getstate()
+
+        try:
+            if obj.ID == 0:
+                self.extobjs[obj.extID](self, obj.x, obj.y)
+            else:
+                self.stdobjs[obj.ID](self, obj.x, obj.y, obj.width, obj.height)
+            if obj.lasttile is None:
+                # object generated no selectable tiles
+##                print(f"Warning: Object {obj} generated no major tiles")
+                obj.error = "Error: Object generated no selectable tiles"
+                errorobject(self, obj, offset=0x10000)
+
+        except (IndexError, KeyError, TypeError) as err:
+            # object tilemap-constructing code failed, perhaps due to an
+            #  invalid negative size?
+            if __name__ == "__main__":
+                print(f"Object {obj} generation error!")
+                raise err
+##            print(f"Warning: Object {obj} generation error!", type(err))
+            obj.error = "Object code raised exception: " + type(err).__name__
+            errorobject(self, obj)
+
+        except L1TilemapOverflowError as err:
+            self.overflowerror = True
+            record.overflow = True
+            if self.loopsetting == "exception":
+                raise err
+            elif self.loopsetting == "errortile":
+                ## include red error tile at the location of the object
+                ## if obj.y > SMA3.Constants.maxtileY, cap to maxtileY
+                NotImplemented
+
+        if self._footprint is not None:
+            if (record.reads or record.overflow or obj.error or
+                    self.rng.getstate() != rngstate or
+                    hasattr(obj, "lastX") or hasattr(obj, "lastY")):
+                self.footprints.add(key, None)
+            else:
+                self.footprints.add(key, ObjectFootprint(self._footprint, obj))
+            self._footprint = None
+
+        record.saveattrs(obj)
+        self.records[obj] = record
+        return record
+
+    def _replayfootprint(self, footprint: ObjectFootprint):
+        "Generate a cached object footprint for the current object."
+        tiles = self.tiles
+        display = self.display
+        writes = self._record.writes
+        for screens, entries in footprint.segments:
+            for screen in screens:
+                self.enablescreen(screen)
+            for (x, y), entry in entries.items():
+                i = y << 8 | x
+                tiles[i] = entry & 0xFFFFFFFF
+                display[i] = entry >> 32
+            writes.update(entries)
+
+        self.obj.tiles = set(footprint.tiles)
+        self.obj.alltiles = set(footprint.alltiles)
+        self.obj.lasttile = footprint.lasttile
+
+    def _runobjects(self, objects: list, start: int, base,
+                    checkpoints: L1Checkpoints | None):
+        """Run the code of all objects from the specified index onward,
+        saving checkpoints if enabled."""
+        oldrecords = base.records if isinstance(base, L1Tilemap) else {}
+
+        rerun = []
+        try:
+            for index in range(start, len(objects)):
+                if (checkpoints is not None and index != start and
+                        index % checkpoints.interval == 0):
+                    checkpoints.save(index, self)
+
+                if self._cancelled is not None and self._cancelled():
+                    raise L1TilemapCancelled
+                obj = objects[index]
+                rerun.append((obj, oldrecords.get(obj)))
+                self._runobject(obj)
+
+        except (L1TilemapOverflowError, L1TilemapCancelled):
+            # leave objects consistent with the base tilemap, if any, and
+            #  discard checkpoints saved from the aborted object list
+            for obj, old in rerun:
+                if old is not None:
+                    old.restoreattrs(obj)
+            if checkpoints is not None:
+                checkpoints.invalidate(start)
+            raise
+
+    def _canregenerate(self, sublevel: SMA3.Sublevel, base, changed) -> bool:
+        "Check if a previous tilemap can be used for incremental regeneration."
+        if not isinstance(base, L1Tilemap) or not changed:
+            return False
+        if (base.tileset, base.loopsetting, base.alt, base.fixver,
+                base.seed) != (self.tileset, self.loopsetting, self.alt,
+                               self.fixver, self.seed):
+            return False
+        # screen linking/disabling objects modify the screen state directly,
+        #  so their effects can't be tracked per tile
+        if base.screenlink or any(map(_is_screencommand, changed)) or any(
+                map(_is_screencommand, sublevel.objects)):
+            return False
+        return True
+
+    def _regenerate(self, sublevel: SMA3.Sublevel, base, changed):
+        """Regenerate the tilemap from a previous tilemap of the same sublevel,
+        rerunning only objects whose effects may have changed.
+
+        Live tiles are tiles whose write history may differ from the base
+        tilemap. They're reset, then rebuilt in object order: objects that
+        read live tiles, or whose screen enabling would change, are rerun;
+        other objects replay their recorded writes to live tiles. If a rerun
+        object's writes differ on a non-live tile, that tile becomes live.
+        Non-live tiles keep their base values."""
+
+        self._initarrays(base.tiles, base.display)
+        tiles = self.tiles
+        display = self.display
+        records = base.records
+
+        live = self._live = set()
+        for obj in changed:
+            if obj in records:
+                live.update(records[obj].writes)
+        livescreens = {SMA3.coordstoscreen(x, y) for x, y in live}
+        for x, y in live:
+            tiles[y << 8 | x] = 0
+            display[y << 8 | x] = 0
+
+        # last entry written to each tile by objects processed so far
+        prefix = self._prefix = {}
+
+        rerun = []
+        try:
+            for obj in sublevel.objects:
+                if self._cancelled is not None and self._cancelled():
+                    raise L1TilemapCancelled
+                old = records.get(obj)
+                if (old is None or obj in changed
+                        or not old.reads.isdisjoint(live)
+                        or not old.cleared.isdisjoint(livescreens)
+                        or not self._replayscreens(old)):
+                    record = self._runobject(obj)
+                    rerun.append((obj, old))
+
+                    # check for differences outside the live tiles
+                    oldwrites = old.writes if old else {}
+                    newwrites = record.writes
+                    newlive = {tile for tile in newwrites.keys() | oldwrites.keys()
+                               if tile not in live and
+                               newwrites.get(tile) != oldwrites.get(tile)}
+                    for tile in newlive:
+                        x, y = tile
+                        entry = newwrites.get(tile, prefix.get(tile, 0))
+                        tiles[y << 8 | x] = entry & 0xFFFFFFFF
+                        display[y << 8 | x] = entry >> 32
+                    live |= newlive
+                    livescreens.update(SMA3.coordstoscreen(x, y)
+                                       for x, y in newlive)
+
+                    # restore non-live tiles written out of order
+                    for x, y in newwrites:
+                        if (x, y) not in live:
+                            i = y << 8 | x
+                            tiles[i] = base.tiles[i]
+                            display[i] = base.display[i]
+                else:
+                    record = old
+                    self.records[obj] = old
+                    writes = old.writes
+                    for tile in writes.keys() & live:
+                        x, y = tile
+                        entry = writes[tile]
+                        tiles[y << 8 | x] = entry & 0xFFFFFFFF
+                        display[y << 8 | x] = entry >> 32
+                prefix.update(record.writes)
+
+        except (L1TilemapOverflowError, L1TilemapCancelled):
+            # leave objects consistent with the base tilemap
+            for obj, old in rerun:
+                if old is not None:
+                    old.restoreattrs(obj)
+            raise
+
+        self.overflowerror = any(
+            record.overflow for record in self.records.values())
+        self.dirty = live
+        self._live = None
+        self._prefix = None
+
+    def _replayscreens(self, record: ObjectRecord) -> bool:
+        """Apply a non-rerun object's screen enabling, if it would match its
+        recorded effects. Otherwise, return False without changes."""
+        status = self.screenstatus
+        for screen in record.screens:
+            if (status[screen] in (0, 0xFF)) != (screen in record.cleared):
+                return False
+        for screen in record.screens:
+            status[screen] = 1
+        return True
+
+    def _entryat(self, x, y) -> int:
+        """Return the current tile ID | display ID << 32 at a coordinate.
+        During incremental regeneration, non-live tiles are read from the
+        objects processed so far, since their array values are the base
+        tilemap's."""
+        if (self._live is None or (x, y) in self._live or
+                (x, y) in self._record.writes):
+            i = y << 8 | x
+            return self.tiles[i] | self.display[i] << 32
+        return self._prefix.get((x, y), 0)
 
     # Informational functions
 
     def getTile(self, x, y) -> int:
         """Used for objects that check for pre-existing tile IDs. The game
         loops Y 7-bit when checking tiles, but 8-bit when writing tiles."""
-        return int(self[y & 0x7F][x & 0xFF])
+        x &= 0xFF
+        y &= 0x7F
+        if self._record is not None:
+            self._record.reads.add((x, y))
+        if self._live is None:
+            return self.tiles[y << 8 | x]
+        return self._entryat(x, y) & 0xFFFFFFFF
+
+    def displayID(self, x, y) -> int:
+        "Return the tile ID to display at a coordinate."
+        i = y << 8 | x
+        return self.display[i] or self.tiles[i]
 
     def getdyn(self, x, y) -> int:
         """Used for objects that check for pre-existing dynamic tile IDs.
@@ -221,20 +767,58 @@ class L1Tilemap(list):
         return sum(i in (1,0xFE,0xFF) for i in self.screenstatus)
 
     def enablescreen(self, screen: int):
+        record = self._record
+        if record is not None:
+            if self._footprint is not None and screen not in record.screens:
+                self._footprint.append(screen)
+            record.screens.add(screen)
         if self.screenstatus[screen] in (0, 0xFF):
             # clear all normal tiles on formerly-disabled screen when enabling it
+            # display IDs are kept
             baseX, baseY = SMA3.screentocoords(screen)
-            for y, x in itertools.product(range(baseY, baseY+0x10),
-                                          range(baseX, baseX+0x10)):
-                if isinstance(self[y][x], MultiTileID):
-                    self[y][x] = MultiTileID(0, self[y][x].displayID)
-                else:
-                    self[y][x] = 0
+            for y in range(baseY, baseY+0x10):
+                start = y << 8 | baseX
+                if self._live is not None:
+                    for x in range(baseX, baseX+0x10):
+                        self.display[y << 8 | x] = self._entryat(x, y) >> 32
+                self.tiles[start:start+0x10] = _blank16
+                if record is not None:
+                    for x in range(baseX, baseX+0x10):
+                        record.writes[(x, y)] = self.display[y << 8 | x] << 32
+            if record is not None:
+                record.cleared.add(screen)
         self.screenstatus[screen] = 1
 
     # Tilemap generation functions
 
-    def setTile(self, tileID: int, x, y, priority=True, highlight=True):
+    def _resolvetile(self, tileID: int, highlight: bool) -> tuple[int, bool]:
+        """Apply the extra tile properties in a tile ID's high byte.
+        Returns the tile ID to generate, and whether to highlight it."""
+        highbyte = tileID >> 0x10
+        if highbyte in (0xC, 0xD):  # load tile from dynamic table
+            tileID = self.dyn[tileID & 0xFFFF]
+            if highbyte == 0xC:  # dynamic + force disable highlight
+                highlight = False
+        elif highbyte == 0xA:  # force disable highlight
+            highlight = False
+            tileID &= 0xFFFF
+        # high byte 1 (display numbered square) is processed with visuals
+        return tileID, highlight
+
+    def _linkoffset(self, x, y) -> tuple[int, int, int]:
+        """Return the screen a tile generates to after accounting for extFB,
+        and the x/y offsets from the tile to its linked location."""
+        screen = SMA3.coordstoscreen(x, y)
+        if screen not in self.screenlink:
+            return screen, 0, 0
+        linked = self.screenlink[screen]
+        return linked, ((linked & 0xF) << 4) - (x & 0xF0), (
+            (linked & 0xF0) - (y & 0xF0))
+
+    def setTile(self, tileID: int, x, y, priority=True, highlight=True,
+                displayID: int = 0):
+        """Generate a tile at a coordinate. If displayID is nonzero, it's
+        displayed instead of the tile ID."""
         if priority:
             # check for overflow
             if y > SMA3.Constants.maxtileY or y < 0 or\
@@ -266,68 +850,168 @@ class L1Tilemap(list):
         if tileID < 0:
             return
 
-        # Advynia uses a high byte for extra tile properties
-        highbyte = tileID >> 0x10
-        if highbyte in (0xC, 0xD):  # load tile from dynamic table
-            tileID = self.dyn[tileID & 0xFFFF]
-            if highbyte == 0xC:  # dynamic + force disable highlight
-                highlight = False
-        elif highbyte == 0xA:  # force disable highlight
-            highlight = False
-            tileID &= 0xFFFF
-        # high byte 1 (display numbered square) is processed with visuals
+        if tileID >> 0x10:
+            tileID, highlight = self._resolvetile(tileID, highlight)
 
         # update tilemap
-        self[y][x] = tileID
+        i = y << 8 | x
+        self.tiles[i] = tileID
+        self.display[i] = displayID
+        if self._record is not None:
+            entry = tileID | displayID << 32
+            self._record.writes[(x, y)] = entry
+            if self._footprint is not None:
+                self._footprint.append((x, y, entry))
 
         if highlight:
             # tiles used for mouse interaction and dashed border
             self.obj.tiles.add((x, y))
             self.obj.lasttile = (x, y)
 
+    def _fillrect(self, tileID: int, xlist: list, ylist: list):
+        """Generate a single tile at every combination of the x and y values.
+        Tiles are written one screen-aligned span at a time, with overflow and
+        screen checks done once per span. The result is identical to calling
+        setTile in column order."""
+        if ylist and max(ylist) > SMA3.Constants.maxtileY:
+            if self.loopsetting in ("exception", "errortile"):
+                # which tiles are generated before the overflow depends on
+                #  tile order
+                for x, y in itertools.product(xlist, ylist):
+                    self.setTile(tileID, x, y)
+                return
+            ylist = [y for y in ylist if y <= SMA3.Constants.maxtileY]
+        if not xlist or not ylist:
+            return
+
+        highlight = True
+        if tileID >> 0x10:
+            tileID, highlight = self._resolvetile(tileID, highlight)
+        obj = self.obj
+        record = self._record
+        tiles = self.tiles
+        display = self.display
+
+        yruns = list(_runs(ylist))
+        for x0, width in _runs(xlist):
+            if tileID >= 0:
+                fill = array("I", [tileID]) * width
+                blank = _blank16[:width]
+            for y0, height in yruns:
+                screen, offsetX, offsetY = self._linkoffset(x0, y0)
+                self.enablescreen(screen)
+
+                x0_new = x0 + offsetX
+                ys = range(y0 + offsetY, y0 + offsetY + height)
+                coords = [(x, y) for x in range(x0_new, x0_new + width)
+                          for y in ys]
+                obj.alltiles.update(coords)
+                if tileID < 0:
+                    continue
+
+                for y in ys:
+                    start = y << 8 | x0_new
+                    tiles[start:start+width] = fill
+                    display[start:start+width] = blank
+                if record is not None:
+                    record.writes.update(dict.fromkeys(coords, tileID))
+                    if self._footprint is not None:
+                        self._footprint.extend(
+                            (x, y, tileID) for x, y in coords)
+                if highlight:
+                    obj.tiles.update(coords)
+
+        if highlight and tileID >= 0:
+            x, y = xlist[-1], ylist[-1]
+            _, offsetX, offsetY = self._linkoffset(x, y)
+            obj.lasttile = (x + offsetX, y + offsetY)
+
+    def _filliter(self, tiles: Iterable[int], coords: Iterable[tuple],
+                  strict: bool = False):
+        """Generate tiles from an iterable at each coordinate in order, with
+        screen checks done once per screen. The result is identical to calling
+        setTile for each tile.
+        If strict, running out of tiles raises StopIteration, as with next;
+        otherwise, generation stops at the end of either iterable."""
+        tiles = iter(tiles)
+        obj = self.obj
+        record = self._record
+        tilearray = self.tiles
+        display = self.display
+        maxtileY = SMA3.Constants.maxtileY
+        offsets = {}  # linked screen offsets, for screens already enabled
+
+        for x, y in coords:
+            tileID = next(tiles, None)
+            if tileID is None:
+                if strict:
+                    raise StopIteration
+                return
+            if y > maxtileY:
+                # overflow; crop or raise exception
+                self.setTile(tileID, x, y)
+                continue
+
+            screen = y & 0xF0 | x >> 4
+            offset = offsets.get(screen)
+            if offset is None:
+                linked, offsetX, offsetY = self._linkoffset(x, y)
+                self.enablescreen(linked)
+                offset = offsets[screen] = (offsetX, offsetY)
+            x += offset[0]
+            y += offset[1]
+            obj.alltiles.add((x, y))
+            if tileID < 0:
+                continue
+
+            highlight = True
+            if tileID >> 0x10:
+                tileID, highlight = self._resolvetile(tileID, highlight)
+            i = y << 8 | x
+            tilearray[i] = tileID
+            display[i] = 0
+            if record is not None:
+                record.writes[(x, y)] = tileID
+                if self._footprint is not None:
+                    self._footprint.append((x, y, tileID))
+            if highlight:
+                obj.tiles.add((x, y))
+                obj.lasttile = (x, y)
+
     def row_single(self, tileID: int, x0, y, width):
         "Generate a row of a single tile."
-        for x in self.xrange(x0, width):
-            self.setTile(tileID, x, y)
+        self._fillrect(tileID, list(self.xrange(x0, width)), [y])
 
     def column_single(self, tileID: int, x, y0, height):
         "Generate a column of a single tile."
-        for y in self.yrange(y0, height):
-            self.setTile(tileID, x, y)
+        self._fillrect(tileID, [x], list(self.yrange(y0, height)))
 
     def row_iter(self, tiles: Iterable[int], x0, y, width=0x100):
         """Generate a row of tiles from an iterable.
         Defaults to evaluating the entire iterable, if width is not specified."""
-        for x, tileID in zip(self.xrange(x0, width), tiles):
-            self.setTile(tileID, x, y)
+        self._filliter(tiles, zip(self.xrange(x0, width), itertools.repeat(y)))
 
     def column_iter(self, tiles: Iterable[int], x, y0, height=0x100):
         """Generate a column of tiles from an iterable.
         Defaults to evaluating the entire iterable, if height is not specified."""
-        for y, tileID in zip(self.yrange(y0, height), tiles):
-            self.setTile(tileID, x, y)
+        self._filliter(tiles, zip(itertools.repeat(x), self.yrange(y0, height)))
 
     def rect_single(self, tileID: int, x0, y0, width, height):
-        "Generate a rectangle of a single tile."   
-        for x, y in itertools.product(self.xrange(x0, width),
-                                      self.yrange(y0, height)):
-            self.setTile(tileID, x, y)
+        "Generate a rectangle of a single tile."
+        self._fillrect(tileID, list(self.xrange(x0, width)),
+                       list(self.yrange(y0, height)))
 
     def rect_iter_row(self, tiles: Iterable[int], x0, y0, width, height):
         """Generate a rectangle of tiles from an iterable, filling one row
         at a time."""
-        tile_iter = iter(tiles)
-        for y, x in itertools.product(self.yrange(y0, height),
-                                      self.xrange(x0, width)):
-            self.setTile(next(tile_iter), x, y)
+        self._filliter(tiles, ((x, y) for y, x in itertools.product(
+            self.yrange(y0, height), self.xrange(x0, width))), strict=True)
 
     def rect_iter_column(self, tiles: Iterable[int], x0, y0, width, height):
         """Generate a rectangle of tiles from an iterable, filling one column
         at a time."""
-        tiles = iter(tiles)
-        for x, y in itertools.product(self.xrange(x0, width),
-                                      self.yrange(y0, height)):
-            self.setTile(next(tiles), x, y)
+        self._filliter(tiles, itertools.product(
+            self.xrange(x0, width), self.yrange(y0, height)), strict=True)
 
     def lookup_replace(self, mapping: Mapping[int, int], x, y, default=None,
                        dynamic=False, *, priority=True, highlight=True):
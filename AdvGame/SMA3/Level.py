@@ -2,7 +2,7 @@
 Classes and functions for SMA3 levels and sublevels."""
 
 # standard library imports
-import itertools
+import functools, hashlib, itertools, struct
 
 ##if __name__ == "__main__":
 ##    # allow testing as if it's from the Advynia main directory
@@ -94,126 +94,210 @@ class Sublevel:
         raise AttributeError(" ".join((repr(self.__class__.__name__),
             "object has no attribute", repr(name))))
 
-    def bytesize(self):
+    @property
+    def objects(self):
+        return self._objects
+
+    @objects.setter
+    def objects(self, objects):
+        if not isinstance(objects, ObjectList):
+            objects = ObjectList(objects)
+        self._objects = objects
+
+    def bytesize(self, recount=False):
         """Calculate the total byte size of this sublevel: the sum of the byte
-        lengths of this sublevel's main and sprite data."""
+        lengths of this sublevel's main and sprite data.
+        Uses the object list's running total, unless recount is True."""
 ##        return len(self.exportmaindata()) + (len(self.sprites)+1)*4
-        return (0x10 + sum(len(bytes(obj)) for obj in self.objects) +
-                7*len(self.exits) + 4*len(self.sprites))
+        if recount:
+            objectbytes = sum(len(bytes(obj)) for obj in self.objects)
+        else:
+            objectbytes = self.objects.bytecount
+        return 0x10 + objectbytes + 7*len(self.exits) + 4*len(self.sprites)
 
     # import methods
 
     @classmethod
     def importbyID(cls, filepath, sublevelID, objlengthprop=None):
         "Import a specified sublevel's main and sprite data from the game."
-        sublevel = cls()
-        sublevel.ID = sublevelID
+        return cls.importmultiple(filepath, (sublevelID,), objlengthprop
+                                  )[sublevelID]
+
+    @classmethod
+    def importmultiple(cls, filepath, sublevelIDs, objlengthprop=None,
+                       skipinvalid=False):
+        """Import multiple sublevels' main and sprite data from the game,
+        reading the object length and pointer tables once.
+        Returns a dict of sublevels, indexed by sublevel ID.
+        If skipinvalid is True, sublevels with invalid pointers or data are
+        left out, instead of raising an exception."""
+        output = {}
+        if not sublevelIDs:
+            return output
+        minID = min(sublevelIDs)
+        count = max(sublevelIDs) + 1 - minID
 
         with GBA.Open(filepath) as f:
             # retrieve object lengths
+            objlengthraw = None
             if not objlengthprop:
                 f.readseek(Pointers.objlengthprop)
                 objlengthraw = f.read(0xFF)
-                # only lowest 2 bits of table are used for length properties
-                sublevel.objlengthprop = [byte&3 for byte in objlengthraw]
-                if objlengthraw[0x65] & 0x3C:
-                    sublevel.obj65_7byte = True
-
-            # load main/sprite data
-            mainptrtable = f.readptr(Pointers.sublevelmainptrs)
-            mainptr = f.readptr(mainptrtable, index=sublevelID)
-
-            spriteptrtable = f.readptr(Pointers.sublevelspriteptrs)
-            spriteptr = f.readptr(spriteptrtable, index=sublevelID)
 
-            f.seek(mainptr)
-            sublevel.importmaindata(f)
-            sublevel.datablocks["main"] = [mainptr, f.tell() - mainptr]
+            # read the needed range of each sublevel-indexed table at once,
+            #  4 bytes per sublevel
+            tables = []
+            for tableptr, length in ((Pointers.sublevelmainptrs, 4),
+                                     (Pointers.sublevelspriteptrs, 4),
+                                     (Pointers.sublevellayerY, 2)):
+                f.seek(f.readptr(tableptr) + 4*minID)
+                tables.append(f.readints(length, 4*count // length))
+            mainptrs, spriteptrs, layerYoffsets = tables
+
+            for sublevelID in sublevelIDs:
+                sublevel = cls()
+                sublevel.ID = sublevelID
+                if objlengthraw:
+                    # only lowest 2 bits of table are used for length properties
+                    sublevel.objlengthprop = [byte&3 for byte in objlengthraw]
+                    if objlengthraw[0x65] & 0x3C:
+                        sublevel.obj65_7byte = True
+                index = sublevelID - minID
+
+                # load main/sprite data
+                try:
+                    mainptr = mainptrs[index]
+                    f.seek(mainptr)
+                    sublevel.importmaindata(f)
+                    sublevel.datablocks["main"] = [mainptr, f.tell() - mainptr]
+
+                    spriteptr = spriteptrs[index]
+                    f.seek(spriteptr)
+                    sublevel.importspritedata(f)
+                    sublevel.datablocks["sprite"] = [
+                        spriteptr, f.tell() - spriteptr]
+                except (ValueError, IndexError):
+                    if skipinvalid:
+                        continue
+                    raise
 
-            f.seek(spriteptr)
-            sublevel.importspritedata(f)
-            sublevel.datablocks["sprite"] = [spriteptr, f.tell() - spriteptr]
+                # load sublevel-indexed layer Y offsets
+                sublevel.layerYoffsets[2] = layerYoffsets[2*index]
+                sublevel.layerYoffsets[3] = layerYoffsets[2*index + 1]
 
-            # load sublevel-indexed layer Y offsets
-            f.seek(f.readptr(Pointers.sublevellayerY) + 4*sublevelID)
-            sublevel.layerYoffsets[2] = f.readint(2)
-            sublevel.layerYoffsets[3] = f.readint(2)
+                output[sublevelID] = sublevel
 
-        return sublevel
+        return output
 
     def importmaindata(self, f):
         """Import a sublevel's main data (header, objects, exits) from a file
         object."""
-        headerraw = f.read(10)
-        self.extractheader(headerraw, self.headerbitcounts)
-        self.importobjectdata(f)
-        self.importexitdata(f)
-
-    def extractheader(self, headerraw, headerbitcounts):
-        "Extract a sublevel header's bitwise values from the raw bytes object."
-        self.header = []
-        bitoffset = 0
-        for bitcount in headerbitcounts:
-            newbyte = 0
-            for i in range(bitcount):
-                # read from highest to lowest bit
-                bit = (headerraw[bitoffset//8] >> (7 - bitoffset%8)) & 1
-                newbyte = newbyte<<1 | bit
-                bitoffset += 1
-            self.header.append(newbyte)
+        _parsefromfile(f, self.parsemaindata)
 
     def importobjectdata(self, f):
         "Import a sublevel's object data from a file object."
-        self.objects = []
-        while (objectID := f.read(1)[0]) != 0xFF:
-            objscreen = f.read(1)[0]
-            objcoord = f.read(1)[0]
+        _parsefromfile(f, self.parseobjectdata)
+
+    def importexitdata(self, f, entrlength=6):
+        "Import a sublevel's screen exit data from a file object."
+        _parsefromfile(f, functools.partial(
+            self.parseexitdata, entrlength=entrlength))
+
+    def importspritedata(self, f):
+        "Import a sublevel's sprite data from a file object."
+        _parsefromfile(f, self.parsespritedata)
+
+    # Parsers of bytes-like objects, such as a memoryview of the ROM or an A3L
+    #  payload. Each returns the position after the parsed data, and raises
+    #  IndexError if the data ends early.
+
+    def parsemaindata(self, data, pos=0):
+        "Parse a sublevel's main data (header, objects, exits)."
+        self.extractheader(data[pos:pos+10], self.headerbitcounts)
+        pos = self.parseobjectdata(data, pos+10)
+        return self.parseexitdata(data, pos)
+
+    def extractheader(self, headerraw, headerbitcounts):
+        "Extract a sublevel header's bitwise values from the raw bytes object."
+        bytecount, fields = _headerfields(headerbitcounts)
+        if len(headerraw) < bytecount:
+            raise IndexError("Sublevel header data is incomplete.")
+        # values are stored from highest to lowest bit
+        headerint = int.from_bytes(headerraw[0:bytecount], "big")
+        self.header = [headerint >> shift & mask for shift, mask in fields]
+
+    def parseobjectdata(self, data, pos=0):
+        "Parse a sublevel's object data."
+        objects = []
+        # byte length of each object ID: ID, screen, coordinate, then
+        #  extended ID (object 00), or width and/or height bytes
+        objlengths = [4] + [3 + (prop != 1) + (prop != 0)
+                            for prop in self.objlengthprop[1:]]
+        if self.obj65_7byte:
+            objlengths[0x65] += 2
+        datalen = len(data)
+
+        while (objectID := data[pos]) != 0xFF:
+            end = pos + objlengths[objectID]
+            if end > datalen:
+                raise IndexError("Reached end of data when importing "
+                                 "object data.")
+            objscreen = data[pos+1]
+            objcoord = data[pos+2]
 
             obj = Object(ID=objectID)
             # untangle x/y high and low digits
             obj.x = ((objscreen & 0xF) << 4) | (objcoord & 0xF)
             obj.y = (objscreen & 0xF0) | (objcoord >> 4)
-            if obj.ID == 0:
+            pos += 3
+            if objectID == 0:
                 # if object 00, there's an extended object ID byte
-                obj.extID = f.read(1)[0]
-                self.objects.append(obj)
-                continue   # object 00 has no length bytes
-            if self.objlengthprop[objectID] != 1:
-                # if property 0 or 2, there's a signed width byte
-                obj.width = int.from_bytes(f.read(1), "little", signed=True)
-            if self.objlengthprop[objectID] != 0:
-                # if property 1 or 2, there's a signed height byte
-                obj.height = int.from_bytes(f.read(1), "little", signed=True)
-            if obj.ID in (0x64, 0x65):
-                if self.obj65_7byte and obj.ID == 0x65:
-                    obj.extID = int.from_bytes(f.read(2), "little")
+                obj.extID = data[pos]
+            else:
+                prop = self.objlengthprop[objectID]
+                if prop != 1:
+                    # if property 0 or 2, there's a signed width byte
+                    obj.width = (data[pos] ^ 0x80) - 0x80
+                    pos += 1
+                if prop != 0:
+                    # if property 1 or 2, there's a signed height byte
+                    obj.height = (data[pos] ^ 0x80) - 0x80
+                    pos += 1
+                if objectID == 0x65 and self.obj65_7byte:
+                    obj.extID = data[pos] | data[pos+1] << 8
                     obj.extIDbytes = 2
-                else:
-                    obj.ID == 0x63
-            self.objects.append(obj)
+            objects.append(obj)
+            pos = end
+        self.objects = objects
+        return pos + 1
 
-    def importexitdata(self, f, entrlength=6):
-        "Import a sublevel's screen exit data from a file object."
+    def parseexitdata(self, data, pos=0, entrlength=6):
+        "Parse a sublevel's screen exit data."
         self.exits = {}
-        while (screenindex := f.read(1)[0]) != 0xFF:
-            self.exits[screenindex] = Entrance(f.read(entrlength))
-
-    def importspritedata(self, f):
-        "Import a sublevel's sprite data from a file object."
+        while (screenindex := data[pos]) != 0xFF:
+            if pos + 1 + entrlength > len(data):
+                raise IndexError("Reached end of data when importing "
+                                 "screen exit data.")
+            self.exits[screenindex] = Entrance(
+                bytes(data[pos+1:pos+1+entrlength]))
+            pos += 1 + entrlength
+        return pos + 1
+
+    def parsespritedata(self, data, pos=0):
+        "Parse a sublevel's sprite data."
         self.sprites = []
-        while (rawbytes := f.read(4)) != b"\xff\xff\xff\xff":
-            if not rawbytes:
-                # prevent infinite loop
-                raise ValueError("Reached end of byte stream when importing "
-                                 "sprite data.")
-            sprite32bit = int.from_bytes(rawbytes, "little")
-            spr = Sprite(
+        end = pos + (len(data) - pos) // 4 * 4
+        for (sprite32bit,) in struct.iter_unpack("<I", data[pos:end]):
+            pos += 4
+            if sprite32bit == 0xFFFFFFFF:
+                return pos
+            self.sprites.append(Sprite(
                 ID = sprite32bit & 0x1FF,
                 y = (sprite32bit >> 9) & 0x7F,
                 x = (sprite32bit >> 16) & 0xFF,
                 extID = sprite32bit >> 24
-                )
-            self.sprites.append(spr)
+                ))
+        raise IndexError("Reached end of data when importing sprite data.")
 
     def importspritetileset(self, f, sublevelstripes=False):
         spritetileset = self.ID if sublevelstripes else self.header[7]
@@ -272,6 +356,106 @@ class Sublevel:
 
         return output
 
+def _copyslots(obj, memo):
+    """Copy an object's slots, for __deepcopy__. Sets are copied, but not
+    their elements, since they only contain tuples of ints. Other values are
+    immutable."""
+    new = object.__new__(type(obj))
+    memo[id(obj)] = new
+    for key in obj.__slots__:
+        try:
+            value = getattr(obj, key)
+        except AttributeError:
+            continue  # unset slot
+        if isinstance(value, set):
+            # keep sets shared between slots (such as backups) shared
+            if id(value) not in memo:
+                memo[id(value)] = value.copy()
+            value = memo[id(value)]
+        setattr(new, key, value)
+    return new
+
+@functools.cache
+def _headerfields(headerbitcounts):
+    """Return the byte length of a sublevel header with the given bit counts,
+    and each value's (shift, mask) in the header as a big-endian integer."""
+    bytecount = (sum(headerbitcounts) + 7) // 8
+    fields = []
+    shift = bytecount * 8
+    for bitcount in headerbitcounts:
+        shift -= bitcount
+        fields.append((shift, (1 << bitcount) - 1))
+    return bytecount, tuple(fields)
+
+def _parsefromfile(f, parsefunc, window=0x1000):
+    """Run a bytes-like parser on data from a file object's current
+    position, reading a larger window if the data doesn't fit. Seeks to the
+    end of the parsed data."""
+    # seek within the underlying file, since the wrapper's pointer format
+    #  may differ from the file offset, as with SNES.Open
+    fileobj = getattr(f, "fileobj", f)
+    start = fileobj.tell()
+    readview = getattr(f, "readview", None)
+    while True:
+        data = readview(window) if readview else memoryview(f.read(window))
+        with data:
+            try:
+                end = parsefunc(data)
+            except IndexError:
+                if len(data) < window:
+                    raise
+            else:
+                fileobj.seek(start + end)
+                return
+        window *= 4
+        fileobj.seek(start)
+
+class SublevelSummary:
+    """Summary of one sublevel's data in a ROM: its data blocks, header,
+    object/sprite counts, screen exits, and a digest of its main and sprite
+    data bytes."""
+    def __init__(self, sublevel, digest):
+        self.ID = sublevel.ID
+        self.datablocks = {key: tuple(block)
+                           for key, block in sublevel.datablocks.items()}
+        self.header = sublevel.header
+        self.objectcount = len(sublevel.objects)
+        self.spritecount = len(sublevel.sprites)
+        self.exits = sublevel.exits
+        self.digest = digest
+
+class SublevelCatalog(dict):
+    """Summaries of every sublevel in a ROM, indexed by sublevel ID.
+    Built from one import of all sublevels, so features that need every
+    sublevel don't reparse them. Sublevels with invalid data are left out."""
+
+    def __init__(self, filepath=None):
+        super().__init__()
+        if filepath is not None:
+            self.refresh(filepath)
+
+    def refresh(self, filepath, sublevelIDs=None):
+        """Reimport the summaries of the given sublevel IDs, or all sublevels
+        if not specified, after their data was changed."""
+        if sublevelIDs is None:
+            sublevelIDs = range(Constants.maxsublevelID + 1)
+        sublevels = Sublevel.importmultiple(
+            filepath, sublevelIDs, skipinvalid=True)
+
+        with GBA.Open(filepath, "rb") as f:
+            for sublevelID in sublevelIDs:
+                if sublevelID not in sublevels:
+                    self.pop(sublevelID, None)
+                    continue
+                sublevel = sublevels[sublevelID]
+                digest = hashlib.blake2b(digest_size=16)
+                for ptr, length in (sublevel.datablocks["main"],
+                                    sublevel.datablocks["sprite"]):
+                    f.seek(ptr)
+                    with f.readview(length) as data:
+                        digest.update(data)
+                self[sublevelID] = SublevelSummary(sublevel, digest.digest())
+
 class SublevelFromSNES(Sublevel):
     "Subclass for importing SNES-format data."
 
@@ -354,6 +538,14 @@ class Object:
     For manual construction: use keywords adjwidth and adjheight to set adjusted
     width/height. Adjusted width of -1 is impossible, and will produce
     an actual width of 0 (adjusted width 1)."""
+
+    __slots__ = (
+        "ID", "x", "y", "extID", "extIDbytes", "width", "height",
+        # used by L1Tilemap, and lastX/lastY by some object code
+        "tiles", "alltiles", "lasttile", "error", "lastX", "lastY",
+        "backup_x", "backup_y", "backup_width", "backup_height",
+        "backup_tiles", "backup_alltiles", "backup_lasttile")
+
     def __init__(self, **kwargs):
         # object attributes
         self.ID = 0
@@ -374,6 +566,21 @@ class Object:
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    def __deepcopy__(self, memo):
+        return _copyslots(self, memo)
+
+    @property
+    def bytelength(self):
+        "Length of the object's in-game byte sequence, without exporting it."
+        length = 3
+        if self.width is not None:
+            length += 1
+        if self.height is not None:
+            length += 1
+        if self.extID is not None:
+            length += self.extIDbytes
+        return length
+
     @property
     def adjwidth(self): return self._adjlength(self.width)
     @property
@@ -465,8 +672,82 @@ class Object:
     def __repr__(self):
         return "<SMA3.Object: " + self.__str__() + ">"
 
+class ObjectList(list):
+    """List of a sublevel's objects, which keeps a running total of their
+    byte lengths as objects are added or removed.
+    If an object in the list gains or loses a width, height, or extended ID,
+    call recount()."""
+
+    def __init__(self, objects=()):
+        super().__init__(objects)
+        self.recount()
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+    def recount(self):
+        "Recalculate the byte total from every object."
+        self.bytecount = sum(obj.bytelength for obj in self)
+
+    def append(self, obj):
+        super().append(obj)
+        self.bytecount += obj.bytelength
+
+    def insert(self, index, obj):
+        super().insert(index, obj)
+        self.bytecount += obj.bytelength
+
+    def extend(self, objects):
+        objects = list(objects)
+        super().extend(objects)
+        self.bytecount += sum(obj.bytelength for obj in objects)
+
+    def __iadd__(self, objects):
+        self.extend(objects)
+        return self
+
+    def remove(self, obj):
+        super().remove(obj)
+        self.bytecount -= obj.bytelength
+
+    def pop(self, index=-1):
+        obj = super().pop(index)
+        self.bytecount -= obj.bytelength
+        return obj
+
+    def clear(self):
+        super().clear()
+        self.bytecount = 0
+
+    def __setitem__(self, index, value):
+        old = self[index]
+        if isinstance(index, slice):
+            value = list(value)
+            super().__setitem__(index, value)
+            self.bytecount += (sum(obj.bytelength for obj in value) -
+                               sum(obj.bytelength for obj in old))
+        else:
+            super().__setitem__(index, value)
+            self.bytecount += value.bytelength - old.bytelength
+
+    def __delitem__(self, index):
+        old = self[index]
+        super().__delitem__(index)
+        if isinstance(index, slice):
+            self.bytecount -= sum(obj.bytelength for obj in old)
+        else:
+            self.bytecount -= old.bytelength
+
+    def __imul__(self, count):
+        super().__imul__(count)
+        self.recount()
+        return self
+
 class Sprite:
     "A sprite from a sublevel's sprite data."
+
+    __slots__ = ("ID", "x", "y", "extID", "parityID", "backup_x", "backup_y")
+
     def __init__(self, **kwargs):
         self.ID = 0
         self.x = 0
@@ -477,6 +758,9 @@ class Sprite:
         for key, value in kwargs.items():
             self.__setattr__(key, value)
 
+    def __deepcopy__(self, memo):
+        return _copyslots(self, memo)
+
     def parity(self):
         return (self.y&1)<<1 | self.x&1
 
@@ -513,6 +797,7 @@ class Entrance(bytearray):
     """SMA3-format entrance.
     Compatible with level entrances, midway entrances, and screen exits."""
 
+    __slots__ = ()
     attr = ("sublevelID", "x", "y", "anim", "byte4", "byte5")
 
     def __init__(self, byteinput=None):
@@ -522,21 +807,21 @@ class Entrance(bytearray):
                 byteinput = byteinput[0:6]
             self[:len(byteinput)] = byteinput
 
-    def __getattr__(self, name):
-        if name in Entrance.attr:
-            return self[Entrance.attr.index(name)]
-        raise AttributeError(" ".join((repr(self.__class__.__name__),
-            "object has no attribute", repr(name))))
-
-    def __setattr__(self, name, value):
-        if name in Entrance.attr:
-            self[Entrance.attr.index(name)] = value
-        else:
-            bytearray.__setattr__(self, name, value)
+    def _field(index):
+        "Property for the byte at the given index."
+        return property(lambda self: self[index],
+                        lambda self, value: self.__setitem__(index, value))
+    sublevelID = _field(0)
+    x = _field(1)
+    y = _field(2)
+    anim = _field(3)
+    byte4 = _field(4)
+    byte5 = _field(5)
+    del _field
 
     def __bool__(self):
         # return false if all bytes are 0
-        return self != Entrance()
+        return any(self)
 
     def __str__(self):
         return " ".join(f"{i:02X}" for i in self)
@@ -831,13 +1116,11 @@ def swapExtraSecret(seq):
 
 def import_tile16interact(filepath, length=0xA9):
     "Import the 16x16 tile interaction values/flags for each high byte."
-    output = []
     with GBA.Open(filepath, "rb") as f:
         f.readseek(Pointers.tile16interact)
-        for _ in range(length):
-            output.append(f.read(3))
-            f.read(1)  # discard every 4th byte
-    return output
+        data = f.read(length*4)
+    # discard every 4th byte
+    return [data[i:i+3] for i in range(0, length*4, 4)]
 
 def tile16interactstr(tileID, interactmap, numprefix=False, sep="\n"):
     highbyte = tileID >> 8
@@ -869,3 +1152,88 @@ def tile16interactstr(tileID, interactmap, numprefix=False, sep="\n"):
         text.append(Constants.tile16interact_extra.get(extra, "???"))
 
     return "".join(text)
+
+######## Test code
+
+if __name__ == "__main__":
+    # regression test: SNES sublevel data imported through SNES.Open's 24-bit
+    #  pointers should match importing the same bytes from a plain file
+    import io, os, random, tempfile
+
+    def _fileaddr(ptr):
+        bank = (ptr >> 16) & 0x7F
+        if bank < 0x40:
+            return (bank - 1) * 0x8000 + (ptr & 0xFFFF)
+        return (bank & 0x3F) * 0x10000 + (ptr & 0xFFFF)
+
+    def _summary(sublevel):
+        return (sublevel.header,
+                [(obj.ID, obj.x, obj.y, obj.extID, obj.width, obj.height)
+                 for obj in sublevel.objects],
+                {screen: bytes(entr) for screen, entr in sublevel.exits.items()},
+                [(spr.ID, spr.x, spr.y) for spr in sublevel.sprites])
+
+    def _randommaindata(r):
+        objlengths = [4] + [3 + (prop != 1) + (prop != 0)
+                            for prop in SublevelFromSNES.objlengthprop[1:]]
+        data = bytearray(r.randbytes(10))
+        # up to 0x500 objects, to also test reading a larger window
+        for _ in range(r.randrange(0x500)):
+            objectID = r.randrange(0xFF)
+            data.append(objectID)
+            data += r.randbytes(objlengths[objectID] - 1)
+        data.append(0xFF)
+        for _ in range(r.randrange(8)):
+            data.append(r.randrange(0x80))
+            data += r.randbytes(4)
+        data.append(0xFF)
+        return bytes(data + r.randbytes(0x10))
+
+    def _randomspritedata(r):
+        data = bytearray()
+        for _ in range(r.randrange(0x100)):
+            data += r.randrange(0xFFFF).to_bytes(2, "little")
+            data.append(r.randrange(0x100))
+        return bytes(data + b"\xFF\xFF" + r.randbytes(0x10))
+
+    # main data in LoROM and HiROM banks, sprite data in the other
+    blocks = ((0x019000, 0x480000), (0x500000, 0x058000))
+    tableptr = 0x038000
+    r = random.Random(0)
+    with tempfile.TemporaryDirectory() as tempdir:
+        filepath = os.path.join(tempdir, "test.sfc")
+        for trial in range(0x40):
+            rom = bytearray(0x200000)
+            offset = _fileaddr(PointersSNES.sublevelptrs)
+            rom[offset:offset+3] = tableptr.to_bytes(3, "little")
+
+            expected = []
+            for sublevelID, (mainptr, spriteptr) in enumerate(blocks):
+                offset = _fileaddr(tableptr) + 6*sublevelID
+                rom[offset:offset+6] = (mainptr.to_bytes(3, "little") +
+                                        spriteptr.to_bytes(3, "little"))
+                maindata = _randommaindata(r)
+                spritedata = _randomspritedata(r)
+                for ptr, data in ((mainptr, maindata), (spriteptr, spritedata)):
+                    rom[_fileaddr(ptr):_fileaddr(ptr)+len(data)] = data
+
+                sublevel = SublevelFromSNES()
+                f = io.BytesIO(maindata)
+                sublevel.importmaindata(f)
+                mainend = f.tell()
+                sublevel.importspritedata(io.BytesIO(spritedata))
+                expected.append((_summary(sublevel), mainend))
+
+            with open(filepath, "wb") as f:
+                f.write(rom)
+            for sublevelID, (mainptr, spriteptr) in enumerate(blocks):
+                summary, mainend = expected[sublevelID]
+                sublevel = SublevelFromSNES.importbyID(filepath, sublevelID)
+                assert _summary(sublevel) == summary, (trial, sublevelID)
+
+                # the file is left after the parsed data
+                with SNES.Open(filepath, "rb") as f:
+                    f.seek(mainptr)
+                    SublevelFromSNES().importmaindata(f)
+                    assert f.fileobj.tell() == _fileaddr(mainptr) + mainend
+    print("SNES import test passed")
@@ -8,7 +8,7 @@ Tilemap is abbreviated to "t" for compactness, given its frequent references.
 """
 
 # standard library imports
-import itertools, random
+import itertools
 from collections.abc import Callable, Iterator
 
 # import from other files
@@ -73,7 +73,7 @@ def ext30(t, x0, y0):
         t.setTile(0x015C if t.getTile(x, y) != 0x015B else -1, x, y)
 
 def ext46(t, x, y):
-    t.setTile(random.choice((0x5F00,0x5F01,0x5F03,0x5F03)), x, y)
+    t.setTile(t.rng.choice((0x5F00,0x5F01,0x5F03,0x5F03)), x, y)
 
 def ext4A(t, x, y):
     t.setTile(0x3D4C, x, y)
@@ -173,9 +173,10 @@ def ext67(t, x, y):
     tileID = ext67dynreplace.get(t.dynrev.get(prevtile),
              ext67staticreplace.get(prevtile))
     if tileID is None:
-        tileID = MultiTileID(prevtile, 0x11E67)
-    t.setTile(tileID, x, y)
-    # use error tile 11E67 if no valid slanted log tile to modify
+        # use error tile 11E67 if no valid slanted log tile to modify
+        t.setTile(prevtile, x, y, displayID=0x11E67)
+    else:
+        t.setTile(tileID, x, y)
 
 #### Extended objects 88-8C,9F-A3: Sewer tileset
 
@@ -302,7 +303,7 @@ extADB2prop = {
     }
 def extADB2(t, x0, y0):
     height, tiles = extADB2prop[t.obj.extID]
-    randoffset = random.randrange(0, 0x30, 0xE)
+    randoffset = t.rng.randrange(0, 0x30, 0xE)
     t.rect_iter_row((tileID+randoffset for tileID in tiles), x0, y0, 1, height)
 
 #### Extended objects B4-BF: Random-color cave decorations
@@ -323,7 +324,7 @@ extB4B7prop = {
     }
 def extB4B7(t, x0, y0):
     width, height, tilemapA, tilemapB = extB4B7prop[t.obj.extID]
-    tiles = random.choice((tilemapA, tilemapB))
+    tiles = t.rng.choice((tilemapA, tilemapB))
     t.rect_iter_row(tiles, x0, y0, width, height)
 
 extBABFtiles = {
@@ -336,7 +337,7 @@ extBABFtiles = {
     }
 def extBABF(t, x0, y0):
     tiles = extBABFtiles[t.obj.extID]
-    randoffset = random.choice((0, 0, 1, 2))
+    randoffset = t.rng.choice((0, 0, 1, 2))
     t.column_iter((tileID+randoffset for tileID in tiles), x0, y0)
 
 #### Extended objects C0-C1: Rock spire connections
@@ -381,7 +382,7 @@ def extFB(t, objX, objY):  # screen linker
     obj = t.obj
 
     # display filler tile
-    t.setTile(MultiTileID(t.getTile(objX, objY), 0x10EFB), objX, objY)
+    t.setTile(t.getTile(objX, objY), objX, objY, displayID=0x10EFB)
 
     currentscreen = SMA3.coordstoscreen(objX, objY)
     linkscreen = (objY&0xF)<<4 | objX&0xF
@@ -409,11 +410,12 @@ def extFB(t, objX, objY):  # screen linker
 
 def extFD(t, x, y):
     # display filler tile
-    t.setTile(MultiTileID(0, 0x10EFD), x, y)
+    t.setTile(0, x, y, displayID=0x10EFD)
 
 def extFEFF(t, objX, objY):  # disable screens in-game
     # display filler tile
-    t.setTile(MultiTileID(t.getTile(objX, objY), 0x10E00 + t.obj.extID), objX, objY)
+    t.setTile(t.getTile(objX, objY), objX, objY,
+              displayID=0x10E00 + t.obj.extID)
     # set screen to disabled
     t.screenstatus[SMA3.coordstoscreen(objX, objY)] = t.obj.extID
 
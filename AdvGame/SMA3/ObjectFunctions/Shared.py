@@ -2,24 +2,6 @@
 
 import itertools
 
-class MultiTileID(int):
-    """Used to generate tiles that act like one tile ID for overlap code, but
-    display as another tile ID for error purposes."""
-    def __new__(cls, mainID, displayID):
-        x = int.__new__(cls, mainID)
-        x.displayID = displayID
-        return x
-
-    def __repr__(self):
-        return f"{self.__class__.__name__}({self.__index__():#x}, {self.displayID:#x})"
-
-    def __deepcopy__(self, _):  # without this, deepcopy crashes
-        return MultiTileID(self, self.displayID)
-
-    def __eq__(self, other):
-        if not isinstance(other, MultiTileID): return False
-        return other.displayID == self.displayID
-
 def genseq_bordered(length, first=0, mid=1, last=2):
     """Generate a sequence of a specified length, with distinct first and last
     values, defaulting to a single value in between."""
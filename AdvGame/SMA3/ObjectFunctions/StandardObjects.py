@@ -10,7 +10,7 @@ code processing, both dimensions are provided to all standard objects.
 """
 
 # standard library imports
-import itertools, math, random
+import itertools, math
 from collections.abc import Callable, Iterable, Iterator
 
 # import from other files
@@ -54,7 +54,7 @@ def setlandinterior_shared(t, x, y, lastYflag: bool):
                 t.setTile(0xD391D, x-1, y, priority=False, highlight=False)
             t.setTile(0xD3918, x, y+1, priority=False, highlight=False)
         # default tile
-        tileID = random.choice(landinterior_randtile)
+        tileID = t.rng.choice(landinterior_randtile)
     t.setTile(tileID, x, y)
 
 def obj01(t, x0, y0, width, height):
@@ -117,7 +117,7 @@ landwalltiles = (
 def setlandwalltile(t, x, y, side: int):
     """Create a land wall tile at the specified coordinates.
     side: 0 = left wall (obj 02/0A), 1 = right wall (obj 03/0B)"""
-    tileID = random.choice(landwalltiles[side])
+    tileID = t.rng.choice(landwalltiles[side])
     match t.getdyn(x, y):
         case 0x2A00 | 0x2A01:
             tileID = 0xD3929 + side
@@ -537,7 +537,7 @@ def obj21(t, x0, y0, width, height):
     xlist = list(t.xrange(x0, width))
     ylist = list(t.yrange(y0, height))
     for x in xlist:
-        randoffset = random.randrange(4)
+        randoffset = t.rng.randrange(4)
         for relY, y in enumerate(ylist[0:3]):
             prevtile = t.getTile(x, y)
             overlaptile = obj21overlapfunc[relY](t, x, y, xlist, prevtile, height)
@@ -549,7 +549,7 @@ def obj21(t, x0, y0, width, height):
                 tileID = obj21defaults[relY] + randoffset
             t.setTile(tileID, x, y)
         for y in ylist[3:]:
-            t.setTile(random.choice(randmudinterior), x, y)
+            t.setTile(t.rng.choice(randmudinterior), x, y)
 
 obj24surfacebase = (0xA9608, 0x9300)
 def obj24(t, x0, y0, width, height):
@@ -559,16 +559,16 @@ def obj24(t, x0, y0, width, height):
     if height == 0:
         # make top row major if it's the only row
         for x in xlist:
-            t.setTile(0x9608 + random.randrange(4), x, y0)
+            t.setTile(0x9608 + t.rng.randrange(4), x, y0)
     else:
         # first 2 rows
         for tileID, y in zip(obj24surfacebase, ygen):
             for x in xlist:
-                t.setTile(tileID + random.randrange(4), x, y)
+                t.setTile(tileID + t.rng.randrange(4), x, y)
         # remaining rows
         for y in ygen:
             for x in xlist:
-                t.setTile(random.choice(randmudinterior), x, y)
+                t.setTile(t.rng.choice(randmudinterior), x, y)
 
 def _junglegrassoverlap(prevtile) -> int:
     if 0x9200 <= prevtile < 0x9204:
@@ -595,7 +595,7 @@ def obj22(t, x0, y0, _, height):
     for tileID, y in zip(obj22top, ygen):
         t.setTile(tileID, x1, y)
     for y in ygen:
-        _mudcolumn(t, x1, y, random.randrange(0x909E, 0x90A0),
+        _mudcolumn(t, x1, y, t.rng.randrange(0x909E, 0x90A0),
                    mudwall_overlap_left)
 
 obj23top = (0x9205,0x3512,0x909D)
@@ -607,7 +607,7 @@ def obj23(t, x0, y0, _, height):
     for tileID, y in zip(obj23top, ygen):
         t.setTile(tileID, x0, y)
     for y in ygen:
-        _mudcolumn(t, x0, y, random.randrange(0x9062, 0x9064),
+        _mudcolumn(t, x0, y, t.rng.randrange(0x9062, 0x9064),
                    mudwall_overlap_right)
 
     # column 1 (grass right tip)
@@ -626,7 +626,7 @@ def obj25(t, x, y0, _, height):
     t.setTile(0x9400, x, y)
     # remaining tiles
     for y in ygen:
-        _mudcolumn(t, x, y, random.randrange(0x909E, 0x90A0),
+        _mudcolumn(t, x, y, t.rng.randrange(0x909E, 0x90A0),
                    mudwall_overlap_left)
 
 def obj26(t, x, y0, _, height):
@@ -641,7 +641,7 @@ def obj26(t, x, y0, _, height):
     t.setTile(0x9502, x, y)
     # remaining tiles
     for y in ygen:
-        _mudcolumn(t, x, y, random.randrange(0x9062, 0x9064), mudwall_overlap_right)
+        _mudcolumn(t, x, y, t.rng.randrange(0x9062, 0x9064), mudwall_overlap_right)
 
 obj2728data = {
     0x27: {"slopetiles": (0x9400,0x905C),
@@ -663,9 +663,9 @@ def obj2728(t, x0, y0, width, height):
         for relY, y in enumerate(t.yrange(y0, height)):
             # default tile
             if relY < 2:
-                tileID = data["slopetiles"][relY] + random.randrange(2)
+                tileID = data["slopetiles"][relY] + t.rng.randrange(2)
             else:
-                tileID = random.choice(randmudinterior)
+                tileID = t.rng.choice(randmudinterior)
             # overlap checks
             if relY < 3:
                 prevtile = t.getTile(x, y)
@@ -698,12 +698,12 @@ obj292Arandcol = {
            ((0x9B02,0x963E,0x962E,0x9636,0x961B),    # 2A variant B, relX even
             (0x9B03,0x963F,0x962F,0x9637,0x9627))),  # 2A variant B, relX odd
     }
-def obj292Acolgen(randcol) -> Iterator[int]:
+def obj292Acolgen(t, randcol) -> Iterator[int]:
     # generate random pairs of columns
     while True:
-        yield from random.choice(randcol)
+        yield from t.rng.choice(randcol)
 def obj292A(t, x0, y0, width, height):
-    colgen = obj292Acolgen(obj292Arandcol[t.obj.ID])
+    colgen = obj292Acolgen(t, obj292Arandcol[t.obj.ID])
     parityX = 0
     adjheight = t.obj.adjheight
     for x in t.xrange(x0, width):
@@ -730,7 +730,7 @@ def obj2C(t, x0, y0, width, height):
     t.setTile(0x3511, x1, y)
     # remaining rows
     for y in ygen:
-        tileID = random.randrange(0x90DA, 0x90E2, 2)
+        tileID = t.rng.randrange(0x90DA, 0x90E2, 2)
         t.setTile(tileID, x0, y)
         t.setTile(tileID+1, x1, y)
 
@@ -755,10 +755,10 @@ def obj2D2Ecolumngen(tiles, height, y0overlap: bool) -> Iterator[int]:
         yield tiles["bottom"][0]
     yield tiles["bottom"][1]
 def obj2D2E(t, x, y0, _, height):
-    columngen = obj2D2Ecolumngen(random.choice(obj2D2Erandtiles), height,
+    columngen = obj2D2Ecolumngen(t.rng.choice(obj2D2Erandtiles), height,
                                  t.getTile(x, y0) == 0x9214)
     for y, tileID in zip(t.yrange(y0, height), columngen, strict=True):
-        if t.obj.ID == 0x2E and random.randrange(2):
+        if t.obj.ID == 0x2E and t.rng.randrange(2):
             if tileID == 0x9064:
                 t.setTile(0x907B, x, y)
                 t.setTile(0x907A, x-1, y, priority=False)
@@ -780,7 +780,7 @@ def obj2F(t, x, y0, _, height):
         t.setTile(0x990A, x, ylist[2])
     if height >= 2:
         for y in ylist[3:-1]:  # remaining rows
-            t.setTile(random.randrange(0x990B,0x990D), x, y)
+            t.setTile(t.rng.randrange(0x990B,0x990D), x, y)
         t.setTile(0x9206, x, ylist[-1])  # last row
 
 
@@ -812,7 +812,7 @@ def obj303136_junglevinegen(t, x, y0, height, randoffset) -> Iterator[int]:
             elif prevtile == 0x961C:
                 yield 0x9901
             else:
-                yield 0x9908 + randoffset + random.randrange(2)
+                yield 0x9908 + randoffset + t.rng.randrange(2)
 
     # last row
     y = next(ygen)
@@ -824,23 +824,23 @@ def obj303136_junglevinegen(t, x, y0, height, randoffset) -> Iterator[int]:
             yield obj303136_replace920F[prevtile - 0x920F]
     else:
         if randoffset == 0:
-            yield 0x00AC + random.randrange(2)
+            yield 0x00AC + t.rng.randrange(2)
         else:
-            yield 0x00AE + random.randrange(2)
+            yield 0x00AE + t.rng.randrange(2)
 
 def obj30(t, x, y0, _, height):
-    randoffset = random.choice((0, 0xB))
+    randoffset = t.rng.choice((0, 0xB))
     t.column_iter(obj303136_junglevinegen(t, x, y0, height, randoffset), x, y0)
 
 def obj3136(t, x, y0, _, height):
     if t.obj.ID == 0x31:
-        randoffset = random.choice((0, 0xB))
+        randoffset = t.rng.choice((0, 0xB))
     else:
         randoffset = 0xB
     for relY, (y, tileID) in enumerate(zip(t.yrange(y0, height),
                         obj303136_junglevinegen(t, x, y0, height, randoffset))):
         if 2 <= relY < height:
-            leafoffset = random.randrange(8)
+            leafoffset = t.rng.randrange(8)
             if leafoffset <= 5:
                 # replace central tile, add side leaves 3/4 of the time
                 tileID = 0x9902 + leafoffset
@@ -857,30 +857,30 @@ def obj3136(t, x, y0, _, height):
             t.setTile(tileID, x, y)
 
 def obj3233leftcheck(t, x, y) -> int:
-    tileID = random.randrange(0x90B6, 0x90BA)
+    tileID = t.rng.randrange(0x90B6, 0x90BA)
     if 0x90C4 <= t.getTile(x-1, y) < 0x90C8:
         tileID += 4
     return tileID
 def obj3233rightcheck(t, x, y) -> int:
-    tileID = random.randrange(0x90C4, 0x90C8)
+    tileID = t.rng.randrange(0x90C4, 0x90C8)
     if 0x90B6 <= t.getTile(x+1, y) < 0x90BA:
         tileID += 4
     return tileID
 obj32func = [
     lambda *_ : 0x90A8,
-    lambda *_ : random.randrange(0x90BE, 0x90C0),
+    lambda t, *_ : t.rng.randrange(0x90BE, 0x90C0),
     lambda *_: 0x90A9,
     obj3233leftcheck,
-    lambda *_ : random.randrange(0x90D2, 0x90DA),
+    lambda t, *_ : t.rng.randrange(0x90D2, 0x90DA),
     obj3233rightcheck,
     lambda t, x, y : 0x90CC if t.getTile(x, y) >> 8 == 0x92 else 0x90AE,
     lambda t, x, y : (0x90CE if t.getTile(x, y) >> 8 == 0x92 else 0x90B2)
-                      + random.randrange(4),
+                      + t.rng.randrange(4),
     lambda t, x, y : 0x90CD if t.getTile(x, y) >> 8 == 0x92 else 0x90AF,
     ]
 obj33func = [
     lambda *_ : 0x90AA,
-    lambda *_ : random.randrange(0x90C0, 0x90C4),
+    lambda t, *_ : t.rng.randrange(0x90C0, 0x90C4),
     lambda *_ : 0x90AB,
     ] + obj32func[3:]
 
@@ -894,7 +894,7 @@ def obj3233(t, x0, y0, width, height):
 def obj34(t, x0, y0, width, _):
     y1 = t.y_offset(y0, 1)
     for x in t.xrange(x0, width):
-        tile1 = random.randrange(0x964F,0x965F)
+        tile1 = t.rng.randrange(0x964F,0x965F)
         tile0 = tile1 - 0xF if tile1 <= 0x965A else -1
         if 0x9608 <= t.getTile(x, y1) < 0x960C:
             tile1 += 0x10
@@ -911,7 +911,7 @@ def obj35(t, x0, y0, width, height):
     parityX = 0
     for x in t.xrange(x0, width):
         if parityX == 0:
-            randindex = (random.randrange(4) == 0)  # 1/4 chance of 1
+            randindex = (t.rng.randrange(4) == 0)  # 1/4 chance of 1
         for relY, y in enumerate(ylist):
             # default tile
             if relY <= 1:
@@ -928,7 +928,7 @@ def obj35(t, x0, y0, width, height):
                     if relY == 0:
                         tileID = 0x9061
                     elif relY == 1:
-                        tileID = random.choice((0x9098,0x9098,0x9099,0x909A))
+                        tileID = t.rng.choice((0x9098,0x9098,0x9099,0x909A))
                     else:
                         tileID = 0x909B
                 case 0x94 | 0x95:  # water slope
@@ -1006,7 +1006,7 @@ obj38tiles = ((0x9D00,0x9D01,0x9D02,0x9D03,0x9D0A,0x9D0B,0x9D0C,0x9D0D,
               (0x9D1C,0x9D1D,0x9D1E,0x9D1F,0x9D24,0x9D25,0x9D26,0x9D27,
                0x9D2A,0x9D2B,0x9D2C,0x9D2D))  # palette 3
 def obj38(t, x0, y0, width, height):
-    tiles = random.choice(obj38tiles)
+    tiles = t.rng.choice(obj38tiles)
     xlist = list(t.xrange(x0, width))
     ylist = list(t.yrange(y0, height))
 
@@ -1143,7 +1143,7 @@ def obj4243486C_addshadows_right(t, x, ylist):
         prevtile = t.getTile(x, y)
         if 0x0084 <= prevtile < 0x0089:
             if y == ylist[1]:
-                tileID = random.randrange(0x0084, 0x0088)
+                tileID = t.rng.randrange(0x0084, 0x0088)
             else:
                 tileID = 0x0031
         else:
@@ -1457,7 +1457,7 @@ def obj47(t, x0, y0, width, height):
 
     # row 0: lava surface
     for x in xlist:
-        tileID = random.choice(obj47randsurface)
+        tileID = t.rng.choice(obj47randsurface)
         match t.getTile(x, y0-1):
             # replace certain BG walls above
             case 0x00C2:
@@ -1850,7 +1850,7 @@ def obj595E(t, x0, y0, width, height):
                 tileID = -1
             t.setTile(tileID, x, y)
         for y in ygen:
-            t.setTile(random.choice(landinterior_randtile), x, y)
+            t.setTile(t.rng.choice(landinterior_randtile), x, y)
 
         # adjust for slope, except if second-to-last column
         if x != xlist[-2] and (parityX == 0 or not data["parityX"]):
@@ -1910,12 +1910,12 @@ def obj5F60(t, x0, y0, width, height):
             rightcolumn = False  # the game also decrements width if so
         elif t.obj.ID == 0x5F and parityX == 0 and height > 1:
             height -= 1
-            t.setTile(random.choice(landinterior_randtile), x, y0)
+            t.setTile(t.rng.choice(landinterior_randtile), x, y0)
             ylist = list(t.yrange(y0+1, height-1))
 
         # before last 2 rows: land interior
         for y in ylist[:-2]:
-            t.setTile(random.choice(landinterior_randtile), x, y)
+            t.setTile(t.rng.choice(landinterior_randtile), x, y)
         # last 2 rows: sloped surface
         for y, tileID in zip(reversed(ylist[-2:]), tiles):
             t.setTile(tileID, x, y)
@@ -1962,7 +1962,7 @@ def obj6162(t, x0, y0, width, height):
 
         # before last 2 rows: land interior
         for y in ylist[:-2]:
-            t.setTile(random.choice(landinterior_randtile), x, y)
+            t.setTile(t.rng.choice(landinterior_randtile), x, y)
         # last 2 rows: sloped surface
         for y, tileID in zip(reversed(ylist[-2:]), tiles):
             if tileID == 0xD191E:  # special casing for 19/1D/701E
@@ -2006,7 +2006,7 @@ def obj67replace19(t, x, y, data, offset):
 def obj67(t, x0, y0, width, height):
     if t.tileset == 0xC:
         for y, x in itertools.product(t.yrange(y0, height), t.xrange(x0, width)):
-            offset = random.randrange(0x40)
+            offset = t.rng.randrange(0x40)
             if offset <= 0xA:
                 tileID = 0x79BB + offset
             else:
@@ -2017,7 +2017,7 @@ def obj67(t, x0, y0, width, height):
         xlist = list(t.xrange(x0, width))
         ylist = list(t.yrange(y0, height))
         for x, y in itertools.product(xlist, ylist):
-            t.setTile(random.choice(landinterior_randtile), x, y)
+            t.setTile(t.rng.choice(landinterior_randtile), x, y)
 
         # modify BG walls in each direction
         x_left = xlist[0] - 1
@@ -2077,10 +2077,10 @@ def obj6C(t, x0, y0, width, height):
 def obj6D(t, x, y0, _, height):
     t.column_iter(genseq_bordered(height+1, 0xD6C00, 0xD6B01, 0xD6B02), x, y0)
 
-def obj6Egen() -> Iterator[int]:
-    while True: yield random.randrange(0x0199, 0x01A1)
+def obj6Egen(t) -> Iterator[int]:
+    while True: yield t.rng.randrange(0x0199, 0x01A1)
 def obj6E(t, x0, y0, width, height):
-    t.rect_iter_column(obj6Egen(), x0, y0, width, height)
+    t.rect_iter_column(obj6Egen(t), x0, y0, width, height)
 
 #### Objects 6F-78: Forest trees
 
@@ -2089,7 +2089,7 @@ def obj6F(t, x, y0, _, height):
         if relY == height and t.getdyn(x, y) in (0x2A00,0x2A01):
             t.setTile(0x3D4B, x, y)
         else:
-            t.setTile(random.randrange(0x3D3B, 0x3D3D), x, y)
+            t.setTile(t.rng.randrange(0x3D3B, 0x3D3D), x, y)
 
 obj7376data = {
     0x73: (2, (0x3D42,0x3D43,0x3D44,0x3D50,0x3D51,0x3D52)),
@@ -2347,7 +2347,7 @@ def obj85(t, x0, y0, width, height):
 
         # before last 2 rows: land interior
         for y in ylist[:-2]:
-            t.setTile(random.choice(landinterior_randtile), x, y)
+            t.setTile(t.rng.choice(landinterior_randtile), x, y)
         # last 2 rows: sloped surface
         for y, tileID in zip(reversed(ylist[-2:]), obj85tiles):
             t.setTile(tileID, x, y)
@@ -2382,7 +2382,7 @@ def obj86(t, x0, y0, width, height):
 
         # before last 2 rows: land interior
         for y in ylist[:-2]:
-            t.setTile(random.choice(landinterior_randtile), x, y)
+            t.setTile(t.rng.choice(landinterior_randtile), x, y)
         # last 2 rows: sloped surface
         for y, tileID in zip(reversed(ylist[-2:]), obj86tiles):
             t.setTile(tileID, x, y)
@@ -2427,7 +2427,7 @@ def obj8788(t, x0, y0, width, height):
         if pos != "center" and t.getdyn(x, ylist[1]) in obj8788surfacecheck:
             tileID = obj8788edgereplace[pos][1]
         else:
-            tileID = random.choice(surfacetiles)
+            tileID = t.rng.choice(surfacetiles)
         t.setTile(tileID, x, ylist[1])
 
         # remaining rows
@@ -2486,7 +2486,7 @@ def obj8C(t, x0, y0, width, _):
 def obj8D(t, x, y0, _, height):
     ylist = list(t.yrange(y0, height))
     for y in ylist[:-1]:
-        t.setTile(random.choice((0x3D70,0x3DA7)), x, y)
+        t.setTile(t.rng.choice((0x3D70,0x3DA7)), x, y)
     t.setTile(0x3D6F, x, ylist[-1])
 
 #### Objects 8F-93: Forest logs and more trees
@@ -2664,7 +2664,7 @@ obj9A9Crandmid = (  # first tile for adjheight^Y parity 0, second for parity 1
 obj9A9Crandlast = range(0x7723, 0x7730, 4)
 
 def obj9A(t, x0, y0, _, height):
-    randindex = random.randrange(4)
+    randindex = t.rng.randrange(4)
     ylist = list(t.yrange(y0, height))
     xlist = list(t.xrange(x0-2, 3))
     stemX = xlist[2 if (height & 1 == 0) else 1]
@@ -2688,7 +2688,7 @@ def obj9A(t, x0, y0, _, height):
         t.setTile(obj9A9Crandlast[randindex], stemX, ylist[-1])
 
 def obj9B9C(t, x, y0, _, height):
-    randindex = random.randrange(4)
+    randindex = t.rng.randrange(4)
     ygen = t.yrange(y0, height)
     toptiles = obj9B9Crandtop[t.obj.ID][height & 1][randindex]
     parityY = height & 1 ^ 1  # swap parity if raw height even (adjheight odd)
@@ -2868,7 +2868,7 @@ def objA8(t, x0, y0, width, height):
             t.setTile(0x777C + thornbits, x, y)
         else:
             # filler tile to ensure object is visible, acts as tile 0
-            t.setTile(MultiTileID(0, 0x100A8), x, y)
+            t.setTile(0, x, y, displayID=0x100A8)
     # remove thorn edges
     for x in xlist[1:-1]:
         # top edge
@@ -3002,7 +3002,7 @@ def objAC(t, x0, y0, width, _):
         objACAD(t, x0, y0, width, _)
     else:  # unfinished unrelated object outside sewer tileset: runs ext46 code
         for x in t.xrange(x0, width):
-            t.setTile(random.choice((0x5F00,0x5F01,0x5F03,0x5F03)), x, y0)
+            t.setTile(t.rng.choice((0x5F00,0x5F01,0x5F03,0x5F03)), x, y0)
 
 def objAE(t, x0, y0, _, height):
     x1 = t.x_offset(x0, 1)
@@ -3372,13 +3372,13 @@ def objD4D5(t, x0, y0, _, height):
                         tileID, tile_side = finish2x2tiles[index-6]
                         index = -1
                     else:
-                        index = random.randrange(8)
+                        index = t.rng.randrange(8)
                         if index >= 6 and y == ylist[-2]:
                             # don't start a 2x2 block in the last row before the corner
                             index -= 4
                         tileID, tile_side = randomtiles[index]
                 else:
-                    tileID, tile_side = randomtiles[random.randrange(8)]
+                    tileID, tile_side = randomtiles[t.rng.randrange(8)]
                 if tile_side is not None:
                     t.setTile(tile_side, x_side, y, priority=False)
             t.setTile(tileID, x0, y)
@@ -3409,7 +3409,7 @@ def objD6D7(t, x0, y0, width, _):
                     tileID, tile_side = finish2x2tiles[index-6]
                     index = -1
                 else:
-                    index = random.randrange(8)
+                    index = t.rng.randrange(8)
                     if index >= 6 and x == xlist[-2]:
                         # don't start a 2x2 block in the last column before the corner
                         index -= 4
@@ -3443,7 +3443,7 @@ def objDB(t, x0, y0, width, height):
     for x in t.xrange(x0, width):
         # row 0
         if t.getTile(x, y0) == 0:
-            t.setTile(random.choice(objDBsurface), x, y0)
+            t.setTile(t.rng.choice(objDBsurface), x, y0)
         # remaining rows
         tilegen = iter(objDBcolumns[parity])
         for y in ylist[1:]:
@@ -3494,7 +3494,7 @@ objDDinterior = ((0x8C0F,0x8C10,0x8C11,0x8C10,0x8C11,0x8C12,0x8C0F,0x8C10),
 def objDD(t, x0, y0, width, height):
     xlist = list(t.xrange(x0, width))
     ylist = list(t.yrange(y0, height))
-    randstart = random.randrange(8)
+    randstart = t.rng.randrange(8)
 
     # row 0
     parityX = 0
@@ -3554,7 +3554,7 @@ def objE1(t, x0, y0, width, height):
     xlist = list(t.xrange(x0, width))
     ylist = list(t.yrange(y0, height))
     # row 0: mushroom cap platform
-    captiles = objE1captiles[random.choice(objE1dist)]
+    captiles = objE1captiles[t.rng.choice(objE1dist)]
     for x, tileID in zip(xlist, itertools.cycle(captiles)):
         if 0x8D2A <= t.getTile(x, y0) < 0x8D2E:
             tileID += 1
@@ -3598,8 +3598,8 @@ def objE2(t, x0, y0, _, height):
 
 #### Objects E4-EC: Flower tileset ground
 
-def objE4EArandinterior(i: int) -> int:
-    offset = random.randrange(0x10) + 2 * i
+def objE4EArandinterior(t, i: int) -> int:
+    offset = t.rng.randrange(0x10) + 2 * i
     if 0 <= offset <= 9:
         return 0x79BB + offset
     else:
@@ -3629,11 +3629,11 @@ def objE4(t, x0, y0, width, height):
     parityX = 0
     for x in t.xrange(x0, width):
         if parityX == 0:
-            randcolgen = iter(objE4colpairs[random.choice(objE4dist)])
+            randcolgen = iter(objE4colpairs[t.rng.choice(objE4dist)])
         for y, tileID in zip(ylist[0:3], next(randcolgen)):
             t.setTile(tileID, x, y)
         for i, y in enumerate(ylist[3:]):
-            t.setTile(objE4EArandinterior(i), x, y)
+            t.setTile(objE4EArandinterior(t, i), x, y)
         parityX ^= 1
 
 objE5toEAdata = {
@@ -3699,13 +3699,13 @@ def objE5E8(t, x0, y0, width, height):
 
     for x in t.xrange(x0, width):
         if parityX == 0:
-            randcolgen = iter(data["tiles"][random.choice(objE5toEAdist)])
+            randcolgen = iter(data["tiles"][t.rng.choice(objE5toEAdist)])
         ygen = t.yrange(y0, height)
 
         for tileID, y in zip(next(randcolgen), ygen):
             t.setTile(tileID, x, y)
         for i, y in enumerate(ygen):
-            t.setTile(objE4EArandinterior(i), x, y)
+            t.setTile(objE4EArandinterior(t, i), x, y)
 
         if parityX == 1:  # adjust for slope
             if height == 0:
@@ -3725,7 +3725,7 @@ def objE6E7E9EA(t, x0, y0, width, height):
 
     for x in t.xrange(x0, width):
         ygen = t.yrange_adj(y0, adjheight)
-        randcol = data["tiles"][random.choice(objE5toEAdist)]
+        randcol = data["tiles"][t.rng.choice(objE5toEAdist)]
         if adjheight < 0:  # negative height due to slope -2: glitched behavior
             randcol = randcol[0:1]
 
@@ -3734,7 +3734,7 @@ def objE6E7E9EA(t, x0, y0, width, height):
         for i, y in enumerate(ygen):
             if adjheight < 0:  # negative height due to slope -2: glitched behavior
                 i = -5 - i
-            t.setTile(objE4EArandinterior(i), x, y)
+            t.setTile(objE4EArandinterior(t, i), x, y)
 
         # adjust for slope
         adjheight -= data["slope"]
@@ -3763,7 +3763,7 @@ def objEBEC(t, x0, y0, width, height):
 
     for x in t.xrange(x0, width):
         # rows 0-2: use tiles from slope 2 or -2
-        for tileID, y in zip(random.choice(data["slopetiles"]), ylist):
+        for tileID, y in zip(t.rng.choice(data["slopetiles"]), ylist):
             t.setTile(tileID, x, y)
 
         # remaining rows
@@ -3772,7 +3772,7 @@ def objEBEC(t, x0, y0, width, height):
             tileID = data["maintile"] + parityY
             # check tiles on either side
             if t.getTile(x - data["awaydir"], y) >> 8 == 0x79:
-                t.setTile(random.choice(objEBECsidereplace),
+                t.setTile(t.rng.choice(objEBECsidereplace),
                           x - data["awaydir"], y,
                           priority=False, highlight=False)
             if y != ylist[-1]:
@@ -3807,10 +3807,10 @@ def objED_row0gen(width, parity) -> Iterator[int]:
             parity ^= 1
         # right tile
         yield 0x3D0B if parity else 0x3D09
-def objED_rowgen(width, parity, randoffsets) -> Iterator[int]:
+def objED_rowgen(t, width, parity, randoffsets) -> Iterator[int]:
     # remaining rows
     # left tile
-    tileID = 0x79E9 - parity + random.choice(randoffsets)
+    tileID = 0x79E9 - parity + t.rng.choice(randoffsets)
     yield tileID
     if width != 0:
         parity ^= 1
@@ -3819,11 +3819,11 @@ def objED_rowgen(width, parity, randoffsets) -> Iterator[int]:
             if parity:
                 yield tileID + 1
             else:
-                tileID = 0x79E9 + random.choice(randoffsets)
+                tileID = 0x79E9 + t.rng.choice(randoffsets)
                 yield tileID
             parity ^= 1
         # right tile
-        yield tileID + 1 if parity else 0x79E8 + random.choice(randoffsets)
+        yield tileID + 1 if parity else 0x79E8 + t.rng.choice(randoffsets)
 
 def objED(t, x0, y0, width, height):
     parity = (x0^y0)&1
@@ -3833,7 +3833,7 @@ def objED(t, x0, y0, width, height):
             tilegen = objED_row0gen(width, parity)
         else:
             i = min(i, 4)
-            tilegen = objED_rowgen(width, parity, (i//2*3, (i+1)//2*3))
+            tilegen = objED_rowgen(t, width, parity, (i//2*3, (i+1)//2*3))
         for x in xlist:
             t.setTile(next(tilegen), x, y)
         parity ^= 1
@@ -3891,7 +3891,7 @@ def obj20EEF3(t, x0, y0, width, height):
             if shaded:
                 if tileID == 0x0106:
                     # 1-wide brick
-                    index = relY3 >> 1 if relY3 <= 5 else random.randint(2, 3)
+                    index = relY3 >> 1 if relY3 <= 5 else t.rng.randint(2, 3)
                     tileID = objEEF3_shaded1wide[index]
                 elif tileID == 0x0109:
 ##                if tileID in (0x0109,0x79E3,0x79E6):
@@ -3903,7 +3903,7 @@ def obj20EEF3(t, x0, y0, width, height):
                         tileID = checktile + 1
                 else:
                     # left brick half
-                    index = relY3 + random.randint(0, 3)
+                    index = relY3 + t.rng.randint(0, 3)
                     tileID = 0x79E2 if index >= 3 else 0x0108
             if t.obj.ID == 0xEE:
                 tileID = objEE_modifier(tileID)
@@ -1,4 +1,3 @@
-from .Shared import MultiTileID
 from .StandardObjects import stdobjs, objcount
 from .ExtendedObjects import extobjs, extcount
 from .SidebarAlt import extobjs_alt, stdobjs_alt
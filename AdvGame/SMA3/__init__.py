@@ -5,7 +5,9 @@ ScanlineOffsetData as submodules."""
 
 from . import Constants, Pointers, PointersAdv, PointersSNES, ScanlineOffsetData
 from .Level import *
-from .L1Tilemap import L1Tilemap, L1TilemapOverflowError
+from .L1Tilemap import (
+    L1Tilemap, L1TilemapOverflowError, L1TilemapCancelled, L1Checkpoints,
+    L1FootprintCache)
 from .Graphics import *
 from .Text import *
 from .MetadataTSVParser import ObjectMetadata, SpriteMetadata